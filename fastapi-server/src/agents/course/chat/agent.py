@@ -1,15 +1,19 @@
-from typing import List
+from typing import AsyncIterator, List
 
 from src.utils.llm import get_llm_service
+from src.utils.tokens import budget_share, truncate_to_tokens
 from src.models.course import ChatResponseSchema
 from src.prompts.course import CHAT_SYSTEM_PROMPT
 
 
 class ChatAgent:
+    # Share of the model's prompt budget given to the chapter text
+    CONTENT_SHARE = 0.004
+
     def __init__(self):
         self.llm = get_llm_service()
     
-    async def respond(
+    def _build_prompts(
         self,
         message: str,
         chapter_title: str,
@@ -17,10 +21,9 @@ class ChatAgent:
         chapter_content: str,
         chat_history: List[dict] = None,
         context: str = None
-    ) -> ChatResponseSchema:
-        max_content_length = 2000
-        if len(chapter_content) > max_content_length:
-            chapter_content = chapter_content[:max_content_length] + "..."
+    ) -> tuple[str, str]:
+        max_content_tokens = budget_share(self.CONTENT_SHARE, self.llm.model_name)
+        chapter_content = truncate_to_tokens(chapter_content, max_content_tokens, "...")
         
         system_prompt = CHAT_SYSTEM_PROMPT.format(
             chapter_title=chapter_title,
@@ -44,6 +47,20 @@ class ChatAgent:
         prompt_parts.append("\nProvide a helpful response:")
         
         prompt = "\n".join(prompt_parts)
+        return system_prompt, prompt
+
+    async def respond(
+        self,
+        message: str,
+        chapter_title: str,
+        chapter_summary: str,
+        chapter_content: str,
+        chat_history: List[dict] = None,
+        context: str = None
+    ) -> ChatResponseSchema:
+        system_prompt, prompt = self._build_prompts(
+            message, chapter_title, chapter_summary, chapter_content, chat_history, context
+        )
 
         response = await self.llm.generate_structured(
             prompt=prompt,
@@ -53,6 +70,20 @@ class ChatAgent:
         
         return response
 
+    def stream_respond(
+        self,
+        message: str,
+        chapter_title: str,
+        chapter_summary: str,
+        chapter_content: str,
+        chat_history: List[dict] = None,
+        context: str = None
+    ) -> AsyncIterator[str]:
+        system_prompt, prompt = self._build_prompts(
+            message, chapter_title, chapter_summary, chapter_content, chat_history, context
+        )
+        return self.llm.stream(prompt=prompt, system_prompt=system_prompt)
+
 
 _chat_agent = None
 
@@ -3,6 +3,7 @@ import json
 from typing import List, Optional, Dict, Any
 
 from src.utils.llm import get_llm_service
+from src.utils.tokens import budget_share, truncate_to_tokens
 from src.models.course.content_schemas import StructuredChapterContent, ContentSection
 from src.prompts.course.content_writer_prompts import (
     CONTENT_WRITER_SYSTEM_PROMPT,
@@ -13,7 +14,9 @@ logger = logging.getLogger(__name__)
 
 
 class ContentWriterAgent:
-    
+    # Share of the model's prompt budget given to reference material
+    CONTEXT_SHARE = 0.006
+
     def __init__(self):
         self.llm = get_llm_service()
     
@@ -35,7 +38,7 @@ class ContentWriterAgent:
 
 Use the following research to ensure accuracy:
 
-{context[:3000]}
+{truncate_to_tokens(context, budget_share(self.CONTEXT_SHARE, self.llm.model_name))}
 """
 
         prompt = CONTENT_WRITER_USER_PROMPT.format(
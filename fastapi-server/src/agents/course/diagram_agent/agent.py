@@ -1,9 +1,11 @@
 import os
 import json
+import asyncio
 import logging
 from typing import List, Dict, Any
 
 from src.utils.llm import get_llm_service
+from src.utils.tokens import budget_share, truncate_to_tokens
 from src.utils.code_checker import ESLintValidator, clean_up_response, find_react_code_in_response
 from src.prompts.course import DIAGRAM_SYSTEM_PROMPT, DIAGRAM_USER_PROMPT
 
@@ -31,6 +33,11 @@ def extract_react_code_from_delimiters(response: str) -> str:
 
 
 class DiagramAgent:
+    # Shares of the model's prompt budget (see budget_share)
+    DESCRIPTION_SHARE = 0.001
+    SECTION_SHARE = 0.003
+    CONTEXT_SHARE = 0.001
+
     def __init__(self, iterations: int = 5):
         self.llm = get_llm_service(provider="groq", model="qwen/qwen3-32b")
         self.eslint = ESLintValidator()
@@ -83,7 +90,7 @@ class DiagramAgent:
                     logger.warning(f"Attempt {attempt+1}: No valid React code found in response")
                     validation_check = {'errors': [{'message': 'No valid React code found. Use <REACT_CODE> delimiters.'}]}
                 else:
-                    validation_result = self.eslint.validate_jsx(extracted_code)
+                    validation_result = await asyncio.to_thread(self.eslint.validate_jsx, extracted_code)
 
                     if validation_result['valid']:
                         logger.info("Diagram Code Validation Passed")
@@ -142,17 +149,19 @@ Nothing before <REACT_CODE>, nothing after </REACT_CODE>.
             if data.get("chapter_title"):
                 context_parts.append(f"**CHAPTER:** {data['chapter_title']}")
             if data.get("section_content"):
-                section_text = data["section_content"][:1500]
+                section_text = truncate_to_tokens(
+                    data["section_content"], budget_share(self.SECTION_SHARE, self.llm.model_name)
+                )
                 context_parts.append(f"**SECTION CONTENT:**\n{section_text}")
         
         if context:
-            context_parts.append(f"**ADDITIONAL CONTEXT:**\n{context[:500]}")
+            context_parts.append(f"**ADDITIONAL CONTEXT:**\n{truncate_to_tokens(context, budget_share(self.CONTEXT_SHARE, self.llm.model_name))}")
         
         context_section = "\n\n".join(context_parts) if context_parts else "No specific context provided."
 
         prompt = DIAGRAM_USER_PROMPT.format(
             title=title,
-            description=description,
+            description=truncate_to_tokens(description, budget_share(self.DESCRIPTION_SHARE, self.llm.model_name)),
             plugin_docs=self.plugin_docs,
             context_section=context_section
         )
@@ -1,6 +1,7 @@
 from typing import List, Optional, Callable
 
 from src.utils.llm import get_llm_service
+from src.utils.tokens import budget_share, fit_to_budget, truncate_to_tokens
 from src.models.course import (
     FlashcardConfig, FlashcardType, TaskStatus,
     FlashcardPreview, MultipleChoiceQuestion, LearningCard,
@@ -17,7 +18,10 @@ from src.utils.anki import AnkiDeckGenerator
 
 
 class FlashcardAgent:
-    
+    # Shares of the model's prompt budget (see budget_share)
+    SAMPLE_SHARE = 0.004
+    MCQ_SOURCE_SHARE = 0.2
+
     def __init__(self):
         self.llm = get_llm_service()
         self.pdf_parser = PDFParser()
@@ -43,7 +47,7 @@ class FlashcardAgent:
         sample_learning_card = None
 
         if config.type == FlashcardType.TESTING:
-            sample_text = pdf_data["total_text"][:2000]
+            sample_text = truncate_to_tokens(pdf_data["total_text"], budget_share(self.SAMPLE_SHARE, self.llm.model_name))
             questions = await self.generate_mcq_questions(
                 sample_text, 
                 config.difficulty.value, 
@@ -212,9 +216,8 @@ class FlashcardAgent:
         difficulty: str, 
         num_questions: int
     ) -> List[MultipleChoiceQuestion]:
-        max_chars = 100000
-        if len(text) > max_chars:
-            text = text[:max_chars]
+        max_tokens = budget_share(self.MCQ_SOURCE_SHARE, self.llm.model_name)
+        text = fit_to_budget(text, max_tokens, self.llm.model_name, marker="")
 
         prompt = MCQ_USER_PROMPT.format(
             num_questions=num_questions,
@@ -1,11 +1,16 @@
 from typing import List
 
 from src.utils.llm import get_llm_service
+from src.utils.tokens import budget_share, fit_to_budget, truncate_to_tokens
 from src.models.course import GraphExpansionPlan
 from src.prompts.course import GRAPH_EXPANSION_SYSTEM_PROMPT, GRAPH_EXPANSION_USER_PROMPT
 
 
 class GraphExpansionAgent:
+    # Shares of the model's prompt budget (see budget_share)
+    MATERIAL_SHARE = 0.016
+    NODE_SUMMARY_TOKENS = 25
+
     def __init__(self):
         self.llm = get_llm_service()
     
@@ -17,7 +22,7 @@ class GraphExpansionAgent:
         existing_edges: List[dict],
     ) -> GraphExpansionPlan:
         nodes_text = "\n".join([
-            f"- {node['id']}: {node['title']} - {node.get('summary', '')[:100]}"
+            f"- {node['id']}: {node['title']} - {truncate_to_tokens(node.get('summary', ''), self.NODE_SUMMARY_TOKENS)}"
             for node in existing_nodes
         ])
 
@@ -26,9 +31,12 @@ class GraphExpansionAgent:
             for edge in existing_edges
         ])
         
-        truncated_content = material_content[:8000]
-        if len(material_content) > 8000:
-            truncated_content += "\n\n[Content truncated for analysis...]"
+        truncated_content = fit_to_budget(
+            material_content,
+            budget_share(self.MATERIAL_SHARE, self.llm.model_name),
+            self.llm.model_name,
+            marker="\n\n[Content truncated for analysis...]"
+        )
 
         prompt = GRAPH_EXPANSION_USER_PROMPT.format(
             course_title=course_title,
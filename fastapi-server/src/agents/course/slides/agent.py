@@ -3,6 +3,7 @@ import logging
 from typing import List, Optional
 
 from src.utils.llm import get_llm_service
+from src.utils.tokens import budget_share, truncate_to_tokens
 from src.models.course import SlideContent, SlideGenerationOutput
 from src.prompts.course import HTML_SYSTEM_PROMPT, SLIDE_USER_PROMPT
 
@@ -11,6 +12,9 @@ logger = logging.getLogger(__name__)
 
 
 class SlideAgent:
+    # Share of the model's prompt budget given to additional context
+    CONTEXT_SHARE = 0.006
+
     def __init__(self):
         self.llm = get_llm_service()
         self.revealjs_docs = self._load_revealjs_docs()
@@ -44,7 +48,7 @@ class SlideAgent:
         context: Optional[str] = None
     ) -> SlideContent:
         objectives_text = "\n".join(f"- {obj}" for obj in learning_objectives)
-        context_section = f"Additional Context: {context[:3000]}" if context else ""
+        context_section = f"Additional Context: {truncate_to_tokens(context, budget_share(self.CONTEXT_SHARE, self.llm.model_name))}" if context else ""
         
         prompt = SLIDE_USER_PROMPT.format(
             title=title,
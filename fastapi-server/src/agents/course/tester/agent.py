@@ -1,9 +1,13 @@
 from src.utils.llm import get_llm_service
+from src.utils.tokens import budget_share, truncate_to_tokens
 from src.models.course import QuizQuestions
 from src.prompts.course import TESTER_SYSTEM_PROMPT, TESTER_USER_PROMPT
 
 
 class TesterAgent:  
+    # Share of the model's prompt budget given to the chapter text
+    CONTENT_SHARE = 0.006
+
     def __init__(self):
         self.llm = get_llm_service()
     
@@ -15,9 +19,8 @@ class TesterAgent:
         num_mcq: int = 3,
         num_open_text: int = 2
     ) -> QuizQuestions:
-        max_content_length = 3000
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "..."
+        max_content_tokens = budget_share(self.CONTENT_SHARE, self.llm.model_name)
+        content = truncate_to_tokens(content, max_content_tokens, "...")
 
         prompt = TESTER_USER_PROMPT.format(
             title=title,
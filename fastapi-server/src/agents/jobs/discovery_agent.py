@@ -8,6 +8,7 @@ from src.config.settings import settings
 from src.config.ats_companies import get_ats_companies_for_industry
 from src.models.jobs.schemas import DiscoveredJob, DiscoveryResult
 from src.utils.job_date import is_job_recent
+from src.utils.offline import fake_job_listings, is_fake
 
 
 class DiscoveryAgent:
@@ -21,6 +22,16 @@ class DiscoveryAgent:
         remote_only: bool = False,
         max_results_per_query: int = 10
     ) -> List[DiscoveryResult]:
+        if is_fake():
+            return [
+                DiscoveryResult(
+                    jobs=[DiscoveredJob(**job) for job in fake_job_listings(query, max_results_per_query)],
+                    source="fake",
+                    query_used=query
+                )
+                for query in queries[:5]
+            ]
+
         results = []
 
         if self.serpapi_key:
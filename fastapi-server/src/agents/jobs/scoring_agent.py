@@ -1,11 +1,10 @@
 from typing import Optional, List
 
-import chromadb.utils.embedding_functions as embedding_functions
 import numpy as np
 
-from src.config.settings import settings
 from src.utils.llm import get_llm_service
-from src.utils.vector import get_vector_service
+from src.utils.tokens import budget_share, truncate_to_tokens
+from src.utils.vector import get_embedding_function, get_vector_service, run_blocking
 from src.models.jobs.schemas import EnrichedJob, JobScore, ScoringResult
 from src.models.jobs.schemas import ResumeProfile, ManualJobInput
 from src.prompts.jobs.scoring_prompts import SCORING_WEIGHTS, SCORING_SYSTEM_PROMPT, SCORING_USER_PROMPT
@@ -13,16 +12,15 @@ from src.utils.job_text import extract_years_required
 
 
 class ScoringAgent:
-    
+    # Shares of the model's prompt budget (see budget_share)
+    DESCRIPTION_SHARE = 0.001
+    # Cut to what the embedding model reads, not the LLM window
+    EMBED_DESCRIPTION_TOKENS = 250
+
     def __init__(self):
         self.llm = get_llm_service()
         self.vector_service = get_vector_service()
-        self.embedding_fn = None
-        if settings.google_cloud_api:
-            self.embedding_fn = embedding_functions.GoogleGenerativeAiEmbeddingFunction(
-                api_key=settings.google_cloud_api,
-                model_name="gemini-embedding-001"
-            )
+        self.embedding_fn = get_embedding_function()
     
     async def score_jobs(
         self,
@@ -76,7 +74,7 @@ class ScoringAgent:
     ) -> JobScore:
         component_scores = {}
         
-        skills_score = self._calculate_skills_score(
+        skills_score = await self._calculate_skills_score(
             candidate_skills, 
             job.requirements,
             job.description
@@ -113,7 +111,7 @@ class ScoringAgent:
             match_explanation=""
         )
     
-    def _calculate_skills_score(
+    async def _calculate_skills_score(
         self,
         candidate_skills: List[str],
         job_requirements: List[str],
@@ -125,10 +123,11 @@ class ScoringAgent:
         if self.embedding_fn:
             try:
                 candidate_text = f"Skills and experience: {', '.join(candidate_skills[:20])}"
-                job_text = f"{' '.join(job_requirements[:10])} {job_description[:1000]}"
+                job_text = f"{' '.join(job_requirements[:10])} {truncate_to_tokens(job_description, self.EMBED_DESCRIPTION_TOKENS)}"
                 
-                candidate_embedding = self.embedding_fn([candidate_text])[0]
-                job_embedding = self.embedding_fn([job_text])[0]
+                candidate_embedding, job_embedding = await run_blocking(
+                    self.embedding_fn, [candidate_text, job_text]
+                )
                 
                 dot_product = np.dot(candidate_embedding, job_embedding)
                 norm_a = np.linalg.norm(candidate_embedding)
@@ -236,13 +235,16 @@ class ScoringAgent:
                 job_title=job.title,
                 job_company=job.company,
                 job_requirements=", ".join(job.requirements[:10]),
-                job_description=job.description[:500]
+                job_description=truncate_to_tokens(
+                    job.description, budget_share(self.DESCRIPTION_SHARE, self.llm.model_name)
+                )
             )
             
             result = await self.llm.generate_structured(
                 prompt=prompt,
                 output_schema=SkillAnalysis,
-                system_prompt=SCORING_SYSTEM_PROMPT
+                system_prompt=SCORING_SYSTEM_PROMPT,
+                cache=True
             )
             
             matching = result.matching_skills
@@ -68,7 +68,8 @@ Use this research to ensure the roadmap includes current, relevant topics."""
         result = await self.llm.generate_structured(
             prompt=prompt,
             output_schema=RoadmapStructure,
-            system_prompt=ROADMAP_SYSTEM_PROMPT
+            system_prompt=ROADMAP_SYSTEM_PROMPT,
+            cache=True
         )
 
         return result
@@ -109,7 +110,8 @@ VERIFIED RESOURCES (Prioritize these links):
         result = await self.llm.generate_structured(
             prompt=prompt,
             output_schema=NodeDetails,
-            system_prompt=NODE_DETAILS_SYSTEM_PROMPT
+            system_prompt=NODE_DETAILS_SYSTEM_PROMPT,
+            cache=True
         )
 
         return result
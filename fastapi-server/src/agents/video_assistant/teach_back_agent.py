@@ -1,10 +1,11 @@
-import json
 import logging
 import uuid
 from typing import List, Optional, Dict
 from datetime import datetime
 
 from src.utils.llm import get_llm_service
+from src.utils.json_repair import loads_json
+from src.utils.tokens import budget_share, fit_to_budget, truncate_to_tokens
 from src.prompts.video_assistant.teach_back_prompts import (
     TEACH_BACK_EXTRACT_CONCEPTS_PROMPT,
     TEACH_BACK_EVALUATION_PROMPT,
@@ -23,6 +24,10 @@ logger = logging.getLogger(__name__)
 
 
 class TeachBackAgent:
+    # Shares of the model's prompt budget (see budget_share)
+    CONCEPT_SOURCE_SHARE = 0.016
+    EXCERPT_SHARE = 0.004
+
     def __init__(self):
         self.llm = get_llm_service()
         self.active_sessions: Dict[str, dict] = {}
@@ -53,7 +58,9 @@ class TeachBackAgent:
                 video_title=video_title,
                 time_range=time_range_str,
                 end_time_range=self._format_time(end_time) if end_time else "end",
-                full_text=full_text[:8000],
+                full_text=fit_to_budget(
+                    full_text, budget_share(self.CONCEPT_SOURCE_SHARE, self.llm.model_name), self.llm.model_name
+                ),
             )
             response = await self.llm.generate(
                 prompt=prompt,
@@ -61,10 +68,15 @@ class TeachBackAgent:
             )
             text = response.strip()
 
-            if text.startswith("["):
-                concepts = json.loads(text)
-            elif text.startswith("{") and "concepts" in text:
-                concepts = json.loads(text).get("concepts", [])
+            try:
+                parsed = loads_json(text)
+            except ValueError:
+                parsed = None
+
+            if isinstance(parsed, dict):
+                parsed = parsed.get("concepts", [])
+            if isinstance(parsed, list):
+                concepts = [str(concept).strip() for concept in parsed if str(concept).strip()]
             else:
                 concepts = [
                     line.strip().strip('"').strip("'")
@@ -182,8 +194,9 @@ class TeachBackAgent:
 
         bloom_criteria = self._get_bloom_criteria(session["current_bloom_level"])
 
-        if not transcript_excerpt:
-            transcript_excerpt = transcript_excerpt[:2000]
+        transcript_excerpt = truncate_to_tokens(
+            transcript_excerpt, budget_share(self.EXCERPT_SHARE, self.llm.model_name)
+        )
 
         prompt = TEACH_BACK_EVALUATION_PROMPT.format(
             video_title=video_title,
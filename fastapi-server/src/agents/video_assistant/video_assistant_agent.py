@@ -1,9 +1,10 @@
 import logging
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List
 from datetime import datetime
 from pydantic import BaseModel, Field
 
 from src.utils.llm import get_llm_service
+from src.utils.tokens import budget_share, fit_to_budget, truncate_to_tokens
 from src.prompts.video_assistant.video_assistant_prompts import (
     VIDEO_SUMMARY_PROMPT,
     QA_PROMPT,
@@ -11,6 +12,7 @@ from src.prompts.video_assistant.video_assistant_prompts import (
     CHAPTER_GENERATION_PROMPT,
     TIME_AWARE_KEYWORDS,
     NOTE_CREATION_PROMPT,
+    STREAMING_ANSWER_INSTRUCTION,
 )
 
 
@@ -40,58 +42,96 @@ class ChaptersResponse(BaseModel):
 
 
 class VideoAssistantAgent:
+    # Shares of the model's prompt budget (see budget_share)
+    SUMMARY_TRANSCRIPT_SHARE = 0.03
+    CHAPTER_CHUNK_SHARE = 0.001
+
     def __init__(self):
         self.llm = get_llm_service()
         logger.info("Video Assistant Agent initialized")
 
     async def summarize(self, transcript: str, title: str = "") -> VideoSummary:
         prompt = VIDEO_SUMMARY_PROMPT.format(
-            title=title or "Educational Video", transcript=transcript[:15000]
+            title=title or "Educational Video", transcript=fit_to_budget(
+                transcript, budget_share(self.SUMMARY_TRANSCRIPT_SHARE, self.llm.model_name), self.llm.model_name
+            )
         )
 
         result = await self.llm.generate_structured(
             prompt=prompt,
             output_schema=VideoSummary,
             system_prompt="You are an educational content analyst. Extract key information from video transcripts.",
+            cache=True,
         )
 
         return result
 
-    async def answer_question(
-        self, question: str, context_segments: List[dict], video_title: str = ""
-    ) -> QAResponse:
-        context_text = ""
-        timestamps = []
+    QA_SYSTEM_PROMPT = "You are an AI tutor helping students understand video content. Answer based on the provided transcript excerpts."
+    NOTE_SYSTEM_PROMPT = "You are an AI tutor creating comprehensive study notes. Be thorough and educational."
 
+    def _format_context(self, context_segments: List[dict]) -> str:
+        context_text = ""
         for seg in context_segments:
             start = seg.get("start_time", 0)
             text = seg.get("text", "")
             context_text += f"[{self._format_time(start)}] {text}\n"
-            timestamps.append(start)
+        return context_text
 
+    def build_qa_request(
+        self, question: str, context_segments: List[dict], video_title: str = ""
+    ) -> tuple[str, str, List[float]]:
+        """Returns (prompt, system prompt, timestamps) for a transcript question."""
         prompt = QA_PROMPT.format(
             question=question,
-            context_text=context_text,
+            context_text=self._format_context(context_segments),
             video_title=video_title or "Educational Video",
         )
+        timestamps = [seg.get("start_time", 0) for seg in context_segments[:3]]
+        return prompt, self.QA_SYSTEM_PROMPT, timestamps
+
+    def build_time_aware_request(
+        self, question: str, segments: List[dict], current_time: float, video_title: str = ""
+    ) -> tuple[str, str, List[float]]:
+        context_segments = self._get_time_window_segments(segments, current_time)
+        prompt = TIME_AWARE_QA_PROMPT.format(
+            time_str=self._format_time(current_time),
+            question=question,
+            context_text=self._format_context(context_segments),
+            video_title=video_title,
+        )
+        timestamps = [seg.get("start_time", 0) for seg in context_segments[:3]]
+        return prompt, self.QA_SYSTEM_PROMPT, timestamps
+
+    def build_note_request(
+        self, question: str, context_segments: List[dict], video_title: str = ""
+    ) -> tuple[str, str, List[float]]:
+        prompt = NOTE_CREATION_PROMPT.format(
+            question=question,
+            context_text=self._format_context(context_segments),
+            video_title=video_title or "Educational Video",
+        )
+        timestamps = [seg.get("start_time", 0) for seg in context_segments[:3]]
+        return prompt, self.NOTE_SYSTEM_PROMPT, timestamps
+
+    async def answer_question(
+        self, question: str, context_segments: List[dict], video_title: str = ""
+    ) -> QAResponse:
+        prompt, system_prompt, timestamps = self.build_qa_request(question, context_segments, video_title)
 
         try:
             result = await self.llm.generate_structured(
                 prompt=prompt,
                 output_schema=QAResponse,
-                system_prompt="You are an AI tutor helping students understand video content. Answer based on the provided transcript excerpts.",
+                system_prompt=system_prompt,
             )
-            if not result.timestamps:
-                result.timestamps = timestamps[:3]
-            else:
-                result.timestamps = timestamps[:3]
+            result.timestamps = timestamps
             return result
         except Exception as e:
             logger.error(f"Error in answer_question: {e}")
             return QAResponse(
                 answer=f"I encountered an issue processing your question. Please try rephrasing it. Error: {str(e)[:100]}",
                 confidence="low",
-                timestamps=timestamps[:3],
+                timestamps=timestamps,
             )
 
     async def answer_time_aware(
@@ -101,30 +141,17 @@ class VideoAssistantAgent:
         current_time: float,
         video_title: str = "",
     ) -> QAResponse:
-        context_segments = self._get_time_window_segments(segments, current_time)
-
-        context_text = ""
-        for seg in context_segments:
-            start = seg.get("start_time", 0)
-            text = seg.get("text", "")
-            context_text += f"[{self._format_time(start)}] {text}\n"
-
-        time_str = self._format_time(current_time)
-
-        prompt = TIME_AWARE_QA_PROMPT.format(
-            time_str=time_str,
-            question=question,
-            context_text=context_text,
-            video_title=video_title,
+        prompt, system_prompt, timestamps = self.build_time_aware_request(
+            question, segments, current_time, video_title
         )
 
         result = await self.llm.generate_structured(
             prompt=prompt,
             output_schema=QAResponse,
-            system_prompt="You are an AI tutor helping students understand video content. Answer based on the provided transcript excerpts.",
+            system_prompt=system_prompt,
         )
 
-        result.timestamps = [seg.get("start_time", 0) for seg in context_segments[:3]]
+        result.timestamps = timestamps
 
         return result
 
@@ -132,40 +159,30 @@ class VideoAssistantAgent:
         self, question: str, context_segments: List[dict], video_title: str = ""
     ) -> QAResponse:
         """Generate a detailed response suitable for note creation."""
-        context_text = ""
-        timestamps = []
-
-        for seg in context_segments:
-            start = seg.get("start_time", 0)
-            text = seg.get("text", "")
-            context_text += f"[{self._format_time(start)}] {text}\n"
-            timestamps.append(start)
-
-        prompt = NOTE_CREATION_PROMPT.format(
-            question=question,
-            context_text=context_text,
-            video_title=video_title or "Educational Video",
-        )
+        prompt, system_prompt, timestamps = self.build_note_request(question, context_segments, video_title)
 
         try:
             result = await self.llm.generate_structured(
                 prompt=prompt,
                 output_schema=QAResponse,
-                system_prompt="You are an AI tutor creating comprehensive study notes. Be thorough and educational.",
+                system_prompt=system_prompt,
             )
-            if not result.timestamps:
-                result.timestamps = timestamps[:3]
-            else:
-                result.timestamps = timestamps[:3]
+            result.timestamps = timestamps
             return result
         except Exception as e:
             logger.error(f"Error in answer_for_note: {e}")
             return QAResponse(
                 answer=f"I encountered an issue creating notes. Please try again. Error: {str(e)[:100]}",
                 confidence="low",
-                timestamps=timestamps[:3],
+                timestamps=timestamps,
             )
 
+    def stream_answer(self, prompt: str, system_prompt: str) -> AsyncIterator[str]:
+        return self.llm.stream(
+            prompt=prompt,
+            system_prompt=f"{system_prompt}\n\n{STREAMING_ANSWER_INSTRUCTION}",
+        )
+
     async def generate_chapters(
         self, segments: List[dict], video_title: str = "", target_chapters: int = 8
     ) -> ChaptersResponse:
@@ -182,10 +199,11 @@ class VideoAssistantAgent:
                     }
                 )
 
+        chunk_tokens = budget_share(self.CHAPTER_CHUNK_SHARE, self.llm.model_name)
         chunk_text = ""
         for i, chunk in enumerate(chunks):
             start = self._format_time(chunk["start_time"])
-            chunk_text += f"\n[{start}] Section {i + 1}:\n{chunk['text'][:500]}...\n"
+            chunk_text += f"\n[{start}] Section {i + 1}:\n{truncate_to_tokens(chunk['text'], chunk_tokens)}...\n"
 
         prompt = CHAPTER_GENERATION_PROMPT.format(
             video_title=video_title or "Educational Video",
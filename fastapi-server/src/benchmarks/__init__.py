@@ -0,0 +1 @@
+"""Offline throughput benchmarks, run with ``python -m src.benchmarks.<name>``"""
@@ -0,0 +1,433 @@
+"""Benchmark course generation, job discovery and the video assistant end to end.
+
+Runs against the offline providers (OFFLINE_MODE fake or replay) and a local
+Mongo stand-in, and writes a JSON report to diff between commits.
+
+Usage:
+    uv run python -m src.benchmarks.e2e --chapters 6 --languages en,hi --concurrency 4
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import argparse
+import asyncio
+import json
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config.settings import settings
+from src.db.mongodb import MongoDB
+
+
+SCENARIOS = ("course", "jobs", "video")
+
+# Collection methods that cost a server round trip. find() and aggregate()
+# are counted once each, however many batches the cursor fetches.
+ROUND_TRIP_METHODS = frozenset({
+    "find", "find_one", "aggregate", "count_documents", "distinct",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write", "create_index",
+    "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+})
+
+VIDEO_QUESTIONS = [
+    ("How does the cache layer handle a failed request?", None),
+    ("Summarize the main points of this video", None),
+    ("What is being explained right now?", 90.0),
+    ("Which example shows the index structure?", None),
+    ("Why does the graph need a separate memory layer?", None),
+]
+
+
+class MongoOpCounter:
+    def __init__(self):
+        self.ops: Counter = Counter()
+
+
+class CountingCollection:
+    def __init__(self, collection, counter: MongoOpCounter):
+        self._collection = collection
+        self._counter = counter
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._collection, name)
+        if name not in ROUND_TRIP_METHODS or not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self._counter.ops[f"{self._collection.name}.{name}"] += 1
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+class CountingDatabase:
+    """Wraps a Motor database so every collection call is tallied."""
+
+    def __init__(self, db, counter: MongoOpCounter):
+        self._db = db
+        self._counter = counter
+
+    def __getitem__(self, name: str) -> CountingCollection:
+        return CountingCollection(self._db[name], self._counter)
+
+    def __getattr__(self, name: str):
+        return getattr(self._db, name)
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time per LangGraph node, plus any steps timed by hand."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._started: dict = {}
+        self.durations: dict[str, list[float]] = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if not node or kwargs.get("name") != node:
+            return
+        # The node's task and the callable inside it both report the node name.
+        parent = self._started.get(parent_run_id)
+        if parent and parent[0] == node:
+            return
+        self._started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id) -> None:
+        entry = self._started.pop(run_id, None)
+        if entry:
+            node, started = entry
+            self.durations[node].append(time.perf_counter() - started)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name].append(time.perf_counter() - started)
+
+
+def summarize(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "total_seconds": round(sum(values), 4),
+        "mean_seconds": round(statistics.fmean(values), 4),
+        "p50_seconds": round(statistics.median(values), 4),
+        "max_seconds": round(max(values), 4),
+    }
+
+
+def llm_totals() -> dict:
+    from src.utils.llm_governor import get_governor_stats
+
+    stats = get_governor_stats()
+    return {
+        "calls": sum(s["requests"] for s in stats),
+        "tokens": sum(s["tokens"] for s in stats),
+        "rate_limited": sum(s["rate_limited"] for s in stats),
+    }
+
+
+async def measure(scenario, counter: MongoOpCounter) -> dict:
+    timer = NodeTimer()
+    mongo_before = Counter(counter.ops)
+    llm_before = llm_totals()
+    error = None
+
+    started = time.perf_counter()
+    try:
+        await scenario(timer)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - started
+
+    mongo_ops = counter.ops - mongo_before
+    llm_after = llm_totals()
+    return {
+        "wall_seconds": round(wall, 4),
+        "nodes": {node: summarize(values) for node, values in sorted(timer.durations.items())},
+        "mongo": {
+            "round_trips": sum(mongo_ops.values()),
+            "by_operation": dict(sorted(mongo_ops.items())),
+        },
+        "llm": {key: llm_after[key] - llm_before[key] for key in llm_after},
+        "error": error,
+    }
+
+
+def course_scenario(language: str):
+    async def run(timer: NodeTimer) -> None:
+        from src.graphs.course.graph import get_course_graph
+
+        course_graph = await get_course_graph()
+        result = await course_graph.ainvoke({
+            "topic": "Distributed caching for web services",
+            "time_hours": 4,
+            "difficulty": "intermediate",
+            "language": language,
+            "generate_content": True,
+            "context": None,
+            "course_plan": None,
+            "chapters": [],
+            "current_node_index": 0,
+            "status": "starting",
+            "error": None,
+            "course_id": None
+        }, config={"configurable": {"thread_id": str(uuid.uuid4())}, "callbacks": [timer]})
+
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+
+    return run
+
+
+async def jobs_scenario(timer: NodeTimer) -> None:
+    from src.graphs.job_discovery import run_job_discovery
+    from src.models.jobs.schemas import JobPreferences, ManualJobInput
+
+    result = await run_job_discovery(
+        manual_input=ManualJobInput(
+            target_role="Backend Engineer",
+            skills=["python", "mongodb", "caching", "distributed systems"],
+            experience_years=3,
+            preferred_industries=["software"],
+        ),
+        preferences=JobPreferences(location="Remote"),
+        config={"callbacks": [timer]}
+    )
+
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+
+
+def video_scenario(language: str, questions: int):
+    async def run(timer: NodeTimer) -> None:
+        from src.services.video_assistant.video_assistant_service import get_video_assistant_service
+
+        service = get_video_assistant_service()
+        # A new id each run, so add_video never short-circuits on an existing video.
+        youtube_id = uuid.uuid4().hex[:11]
+
+        with timer.step("add_video"):
+            video = await service.add_video(
+                url=f"https://youtu.be/{youtube_id}",
+                title="Benchmark video",
+                language=language
+            )
+
+        for question, current_time in VIDEO_QUESTIONS[:questions]:
+            with timer.step("ask_question"):
+                await service.ask_question(video["id"], question, current_time=current_time)
+
+    return run
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def mongo_client(spec: str):
+    """``mongomock`` (in process), ``mongod`` (a throwaway server) or a URI."""
+    if spec == "mongomock":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--mongo mongomock requires the mongomock-motor package (install the benchmark extra)")
+        yield AsyncMongoMockClient()
+        return
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    if spec != "mongod":
+        client = AsyncIOMotorClient(spec)
+        try:
+            yield client
+        finally:
+            client.close()
+        return
+
+    dbpath = tempfile.mkdtemp(prefix="lumina-bench-mongod-")
+    port = _free_port()
+    process = subprocess.Popen(
+        ["mongod", "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL
+    )
+    client = AsyncIOMotorClient(f"mongodb://127.0.0.1:{port}", serverSelectionTimeoutMS=15000)
+    try:
+        await client.admin.command("ping")
+        yield client
+    finally:
+        client.close()
+        process.terminate()
+        process.wait()
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+def configure(args: argparse.Namespace, workdir: Path) -> None:
+    """Point every service at offline providers before any of them is created."""
+    from src.utils import blob_store
+
+    settings.offline_mode = args.mode
+    settings.offline_seed = args.seed
+    settings.fake_list_length = args.chapters
+    settings.fake_transcript_segments = args.segments
+    if args.llm_latency is not None:
+        settings.fake_llm_latency = args.llm_latency
+
+    settings.course_chapter_concurrency = args.concurrency
+    settings.course_diagram_concurrency = args.concurrency
+    settings.course_checkpointer = args.checkpointer
+    settings.course_checkpoint_sqlite_path = str(workdir / "checkpoints.sqlite")
+
+    # Every run should pay for its own calls, and nothing should leave the machine.
+    settings.llm_cache_backend = ""
+    settings.tavily_api_key = ""
+    settings.serpapi_key = ""
+    settings.jobspy_enabled = False
+
+    settings.vector_backend = args.vector_backend
+    settings.vector_local_dir = str(workdir / "vectors")
+
+    blob_store._blob_store = blob_store.LocalBlobStore(workdir / "uploads")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+async def run(args: argparse.Namespace) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="lumina-bench-"))
+    configure(args, workdir)
+
+    languages = [code.strip() for code in args.languages.split(",") if code.strip()]
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    counter = MongoOpCounter()
+    results: dict[str, list] = defaultdict(list)
+
+    try:
+        async with mongo_client(args.mongo) as client:
+            MongoDB.client = client
+            MongoDB.db = CountingDatabase(client[args.db_name], counter)
+
+            # Warm-up runs (negative indexes) pay for lazy imports and clients and aren't reported.
+            for run_index in range(-args.warmup, args.runs):
+                for name in scenarios:
+                    if name == "jobs":
+                        plans = [("jobs", None, jobs_scenario)]
+                    elif name == "course":
+                        plans = [("course", language, course_scenario(language)) for language in languages]
+                    else:
+                        plans = [("video", language, video_scenario(language, args.questions)) for language in languages]
+
+                    for scenario_name, language, scenario in plans:
+                        result = await measure(scenario, counter)
+                        result.update({"run": run_index, "language": language})
+                        if run_index >= 0:
+                            results[scenario_name].append(result)
+
+                        label = f"{scenario_name}[{language}]" if language else scenario_name
+                        status = f"FAILED {result['error']}" if result["error"] else "ok"
+                        run_label = "warm-up" if run_index < 0 else f"run {run_index + 1}/{args.runs}"
+                        print(
+                            f"{run_label} {label}: {result['wall_seconds']:.2f}s, "
+                            f"{result['llm']['calls']} LLM calls, {result['mongo']['round_trips']} Mongo ops, {status}"
+                        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "started_at": datetime.utcnow().isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "mode": args.mode,
+            "mongo": "uri" if "://" in args.mongo else args.mongo,
+            "scenarios": scenarios,
+            "chapters": args.chapters,
+            "languages": languages,
+            "concurrency": args.concurrency,
+            "checkpointer": args.checkpointer,
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "questions": args.questions,
+            "transcript_segments": args.segments,
+            "seed": args.seed,
+            "latency": {
+                "llm": settings.fake_llm_latency,
+                "embedding": settings.fake_embedding_latency,
+                "translation": settings.fake_translation_latency,
+                "tts": settings.fake_tts_latency,
+                "image": settings.fake_image_latency,
+            },
+        },
+        "scenarios": {
+            name: {
+                "wall_seconds": summarize([r["wall_seconds"] for r in runs if not r["error"]]),
+                "failures": sum(1 for r in runs if r["error"]),
+                "runs": runs,
+            }
+            for name, runs in results.items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of course,jobs,video")
+    parser.add_argument("--mode", choices=["fake", "replay"], default="fake", help="Offline provider mode")
+    parser.add_argument("--mongo", default="mongomock", help="mongomock, mongod (throwaway server) or a MongoDB URI")
+    parser.add_argument("--db-name", default="lumina_benchmark", help="Database used with mongod or a URI")
+    parser.add_argument("--chapters", type=int, default=4, help="Chapters per course (also the length of other fake lists)")
+    parser.add_argument("--languages", default="en", help="Comma-separated course and video languages")
+    parser.add_argument("--concurrency", type=int, default=settings.course_chapter_concurrency, help="Chapter and diagram concurrency")
+    parser.add_argument("--vector-backend", choices=["local", "chroma"], default="local", help="local keeps the vector index in the run's temp dir")
+    parser.add_argument("--checkpointer", choices=["none", "memory", "sqlite"], default="memory")
+    parser.add_argument("--runs", type=int, default=1, help="Repetitions of every scenario")
+    parser.add_argument("--warmup", type=int, default=1, help="Unreported runs of every scenario before measuring")
+    parser.add_argument("--questions", type=int, default=len(VIDEO_QUESTIONS), help="Questions asked per video")
+    parser.add_argument("--segments", type=int, default=settings.fake_transcript_segments, help="Transcript segments per video")
+    parser.add_argument("--llm-latency", default=None, help="Override FAKE_LLM_LATENCY, e.g. lognormal:0.8,0.4")
+    parser.add_argument("--seed", type=int, default=settings.offline_seed)
+    parser.add_argument("--output", default="benchmark.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,6 +16,63 @@ class Settings(BaseSettings):
 
     gemini_model: str = "gemini-2.0-flash"
 
+    # Tokenizer for prompt budgets: the bundled tokenizer.json (a Llama-style
+    # 32k SentencePiece vocabulary, Mistral 7B v0.1) unless a Hub id is set.
+    # It slightly over-counts for Llama 3 and Gemini, which errs on the side
+    # of fitting.
+    tokenizer_path: str = str(Path(__file__).parent.parent / "utils" / "tokenizer.json")
+    tokenizer_name: str = ""
+
+    # Per-provider request governor; 0 disables the RPM/TPM budget
+    groq_max_concurrency: int = 8
+    groq_rpm: int = 0
+    groq_tpm: int = 0
+    gemini_max_concurrency: int = 8
+    gemini_rpm: int = 0
+    gemini_tpm: int = 0
+    llm_queue_timeout_seconds: float = 120.0
+    llm_rate_limit_retries: int = 4
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+
+    # "single" or "hedged"; hedged sends a backup request to the other
+    # provider when the primary is slower than its recent p95
+    llm_routing: str = "single"
+    llm_hedge_min_delay_seconds: float = 1.0
+    llm_hedge_default_delay_seconds: float = 4.0
+    llm_hedge_max_delay_seconds: float = 20.0
+
+    # "", "memory", "mongodb" or "disk"; empty disables the LLM response cache
+    llm_cache_backend: str = ""
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_max_entries: int = 1024
+    llm_cache_dir: str = ".llm_cache"
+    # The disk cache evicts least recently used entries past either limit (0 disables it)
+    # and sweeps out expired ones every llm_cache_disk_sweep_seconds
+    llm_cache_disk_max_entries: int = 50000
+    llm_cache_disk_max_mb: int = 512
+    llm_cache_disk_sweep_seconds: int = 600
+
+    # "memory", "mongodb", "disk" or "none"; embeddings are keyed by model and text hash
+    embedding_cache_backend: str = "memory"
+    embedding_cache_max_entries: int = 10000
+    embedding_cache_dir: str = ".embedding_cache"
+
+    # "", "fake", "record" or "replay"; see utils/offline.py
+    offline_mode: str = ""
+    offline_tape_dir: str = ".offline_tape"
+    offline_replay_timing: bool = False
+    offline_seed: int = 0
+    # Fake call latency: "0.5", "uniform:0.2,1.5" or "lognormal:0.8,0.4" (median, sigma)
+    fake_llm_latency: str = "0"
+    fake_embedding_latency: str = "0"
+    fake_translation_latency: str = "0"
+    fake_tts_latency: str = "0"
+    fake_image_latency: str = "0"
+    fake_llm_output_tokens: int = 256
+    fake_list_length: int = 4
+    fake_transcript_segments: int = 200
+
     tavily_api_key: str = ""
 
     google_application_credentials: str = ""
@@ -22,6 +80,27 @@ class Settings(BaseSettings):
     gcp_bucket_name: str = ""
     imagen_model: str = "imagen-4.0-generate-001"
 
+    # "local", "gridfs" or "gcs"; defaults to gcs when a bucket is configured
+    blob_store: str = ""
+    # Origin of this API; local and GridFS blob URLs are built from it
+    public_base_url: str = "http://localhost:8000"
+
+    course_chapter_concurrency: int = 4
+    course_diagram_concurrency: int = 4
+
+    course_worker_embedded: bool = True
+    course_worker_concurrency: int = 2
+    course_job_lease_seconds: int = 120
+    course_job_max_attempts: int = 3
+    # On shutdown, running jobs get this long to finish before they're released back to the queue
+    course_worker_shutdown_grace_seconds: int = 30
+    # SSE subscribers poll course_events this often for events from the worker process
+    course_events_poll_seconds: float = 1.0
+    course_events_keepalive_seconds: float = 15.0
+
+    course_checkpointer: str = "mongodb"
+    course_checkpoint_sqlite_path: str = "course_checkpoints.sqlite"
+
     mongodb_uri: str = "mongodb://localhost:27017"
     mongodb_db_name: str = "lumina"
 
@@ -29,6 +108,30 @@ class Settings(BaseSettings):
     chroma_tenant: str = ""
     chroma_database: str = ""
     chroma_collection: str = "lumina_documents"
+    # "chroma" or "local"; empty picks chroma when its credentials are set
+    vector_backend: str = ""
+    vector_local_dir: str = ".vector_index"
+    # A local collection's change log is folded into a snapshot past this many entries (or its row count)
+    vector_local_compact_min_entries: int = 1000
+    # Chroma and embedding calls run on this many threads, off the event loop
+    vector_max_workers: int = 8
+    vector_timeout_seconds: float = 30.0
+    # Video segments are embedded in batches; a failed batch is retried on its own
+    vector_ingest_batch_size: int = 64
+    vector_ingest_concurrency: int = 4
+    vector_ingest_retries: int = 2
+    # An "indexing" video with no progress for this long is re-indexed when added again
+    video_index_lease_seconds: int = 300
+    # Transcript snippets are merged into windows of this many tokens before indexing
+    video_window_tokens: int = 256
+    video_window_overlap_tokens: int = 32
+    video_qa_windows: int = 6
+    # "vector" or "hybrid" (BM25 and vector hits fused with reciprocal rank fusion)
+    retrieval_mode: str = "vector"
+    bm25_max_cached_indexes: int = 256
+    # get_context_for_topic over-fetches this many chunks, then picks by MMR
+    context_candidates: int = 20
+    context_mmr_lambda: float = 0.7
 
     serpapi_key: str = "" 
     firecrawl_api_key: str = ""  
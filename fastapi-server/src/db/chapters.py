@@ -0,0 +1,81 @@
+from src.db.mongodb import MongoDB, CHAPTERS_COLLECTION
+
+
+# Hot read paths (chat, audio, flashcards, slides) only need the precomputed
+# text, not the full section tree with diagram code and image URLs.
+CHAPTER_TEXT_PROJECTION = {"sections": 0, "images": 0}
+
+
+def render_chapter_markdown(sections: list[dict]) -> str:
+    content = ""
+    for section in sections:
+        if not isinstance(section, dict):
+            continue
+        if section.get("title"):
+            content += f"## {section['title']}\n\n"
+        for p in section.get("paragraphs") or []:
+            content += f"{p}\n\n"
+        if section.get("bullets"):
+            for b in section["bullets"]:
+                content += f"- {b}\n"
+            content += "\n"
+        if section.get("tip"):
+            content += f"> Tip: {section['tip']}\n\n"
+    return content.strip()
+
+
+def render_chapter_speech(sections: list[dict]) -> str:
+    parts = []
+    for section in sections:
+        if not isinstance(section, dict):
+            continue
+        if section.get("title"):
+            parts.append(section["title"])
+        parts.extend(section.get("paragraphs") or [])
+        parts.extend(section.get("bullets") or [])
+        if section.get("text"):
+            parts.append(section["text"])
+        if section.get("body"):
+            parts.append(section["body"])
+        if section.get("tip"):
+            parts.append(f"Tip: {section['tip']}")
+    return " ".join(parts)
+
+
+def chapter_content_fields(sections: list[dict]) -> dict:
+    """Derived text fields to ``$set`` whenever a chapter's sections are written."""
+    return {
+        "content_markdown": render_chapter_markdown(sections),
+        "content_speech": render_chapter_speech(sections),
+    }
+
+
+async def refresh_chapter_content(chapter: dict) -> dict:
+    """Recompute and store the derived text fields for a chapter.
+
+    Used for chapters written before the fields existed; ``chapter`` may have
+    been loaded without its sections.
+    """
+    chapters_col = MongoDB.get_collection(CHAPTERS_COLLECTION)
+
+    sections = chapter.get("sections")
+    if sections is None:
+        doc = await chapters_col.find_one({"_id": chapter["_id"]}, {"sections": 1})
+        sections = (doc or {}).get("sections") or []
+
+    fields = chapter_content_fields(sections)
+    await chapters_col.update_one({"_id": chapter["_id"]}, {"$set": fields})
+    chapter.update(fields)
+    return fields
+
+
+async def get_chapter_markdown(chapter: dict) -> str:
+    if "content_markdown" not in chapter and not chapter.get("content"):
+        await refresh_chapter_content(chapter)
+    return chapter.get("content_markdown") or chapter.get("content", "")
+
+
+async def get_chapter_speech(chapter: dict) -> str:
+    if "content_speech" not in chapter and not chapter.get("content"):
+        await refresh_chapter_content(chapter)
+    return chapter.get("content_speech") or chapter.get("content", "")
@@ -39,7 +39,11 @@ async def get_course_language(course_id: str) -> str:
         return "en"
 
 
-async def get_chapter_or_404(chapter_id: str, course_id: Optional[str] = None) -> dict:
+async def get_chapter_or_404(
+    chapter_id: str,
+    course_id: Optional[str] = None,
+    projection: Optional[dict] = None
+) -> dict:
     chapters_col = MongoDB.get_collection(CHAPTERS_COLLECTION)
     oid = validate_object_id(chapter_id, "chapter ID")
     
@@ -47,7 +51,7 @@ async def get_chapter_or_404(chapter_id: str, course_id: Optional[str] = None) -
     if course_id:
         query["course_id"] = course_id
     
-    chapter = await chapters_col.find_one(query)
+    chapter = await chapters_col.find_one(query, projection)
     if not chapter:
         raise HTTPException(status_code=404, detail="Chapter not found")
     
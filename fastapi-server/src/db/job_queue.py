@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from src.db.mongodb import MongoDB
+
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobQueue:
+    """Mongo-backed work queue with leases.
+
+    A worker claims a job by atomically taking a lease on it and must keep
+    renewing the lease with ``heartbeat``. If the worker dies the lease runs
+    out and the job becomes claimable again, so nothing stays stuck in
+    ``running`` after a deploy or crash. Failed attempts are retried with
+    exponential backoff up to ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        lease_seconds: int = 120,
+        max_attempts: int = 3,
+        retry_backoff_seconds: int = 30
+    ):
+        self.collection_name = collection_name
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+    @property
+    def collection(self):
+        return MongoDB.get_collection(self.collection_name)
+
+    async def enqueue(self, payload: dict, key: Optional[str] = None) -> str:
+        now = datetime.utcnow()
+        doc = {
+            "key": key,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "worker_id": None,
+            "lease_expires_at": None,
+            "available_at": now,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        result = await self.collection.insert_one(doc)
+        return str(result.inserted_id)
+
+    async def claim(self, worker_id: str) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": QUEUED, "available_at": {"$lte": now}},
+                    {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def heartbeat(self, job_id: ObjectId, worker_id: str) -> bool:
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": job_id, "status": RUNNING, "worker_id": worker_id},
+            {"$set": {
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                "updated_at": now,
+            }}
+        )
+        return result.matched_count > 0
+
+    async def complete(self, job_id: ObjectId, worker_id: str) -> None:
+        await self.collection.update_one(
+            {"_id": job_id, "worker_id": worker_id},
+            {"$set": {
+                "status": COMPLETED,
+                "lease_expires_at": None,
+                "completed_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }}
+        )
+
+    async def fail(self, job: dict, worker_id: str, error: str) -> bool:
+        """Record a failed attempt. Returns True if the job will be retried."""
+        now = datetime.utcnow()
+        retry = job.get("attempts", 1) < self.max_attempts
+
+        update = {
+            "status": QUEUED if retry else FAILED,
+            "lease_expires_at": None,
+            "last_error": error,
+            "updated_at": now,
+        }
+        if retry:
+            delay = self.retry_backoff_seconds * (2 ** (job.get("attempts", 1) - 1))
+            update["available_at"] = now + timedelta(seconds=delay)
+
+        await self.collection.update_one(
+            {"_id": job["_id"], "worker_id": worker_id},
+            {"$set": update}
+        )
+        return retry
+
+    async def release(self, job: dict, worker_id: str) -> None:
+        """Hand a running job back right away without counting the attempt,
+        e.g. when its worker shuts down. ``interrupted`` tells the next
+        worker that an earlier run got partway through."""
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": job["_id"], "status": RUNNING, "worker_id": worker_id},
+            {
+                "$set": {
+                    "status": QUEUED,
+                    "worker_id": None,
+                    "lease_expires_at": None,
+                    "available_at": now,
+                    "interrupted": True,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": -1},
+            }
+        )
+
+    async def get_active(self, key: str) -> Optional[dict]:
+        return await self.collection.find_one({"key": key, "status": {"$in": [QUEUED, RUNNING]}})
+
+    def is_exhausted(self, job: dict) -> bool:
+        return job.get("attempts", 0) > self.max_attempts
+
+    async def get_stats(self) -> dict:
+        now = datetime.utcnow()
+        counts = {QUEUED: 0, RUNNING: 0, FAILED: 0}
+
+        async for row in self.collection.aggregate([
+            {"$match": {"status": {"$in": list(counts)}}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ]):
+            counts[row["_id"]] = row["count"]
+
+        oldest = await self.collection.find_one(
+            {"status": QUEUED},
+            sort=[("created_at", 1)],
+            projection={"created_at": 1}
+        )
+        expired = await self.collection.count_documents(
+            {"status": RUNNING, "lease_expires_at": {"$lt": now}}
+        )
+
+        return {
+            "queue": self.collection_name,
+            "depth": counts[QUEUED],
+            "running": counts[RUNNING],
+            "failed": counts[FAILED],
+            "expired_leases": expired,
+            "oldest_age_seconds": (now - oldest["created_at"]).total_seconds() if oldest else 0.0,
+        }
@@ -8,6 +8,8 @@ COURSES_COLLECTION = "courses"
 CHAPTERS_COLLECTION = "chapters"
 QUESTIONS_COLLECTION = "questions"
 CHAT_MESSAGES_COLLECTION = "chat_messages"
+COURSE_EVENTS_COLLECTION = "course_events"
+COURSE_JOBS_COLLECTION = "course_jobs"
 
 ROADMAPS_COLLECTION = "roadmaps"
 ROADMAP_NODE_DETAILS_COLLECTION = "roadmap_node_details"
@@ -65,6 +67,10 @@ class MongoDB:
     def chat_messages(cls):
         return cls.get_db()[CHAT_MESSAGES_COLLECTION]
     
+    @classmethod
+    def course_events(cls):
+        return cls.get_db()[COURSE_EVENTS_COLLECTION]
+    
     @classmethod
     def roadmaps(cls):
         return cls.get_db()[ROADMAPS_COLLECTION]
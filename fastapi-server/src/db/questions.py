@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from src.db.mongodb import MongoDB, CHAPTERS_COLLECTION, QUESTIONS_COLLECTION
+from src.models.course import QuizQuestions
+
+
+def build_question_docs(chapter_id: str, quiz: QuizQuestions) -> list[dict]:
+    now = datetime.utcnow()
+    docs = []
+
+    for mcq in quiz.mcq_questions or []:
+        docs.append({
+            "chapter_id": chapter_id,
+            "question_type": "mcq",
+            "question_text": mcq.question_text,
+            "options": [{"key": opt.key, "text": opt.text} for opt in mcq.options],
+            "correct_answer": mcq.correct_answer,
+            "explanation": mcq.explanation,
+            "created_at": now,
+        })
+
+    for ot in quiz.open_text_questions or []:
+        docs.append({
+            "chapter_id": chapter_id,
+            "question_type": "open_text",
+            "question_text": ot.question_text,
+            "expected_answer": ot.expected_answer,
+            "grading_criteria": ot.grading_criteria,
+            "created_at": now,
+        })
+
+    return docs
+
+
+async def insert_questions(docs: list[dict]) -> list[str]:
+    if not docs:
+        return []
+
+    result = await MongoDB.get_collection(QUESTIONS_COLLECTION).insert_many(docs, ordered=False)
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+
+async def delete_questions_for_chapters(chapter_ids: list[str]) -> int:
+    if not chapter_ids:
+        return 0
+
+    result = await MongoDB.get_collection(QUESTIONS_COLLECTION).delete_many(
+        {"chapter_id": {"$in": chapter_ids}}
+    )
+    return result.deleted_count
+
+
+async def delete_chapters_with_questions(course_id: str) -> int:
+    chapters_col = MongoDB.get_collection(CHAPTERS_COLLECTION)
+
+    chapter_ids = [
+        str(chapter["_id"])
+        for chapter in await chapters_col.find({"course_id": course_id}, {"_id": 1}).to_list(None)
+    ]
+    await delete_questions_for_chapters(chapter_ids)
+
+    result = await chapters_col.delete_many({"course_id": course_id})
+    return result.deleted_count
@@ -4,6 +4,7 @@ Course Graph - LangGraph workflow for course generation
 Exports the graph implementation and service for course orchestration.
 """
 from src.graphs.course.graph import course_graph
+from src.graphs.course.progress import CourseProgressService, get_progress_service
 from src.graphs.course.service import CourseService, get_course_service
 from src.graphs.course.state import CourseGenerationState
 
@@ -11,5 +12,7 @@ __all__ = [
     "course_graph",
     "CourseService",
     "get_course_service",
+    "CourseProgressService",
+    "get_progress_service",
     "CourseGenerationState",
 ]
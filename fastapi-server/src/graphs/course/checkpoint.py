@@ -0,0 +1,72 @@
+import asyncio
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from src.config.settings import settings
+
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_checkpointer_ready = False
+_checkpointer_lock = asyncio.Lock()
+
+
+async def _create_checkpointer(backend: str) -> Optional[BaseCheckpointSaver]:
+    if backend in ("", "none"):
+        return None
+
+    if backend == "memory":
+        from langgraph.checkpoint.memory import MemorySaver
+        return MemorySaver()
+
+    if backend == "mongodb":
+        try:
+            from pymongo import MongoClient
+            from langgraph.checkpoint.mongodb import MongoDBSaver
+        except ImportError:
+            raise ValueError("COURSE_CHECKPOINTER=mongodb requires the langgraph-checkpoint-mongodb package")
+        return MongoDBSaver(
+            MongoClient(settings.mongodb_uri),
+            db_name=settings.mongodb_db_name,
+            checkpoint_collection_name="course_checkpoints",
+            writes_collection_name="course_checkpoint_writes",
+        )
+
+    if backend == "sqlite":
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError:
+            raise ValueError("COURSE_CHECKPOINTER=sqlite requires the langgraph-checkpoint-sqlite package")
+        conn = await aiosqlite.connect(settings.course_checkpoint_sqlite_path)
+        saver = AsyncSqliteSaver(conn)
+        await saver.setup()
+        return saver
+
+    raise ValueError(f"Unsupported course checkpointer: {backend}")
+
+
+async def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    global _checkpointer, _checkpointer_ready
+    if _checkpointer_ready:
+        return _checkpointer
+
+    async with _checkpointer_lock:
+        if not _checkpointer_ready:
+            _checkpointer = await _create_checkpointer(settings.course_checkpointer)
+            _checkpointer_ready = True
+            if _checkpointer is not None:
+                print(f"Course graph checkpointing enabled ({settings.course_checkpointer})")
+
+    return _checkpointer
+
+
+async def delete_checkpoint(course_id: str) -> None:
+    checkpointer = await get_checkpointer()
+    if checkpointer is None:
+        return
+
+    try:
+        await checkpointer.adelete_thread(course_id)
+    except Exception as e:
+        print(f"Failed to delete checkpoint for course {course_id}: {e}")
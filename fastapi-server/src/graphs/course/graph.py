@@ -1,16 +1,31 @@
+import asyncio
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
 import re
 
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
-from src.graphs.course.state import CourseGenerationState, GeneratedChapter, CoursePlan, TopicNodePlan, TopicEdgePlan
+from src.config.settings import settings
+from src.graphs.course.checkpoint import get_checkpointer
+from src.graphs.course.state import CourseGenerationState, ChapterTask, GeneratedChapter, CoursePlan, TopicNodePlan, TopicEdgePlan
 from src.agents.course.planner import get_planner_agent
 from src.agents.course.tester import get_tester_agent
-from src.utils.translation import get_translation_service
+from src.utils.translation import get_translation_service, COURSE_CONTENT_FIELDS
 from src.utils.vector import get_vector_service
-from src.db.mongodb import MongoDB, COURSES_COLLECTION, CHAPTERS_COLLECTION, QUESTIONS_COLLECTION
+from src.graphs.course.progress import (
+    get_progress_service,
+    PLAN_READY,
+    CHAPTER_SAVED,
+    DIAGRAMS_DONE,
+    COURSE_READY,
+)
+from src.db.mongodb import MongoDB, COURSES_COLLECTION, CHAPTERS_COLLECTION
+from src.db.chapters import chapter_content_fields, render_chapter_markdown
+from src.db.questions import build_question_docs, insert_questions, delete_questions_for_chapters
 
 
 async def plan_course_node(state: CourseGenerationState) -> dict:
@@ -18,10 +33,11 @@ async def plan_course_node(state: CourseGenerationState) -> dict:
     vector_service = get_vector_service()
 
     context = state.get("context")
+    context_chunk_ids = state.get("context_chunk_ids") or []
     if not context and state.get("course_id"):
-        context = await vector_service.get_context_for_topic(
+        context, context_chunk_ids = await vector_service.get_context_for_topic(
             topic=state["topic"],
-            course_id=state.get("course_id", "temp")
+            course_id=state["course_id"]
         )
 
     research_context = ""
@@ -83,7 +99,8 @@ Use this research to ensure the course covers current, relevant content."""
     return {
         "course_plan": course_plan,
         "status": "planning_complete",
-        "context": combined_context
+        "context": combined_context,
+        "context_chunk_ids": context_chunk_ids
     }
 
 
@@ -94,28 +111,27 @@ async def save_course_metadata_node(state: CourseGenerationState) -> dict:
     plan = state["course_plan"]
     language = state.get("language", "en")
 
-    title = plan.title
-    description = plan.description
-    
-    if language != "en":
-        title = await translator.translate(title, language)
-        description = await translator.translate(description, language)
-
     nodes_data = []
     for node in plan.nodes:
-        node_title = node.title
-        node_summary = node.summary
-        if language != "en":
-            node_title = await translator.translate(node.title, language)
-            node_summary = await translator.translate(node.summary, language)
         nodes_data.append({
             "id": node.id,
-            "title": node_title,
-            "summary": node_summary,
+            "title": node.title,
+            "summary": node.summary,
             "learning_objectives": node.learning_objectives,
             "time_minutes": node.time_minutes,
             "status": "unlocked" if node.id == plan.root_node_id else "locked"
         })
+
+    metadata = {
+        "title": plan.title,
+        "description": plan.description,
+        "nodes": nodes_data,
+    }
+    if language != "en":
+        await translator.translate_fields(metadata, frozenset({"title", "summary", "description"}), language)
+
+    title = metadata["title"]
+    description = metadata["description"]
     
     edges_data = [
         {"source": edge.source, "target": edge.target}
@@ -133,6 +149,7 @@ async def save_course_metadata_node(state: CourseGenerationState) -> dict:
                     "root_node_id": plan.root_node_id,
                     "nodes": nodes_data,
                     "edges": edges_data,
+                    "context_chunk_ids": state.get("context_chunk_ids") or [],
                     "updated_at": datetime.utcnow(),
                 }
             }
@@ -155,6 +172,11 @@ async def save_course_metadata_node(state: CourseGenerationState) -> dict:
             "updated_at": datetime.utcnow(),
         })
         course_id = str(result.inserted_id)
+
+    await get_progress_service().publish(course_id, PLAN_READY, {
+        "title": title,
+        "chapter_count": len(plan.nodes),
+    })
     
     return {
         "course_id": course_id,
@@ -162,23 +184,19 @@ async def save_course_metadata_node(state: CourseGenerationState) -> dict:
     }
 
 
-async def generate_chapter_node(state: CourseGenerationState) -> dict:
+async def generate_chapter_node(state: ChapterTask) -> dict:
     from src.agents.course.content_writer import get_content_writer_agent
     from src.utils.image_gen import get_image_gen_service
-    from google.cloud import storage
-    import base64
+    from src.utils.blob_store import get_blob_store
     
     translator = get_translation_service()
     content_writer = get_content_writer_agent()
     tester = get_tester_agent()
     image_service = get_image_gen_service()
     chapters_col = MongoDB.get_collection(CHAPTERS_COLLECTION)
-    questions_col = MongoDB.get_collection(QUESTIONS_COLLECTION)
     
     plan = state["course_plan"]
-    idx = state.get("current_node_index", 0)
-    if idx >= len(plan.nodes):
-        return {"status": "all_nodes_processed"}
+    idx = state["chapter_index"]
     node_plan = plan.nodes[idx]
     language = state.get("language", "en")
     course_id = state["course_id"]
@@ -220,78 +238,81 @@ async def generate_chapter_node(state: CourseGenerationState) -> dict:
         key_takeaways = node_plan.learning_objectives
         image_prompts = []
 
-    chapter_images = []
-    if image_service.is_available() and image_prompts:
+    async def generate_section_image(i: int, prompt: str) -> Optional[str]:
         try:
-            from src.config.settings import settings
-            storage_client = storage.Client() if settings.gcp_bucket_name else None
-            
-            for i, prompt in enumerate(image_prompts[:3]):  
-                try:
-                    print(f"  Generating image {i+1} for {node_plan.title}...")
-                    image_bytes = await image_service.generate_image(prompt, style="educational")
-                    
-                    image_url = ""
-                    if storage_client and settings.gcp_bucket_name:
-                        bucket = storage_client.bucket(settings.gcp_bucket_name)
-                        blob_name = f"chapters/{course_id}/{idx}_{i}.png"
-                        blob = bucket.blob(blob_name)
-                        blob.upload_from_string(image_bytes, content_type="image/png")
-                        image_url = blob.public_url
-                        chapter_images.append(image_url)
-                    else:
-                        image_b64 = base64.b64encode(image_bytes).decode('utf-8')
-                        image_url = f"data:image/png;base64,{image_b64}"
-                        chapter_images.append(image_url)
-                        
-                except Exception as img_err:
-                    print(f"  Image generation failed: {img_err}")
+            print(f"  Generating image {i+1} for {node_plan.title}...")
+            image_bytes = await image_service.generate_image(prompt, style="educational")
+            return await get_blob_store().put(
+                f"chapters/{course_id}/{idx}_{i}.png",
+                image_bytes,
+                "image/png"
+            )
+        except Exception as img_err:
+            print(f"  Image generation failed: {img_err}")
+            return None
+
+    async def generate_images() -> list[Optional[str]]:
+        if not (image_service.is_available() and image_prompts):
+            return []
+        return await asyncio.gather(*(
+            generate_section_image(i, prompt) for i, prompt in enumerate(image_prompts[:3])
+        ))
+
+    async def write_text_and_quiz():
+        title = node_plan.title
+        summary = node_plan.summary
+        takeaways = key_takeaways
 
+        if language != "en":
+            print(f"  Translating content to {language}...")
+            translated = await translator.translate_fields(
+                {
+                    "title": title,
+                    "summary": summary,
+                    "sections": sections,
+                    "key_takeaways": list(takeaways),
+                },
+                COURSE_CONTENT_FIELDS,
+                language
+            )
+            title = translated["title"]
+            summary = translated["summary"]
+            takeaways = translated["key_takeaways"]
+
+            print(f"  Translation complete for: {title}")
+
+        chapter_content = render_chapter_markdown(sections)
+
+        quiz_result = None
+        try:
+            print(f"  Generating quiz questions for: {node_plan.title}")
+            quiz_result = await tester.generate_questions(
+                title=node_plan.title,
+                summary=node_plan.summary,
+                content=chapter_content,
+                num_mcq=3,
+                num_open_text=2
+            )
         except Exception as e:
-            print(f"Image service error: {e}")
-    
+            print(f"  Quiz generation failed for {node_plan.title}: {e}")
+
+        return title, summary, takeaways, chapter_content, quiz_result
+
+    # Images and the translate -> quiz chain don't depend on each other, so
+    # the chapter only waits for the slower of the two.
+    image_urls, (title, summary, key_takeaways, chapter_content, quiz_result) = await asyncio.gather(
+        generate_images(),
+        write_text_and_quiz()
+    )
+    chapter_images = [url for url in image_urls if url]
+
     for section in sections:
         img_idx = section.get("image_index")
-        if img_idx and 1 <= img_idx <= len(chapter_images):
-            section["image_url"] = chapter_images[img_idx - 1]
+        if img_idx and 1 <= img_idx <= len(image_urls):
+            section["image_url"] = image_urls[img_idx - 1]
         else:
             section["image_url"] = None
 
-
-    title = node_plan.title
-    summary = node_plan.summary
-    
-    if language != "en":
-        print(f"  Translating content to {language}...")
-        title = await translator.translate(title, language)
-        summary = await translator.translate(summary, language)
-
-        for section in sections:
-            if section.get("title"):
-                section["title"] = await translator.translate(section["title"], language)
-
-            if section.get("paragraphs"):
-                translated_paragraphs = []
-                for paragraph in section["paragraphs"]:
-                    translated_paragraphs.append(await translator.translate(paragraph, language))
-                section["paragraphs"] = translated_paragraphs
-
-            if section.get("bullets"):
-                translated_bullets = []
-                for bullet in section["bullets"]:
-                    translated_bullets.append(await translator.translate(bullet, language))
-                section["bullets"] = translated_bullets
-
-            if section.get("tip"):
-                section["tip"] = await translator.translate(section["tip"], language)
-        
-        translated_takeaways = []
-        for takeaway in key_takeaways:
-            translated_takeaways.append(await translator.translate(takeaway, language))
-        key_takeaways = translated_takeaways
-        
-        print(f"  Translation complete for: {title}")
-    
     chapter_doc = {
         "course_id": course_id,
         "node_id": node_plan.id,
@@ -299,65 +320,40 @@ async def generate_chapter_node(state: CourseGenerationState) -> dict:
         "title": title,
         "summary": summary,
         "sections": sections,  
+        **chapter_content_fields(sections),
         "images": chapter_images,
         "image_url": chapter_images[0] if chapter_images else None,
         "time_minutes": node_plan.time_minutes,
-        "is_completed": False,
-        "created_at": datetime.utcnow(),
     }
-    
-    result = await chapters_col.insert_one(chapter_doc)
-    chapter_id = str(result.inserted_id)
-    
-    chapter_content = ""
-    for section in sections:
-        if section.get('title'):
-            chapter_content += f"## {section['title']}\n\n"
-        for p in section.get('paragraphs', []):
-            chapter_content += f"{p}\n\n"
-        if section.get('bullets'):
-            for b in section['bullets']:
-                chapter_content += f"- {b}\n"
-            chapter_content += "\n"
-        if section.get('tip'):
-            chapter_content += f"> Tip: {section['tip']}\n\n"
 
-    try:
-        print(f"  Generating quiz questions for: {node_plan.title}")
-        quiz_result = await tester.generate_questions(
-            title=node_plan.title,
-            summary=node_plan.summary,
-            content=chapter_content,
-            num_mcq=3,
-            num_open_text=2
-        )
+    # Upserted by position so a resumed run that crashed after this write but
+    # before its checkpoint overwrites the chapter instead of duplicating it.
+    saved = await chapters_col.find_one_and_update(
+        {"course_id": course_id, "index": idx},
+        {
+            "$set": chapter_doc,
+            "$setOnInsert": {"is_completed": False, "created_at": datetime.utcnow()},
+        },
+        upsert=True,
+        projection={"_id": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    chapter_id = str(saved["_id"])
 
-        for mcq in quiz_result.mcq_questions:
-            question_doc = {
-                "chapter_id": chapter_id,
-                "question_type": "mcq",
-                "question_text": mcq.question_text,
-                "options": [{"key": opt.key, "text": opt.text} for opt in mcq.options],
-                "correct_answer": mcq.correct_answer,
-                "explanation": mcq.explanation,
-                "created_at": datetime.utcnow(),
-            }
-            await questions_col.insert_one(question_doc)
-
-        for ot in quiz_result.open_text_questions:
-            question_doc = {
-                "chapter_id": chapter_id,
-                "question_type": "open_text",
-                "question_text": ot.question_text,
-                "expected_answer": ot.expected_answer,
-                "grading_criteria": ot.grading_criteria,
-                "created_at": datetime.utcnow(),
-            }
-            await questions_col.insert_one(question_doc)
-        
-        print(f"  Saved {len(quiz_result.mcq_questions)} MCQ + {len(quiz_result.open_text_questions)} open-text questions")
-    except Exception as e:
-        print(f"  Quiz generation failed for {node_plan.title}: {e}")
+    await get_progress_service().publish(course_id, CHAPTER_SAVED, {
+        "chapter_id": chapter_id,
+        "node_id": node_plan.id,
+        "index": idx,
+        "title": title,
+    })
+
+    if quiz_result is not None:
+        try:
+            await delete_questions_for_chapters([chapter_id])
+            await insert_questions(build_question_docs(chapter_id, quiz_result))
+            print(f"  Saved {len(quiz_result.mcq_questions)} MCQ + {len(quiz_result.open_text_questions)} open-text questions")
+        except Exception as e:
+            print(f"  Saving quiz questions failed for {node_plan.title}: {e}")
 
     chapter = GeneratedChapter(
         node_id=node_plan.id,
@@ -370,11 +366,22 @@ async def generate_chapter_node(state: CourseGenerationState) -> dict:
     
     return {
         "chapters": [chapter],
-        "current_node_index": idx + 1,
-        "status": f"generated_node_{idx + 1}"
+        "current_node_index": 1,
     }
 
 
+def select_diagram_sections(sections: list[dict]) -> list[tuple[int, dict]]:
+    diagram_sections = [(i, s) for i, s in enumerate(sections) if s.get("diagram_index") is not None]
+
+    if not diagram_sections:
+        for i, s in enumerate(sections):
+            if s.get("section_type") == "concept":
+                print(f"    No diagram_index found, using first concept section: {s.get('title', 'Untitled')}")
+                return [(i, s)]
+
+    return diagram_sections
+
+
 async def generate_diagrams_node(state: CourseGenerationState) -> dict:
     from src.agents.course.diagram_agent import get_diagram_agent
 
@@ -385,36 +392,20 @@ async def generate_diagrams_node(state: CourseGenerationState) -> dict:
     chapters = await chapters_cursor.to_list(length=100)
     
     if not chapters:
+        await get_progress_service().publish(state["course_id"], DIAGRAMS_DONE, {"count": 0})
         return {"status": "no_chapters_for_diagrams"}
-    
-    total_diagrams = 0
-    
-    for chapter_doc in chapters:
-        print(f"  Processing diagrams for chapter: {chapter_doc.get('title', 'Untitled')}")
-        sections = chapter_doc.get("sections", [])
-        chapter_diagrams = 0
-        
-        diagram_sections = [(i, s) for i, s in enumerate(sections) if s.get("diagram_index") is not None]
-        
-        if not diagram_sections:
-            for i, s in enumerate(sections):
-                if s.get("section_type") == "concept":
-                    diagram_sections = [(i, s)]
-                    print(f"    No diagram_index found, using first concept section: {s.get('title', 'Untitled')}")
-                    break
-        
-        if not diagram_sections:
-            print(f"    No suitable sections for diagrams in this chapter")
-            continue
 
-        for idx, section in diagram_sections:
+    course_title = state.get("course_plan").title if state.get("course_plan") else state.get("topic", "")
+    semaphore = asyncio.Semaphore(max(1, settings.course_diagram_concurrency))
+
+    async def generate_section_diagram(chapter_doc: dict, idx: int, section: dict) -> bool:
+        async with semaphore:
             try:
                 section_content = " ".join(section.get("paragraphs", [])) + " " + section.get("title", "")
-                course_title = state.get("course_plan").title if state.get("course_plan") else state.get("topic", "")
                 
                 diagram_result = await diagram_agent.generate_diagram(
                     title=section.get('title', 'Diagram'),
-                    description=section_content[:500],
+                    description=section_content,
                     data={
                         "course_title": course_title,
                         "chapter_title": chapter_doc.get("title", ""),
@@ -425,19 +416,40 @@ async def generate_diagrams_node(state: CourseGenerationState) -> dict:
 
                 if diagram_result.get("success", False):
                     section["diagram_code"] = diagram_result["diagram_code"]
-                    chapter_diagrams += 1
                     print(f"    Generated diagram for section: {section.get('title', 'Untitled')}")
-                else:
-                    print(f"    Diagram failed for: {section.get('title', 'Untitled')}, errors: {diagram_result.get('validation_errors', ['Unknown'])}")
+                    return True
+
+                print(f"    Diagram failed for: {section.get('title', 'Untitled')}, errors: {diagram_result.get('validation_errors', ['Unknown'])}")
             except Exception as e:
                 print(f"    Diagram error for section {idx}: {e}")
+            return False
+
+    async def process_chapter(chapter_doc: dict) -> int:
+        print(f"  Processing diagrams for chapter: {chapter_doc.get('title', 'Untitled')}")
+        sections = chapter_doc.get("sections", [])
+
+        diagram_sections = select_diagram_sections(sections)
+        if not diagram_sections:
+            print(f"    No suitable sections for diagrams in this chapter")
+            return 0
+
+        results = await asyncio.gather(*[
+            generate_section_diagram(chapter_doc, idx, section)
+            for idx, section in diagram_sections
+        ])
+        chapter_diagrams = sum(results)
 
         if chapter_diagrams > 0:
             await chapters_col.update_one(
                 {"_id": chapter_doc["_id"]},
-                {"$set": {"sections": sections}}
+                {"$set": {"sections": sections, **chapter_content_fields(sections)}}
             )
-            total_diagrams += chapter_diagrams
+        return chapter_diagrams
+
+    counts = await asyncio.gather(*[process_chapter(chapter_doc) for chapter_doc in chapters])
+    total_diagrams = sum(counts)
+
+    await get_progress_service().publish(state["course_id"], DIAGRAMS_DONE, {"count": total_diagrams})
 
     return {"status": f"diagrams_processed_{total_diagrams}_across_{len(chapters)}_chapters"}
 
@@ -458,30 +470,94 @@ async def finalize_course_node(state: CourseGenerationState) -> dict:
             }
         }
     )
+
+    await get_progress_service().publish(state["course_id"], COURSE_READY)
     
     return {"status": "complete"}
 
 
-def should_continue_chapters(state: CourseGenerationState) -> Literal["generate_chapter", "generate_diagrams"]:
+def get_chapter_waves(plan: CoursePlan, max_concurrency: int) -> list[list[int]]:
+    """Group node indexes into dispatch waves by prerequisite depth.
+
+    Nodes in the same topological level of ``plan.edges`` run together, split
+    into waves of at most ``max_concurrency``. Nodes caught in a cycle are
+    scheduled last so a malformed plan still generates every chapter.
+    """
+    positions = {node.id: i for i, node in enumerate(plan.nodes)}
+    in_degree = {node.id: 0 for node in plan.nodes}
+    children = {node.id: [] for node in plan.nodes}
+
+    for edge in plan.edges:
+        if edge.source in positions and edge.target in positions and edge.source != edge.target:
+            children[edge.source].append(edge.target)
+            in_degree[edge.target] += 1
+
+    levels = []
+    level = [node_id for node_id, degree in in_degree.items() if degree == 0]
+    scheduled = set()
+    while level:
+        levels.append(sorted(positions[node_id] for node_id in level))
+        scheduled.update(level)
+        next_level = []
+        for node_id in level:
+            for child in children[node_id]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    next_level.append(child)
+        level = next_level
+
+    remaining = [positions[node.id] for node in plan.nodes if node.id not in scheduled]
+    if remaining:
+        levels.append(remaining)
+
+    size = max(1, max_concurrency)
+    return [
+        level_indexes[i:i + size]
+        for level_indexes in levels
+        for i in range(0, len(level_indexes), size)
+    ]
+
 
+async def schedule_chapters_node(state: CourseGenerationState) -> dict:
     plan = state.get("course_plan")
-    if not plan:
-        return "generate_diagrams"
+    done = state.get("current_node_index", 0)
+    total = len(plan.nodes) if plan else 0
+    return {"status": f"generated_{done}_of_{total}_chapters"}
 
-    current_idx = state.get("current_node_index", 0)
-    total_nodes = len(plan.nodes)
 
-    if current_idx < total_nodes:
-        return "generate_chapter"
-    else:
+def dispatch_chapters(state: CourseGenerationState) -> list[Send] | Literal["generate_diagrams"]:
+    plan = state.get("course_plan")
+    if not plan:
         return "generate_diagrams"
 
-
-def build_course_graph() -> StateGraph:
+    done = state.get("current_node_index", 0)
+    position = 0
+    for wave in get_chapter_waves(plan, settings.course_chapter_concurrency):
+        if position == done:
+            print(f"Dispatching {len(wave)} chapter(s) in parallel: {[plan.nodes[i].title for i in wave]}")
+            return [
+                Send("generate_chapter", ChapterTask(
+                    topic=state["topic"],
+                    difficulty=state.get("difficulty", "intermediate"),
+                    language=state.get("language", "en"),
+                    context=state.get("context"),
+                    course_plan=plan,
+                    course_id=state["course_id"],
+                    chapter_index=idx,
+                ))
+                for idx in wave
+            ]
+        position += len(wave)
+
+    return "generate_diagrams"
+
+
+def build_course_graph(checkpointer: BaseCheckpointSaver = None) -> StateGraph:
     graph = StateGraph(CourseGenerationState)
 
     graph.add_node("plan_course", plan_course_node)
     graph.add_node("save_metadata", save_course_metadata_node)
+    graph.add_node("schedule_chapters", schedule_chapters_node)
     graph.add_node("generate_chapter", generate_chapter_node)
     graph.add_node("generate_diagrams", generate_diagrams_node)
     graph.add_node("generate_questions", generate_questions_node)
@@ -489,25 +565,36 @@ def build_course_graph() -> StateGraph:
 
     graph.add_edge(START, "plan_course")
     graph.add_edge("plan_course", "save_metadata")
-    graph.add_edge("save_metadata", "generate_chapter")
+    graph.add_edge("save_metadata", "schedule_chapters")
 
     graph.add_conditional_edges(
-        "generate_chapter",
-        should_continue_chapters,
-        {
-            "generate_chapter": "generate_chapter",
-            "generate_diagrams": "generate_diagrams"
-        }
+        "schedule_chapters",
+        dispatch_chapters,
+        ["generate_chapter", "generate_diagrams"]
     )
+    graph.add_edge("generate_chapter", "schedule_chapters")
 
     graph.add_edge("generate_diagrams", "generate_questions")
     graph.add_edge("generate_questions", "finalize_course")
     graph.add_edge("finalize_course", END)
     
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
 
 
 course_graph = build_course_graph()
 
+_checkpointed_course_graph = None
+
+
+async def get_course_graph():
+    global _checkpointed_course_graph
+    checkpointer = await get_checkpointer()
+    if checkpointer is None:
+        return course_graph
+
+    if _checkpointed_course_graph is None:
+        _checkpointed_course_graph = build_course_graph(checkpointer)
+    return _checkpointed_course_graph
+
 
 
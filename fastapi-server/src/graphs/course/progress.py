@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from src.config.settings import settings
+from src.db.mongodb import MongoDB
+
+
+PLAN_READY = "plan_ready"
+CHAPTER_SAVED = "chapter_saved"
+DIAGRAMS_DONE = "diagrams_done"
+COURSE_READY = "course_ready"
+COURSE_FAILED = "course_failed"
+
+TERMINAL_EVENTS = {COURSE_READY, COURSE_FAILED}
+
+
+class CourseProgressService:
+    """Course generation events, stored in Mongo and pushed to local listeners.
+
+    Events are persisted so a client that connects late (or reconnects with
+    Last-Event-ID) can replay what it missed. Listeners in the same process are
+    woken immediately on publish. Events from the course worker in another
+    process are picked up by polling every ``poll_interval`` seconds.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, keepalive_interval: float = 15.0):
+        self.poll_interval = poll_interval
+        self.keepalive_interval = keepalive_interval
+        self._listeners: dict[str, set[asyncio.Event]] = {}
+
+    async def publish(self, course_id: str, event: str, data: dict = None) -> None:
+        try:
+            await MongoDB.course_events().insert_one({
+                "course_id": course_id,
+                "event": event,
+                "data": data or {},
+                "created_at": datetime.utcnow(),
+            })
+        except Exception as e:
+            print(f"Failed to publish course event {event} for {course_id}: {e}")
+            return
+
+        for listener in self._listeners.get(course_id, ()):
+            listener.set()
+
+    async def get_events(self, course_id: str, after_id: Optional[str] = None) -> list[dict]:
+        query = {"course_id": course_id}
+        if after_id:
+            try:
+                query["_id"] = {"$gt": ObjectId(after_id)}
+            except (InvalidId, TypeError):
+                pass
+
+        cursor = MongoDB.course_events().find(query).sort("_id", 1)
+
+        events = []
+        async for doc in cursor:
+            events.append({
+                "id": str(doc["_id"]),
+                "event": doc["event"],
+                "data": doc.get("data", {}),
+            })
+        return events
+
+    async def subscribe(
+        self,
+        course_id: str,
+        last_event_id: Optional[str] = None
+    ) -> AsyncIterator[Optional[dict]]:
+        """Yield events until the course is ready or failed.
+
+        Yields ``None`` whenever ``keepalive_interval`` passes without news so
+        the caller can send a keep-alive.
+        """
+        listener = asyncio.Event()
+        self._listeners.setdefault(course_id, set()).add(listener)
+        loop = asyncio.get_running_loop()
+        last_sent = loop.time()
+
+        try:
+            while True:
+                listener.clear()
+                for event in await self.get_events(course_id, last_event_id):
+                    last_event_id = event["id"]
+                    last_sent = loop.time()
+                    yield event
+                    if event["event"] in TERMINAL_EVENTS:
+                        return
+
+                try:
+                    await asyncio.wait_for(listener.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    if loop.time() - last_sent >= self.keepalive_interval:
+                        last_sent = loop.time()
+                        yield None
+        finally:
+            listeners = self._listeners.get(course_id)
+            if listeners is not None:
+                listeners.discard(listener)
+                if not listeners:
+                    self._listeners.pop(course_id, None)
+
+    async def clear(self, course_id: str) -> None:
+        await MongoDB.course_events().delete_many({"course_id": course_id})
+
+    async def clear_failure(self, course_id: str) -> None:
+        """Drop a failed run's terminal event so subscribers follow a resumed
+        run, keeping the chapters it already announced."""
+        await MongoDB.course_events().delete_many({"course_id": course_id, "event": COURSE_FAILED})
+
+
+_progress_service: Optional[CourseProgressService] = None
+
+
+def get_progress_service() -> CourseProgressService:
+    global _progress_service
+    if _progress_service is None:
+        _progress_service = CourseProgressService(
+            poll_interval=settings.course_events_poll_seconds,
+            keepalive_interval=settings.course_events_keepalive_seconds
+        )
+    return _progress_service
@@ -2,8 +2,13 @@ from datetime import datetime
 from typing import Optional
 from bson import ObjectId
 
+from src.models.schemas import CourseStatus
 from src.utils.vector import get_vector_service
-from src.db.mongodb import MongoDB, COURSES_COLLECTION, CHAPTERS_COLLECTION, QUESTIONS_COLLECTION
+from src.utils.blob_store import get_blob_store
+from src.graphs.course.progress import get_progress_service
+from src.graphs.course.checkpoint import delete_checkpoint
+from src.db.mongodb import MongoDB, COURSES_COLLECTION
+from src.db.questions import delete_chapters_with_questions
 
 
 class CourseService:
@@ -20,15 +25,20 @@ class CourseService:
         document_ids: list[str] = None,
         generate_content: bool = True
     ) -> str:
-        from src.graphs.course.graph import course_graph
+        from src.graphs.course.graph import get_course_graph
 
         context = None
+        context_chunk_ids = []
         if document_ids:
-            context = await self.vector_service.get_context_for_topic(
+            context, context_chunk_ids = await self.vector_service.get_context_for_topic(
                 topic=topic,
-                course_id="temp"
+                document_ids=document_ids
             )
 
+        # A fresh run must not inherit channel values from an older attempt.
+        await delete_checkpoint(course_id)
+
+        course_graph = await get_course_graph()
         result = await course_graph.ainvoke({
             "topic": topic,
             "time_hours": time_hours,
@@ -36,18 +46,65 @@ class CourseService:
             "language": language,
             "generate_content": generate_content,
             "context": context,
+            "context_chunk_ids": context_chunk_ids,
             "course_plan": None,
             "chapters": [],
             "current_node_index": 0, 
             "status": "starting",
             "error": None,
             "course_id": course_id
-        })
+        }, config=self._graph_config(course_id))
         
         if result.get("error"):
             raise Exception(result["error"])
+
+        await delete_checkpoint(course_id)
         
         return result["course_id"]
+
+    def _graph_config(self, course_id: str) -> dict:
+        return {"configurable": {"thread_id": course_id}}
+
+    async def get_checkpoint(self, course_id: str) -> Optional[dict]:
+        from src.graphs.course.graph import get_course_graph
+
+        course_graph = await get_course_graph()
+        if course_graph.checkpointer is None:
+            return None
+
+        snapshot = await course_graph.aget_state(self._graph_config(course_id))
+        if not snapshot.values:
+            return None
+
+        plan = snapshot.values.get("course_plan")
+        return {
+            "next": list(snapshot.next),
+            "status": snapshot.values.get("status"),
+            "current_node_index": snapshot.values.get("current_node_index", 0),
+            "chapter_count": len(plan.nodes) if plan else 0,
+        }
+
+    async def resume_course(self, course_id: str) -> str:
+        from src.graphs.course.graph import get_course_graph
+
+        checkpoint = await self.get_checkpoint(course_id)
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint found for course {course_id}")
+
+        if checkpoint["next"]:
+            print(
+                f"Resuming course {course_id} at {checkpoint['next']} "
+                f"({checkpoint['current_node_index']}/{checkpoint['chapter_count']} chapters done)"
+            )
+            course_graph = await get_course_graph()
+            result = await course_graph.ainvoke(None, config=self._graph_config(course_id))
+
+            if result.get("error"):
+                raise Exception(result["error"])
+
+        await delete_checkpoint(course_id)
+
+        return course_id
     
     async def get_course(self, course_id: str) -> Optional[dict]:
         courses = MongoDB.get_collection(COURSES_COLLECTION)
@@ -80,20 +137,30 @@ class CourseService:
         return result, total
 
     
+    async def reset_generation(self, course_id: str) -> None:
+        await delete_chapters_with_questions(course_id)
+        # The old run's events point at chapters that no longer exist
+        await get_progress_service().clear(course_id)
+
+        await MongoDB.get_collection(COURSES_COLLECTION).update_one(
+            {"_id": ObjectId(course_id)},
+            {"$set": {"status": CourseStatus.CREATING.value, "updated_at": datetime.utcnow()}}
+        )
+
     async def delete_course(self, course_id: str) -> bool:
         courses = MongoDB.get_collection(COURSES_COLLECTION)
-        chapters_col = MongoDB.get_collection(CHAPTERS_COLLECTION)
-        questions_col = MongoDB.get_collection(QUESTIONS_COLLECTION)
-
-        chapters = await chapters_col.find({"course_id": course_id}).to_list(100)
-        for chapter in chapters:
-            await questions_col.delete_many({"chapter_id": str(chapter["_id"])})
 
-        await chapters_col.delete_many({"course_id": course_id})
+        await delete_chapters_with_questions(course_id)
 
         result = await courses.delete_one({"_id": ObjectId(course_id)})
 
         await self.vector_service.delete_by_course(course_id)
+        try:
+            await get_blob_store().delete_prefix(f"chapters/{course_id}/")
+        except Exception as e:
+            print(f"Failed to delete images for course {course_id}: {e}")
+        await get_progress_service().clear(course_id)
+        await delete_checkpoint(course_id)
         
         return result.deleted_count > 0
 
@@ -34,18 +34,29 @@ class GeneratedChapter(TypedDict):
     key_takeaways: List[str]
 
 
+class ChapterTask(TypedDict):
+    topic: str
+    difficulty: str
+    language: str
+    context: Optional[str]
+    course_plan: CoursePlan
+    course_id: str
+    chapter_index: int
+
+
 class CourseGenerationState(TypedDict):
     topic: str
     time_hours: int
     difficulty: str
     language: str
     context: Optional[str]
+    context_chunk_ids: Optional[List[str]]
     generate_content: bool  
 
     course_plan: Optional[CoursePlan]
 
     chapters: Annotated[List[GeneratedChapter], operator.add]
-    current_node_index: int  
+    current_node_index: Annotated[int, operator.add]
 
     status: str  
     error: Optional[str]
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import socket
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+
+from src.config.settings import settings
+from src.db.job_queue import JobQueue
+from src.db.mongodb import MongoDB, COURSE_JOBS_COLLECTION
+from src.models.schemas import CourseStatus
+from src.graphs.course.progress import get_progress_service, COURSE_FAILED
+
+
+_course_job_queue: Optional[JobQueue] = None
+
+
+def get_course_job_queue() -> JobQueue:
+    global _course_job_queue
+    if _course_job_queue is None:
+        _course_job_queue = JobQueue(
+            COURSE_JOBS_COLLECTION,
+            lease_seconds=settings.course_job_lease_seconds,
+            max_attempts=settings.course_job_max_attempts,
+        )
+    return _course_job_queue
+
+
+async def enqueue_course_generation(
+    course_id: str,
+    topic: str,
+    time_hours: int,
+    difficulty: str,
+    language: str,
+    document_ids: list[str] = None,
+    generate_content: bool = True,
+    user_id: str = None,
+    resume: bool = False
+) -> str:
+    return await get_course_job_queue().enqueue(
+        {
+            "course_id": course_id,
+            "topic": topic,
+            "time_hours": time_hours,
+            "difficulty": difficulty,
+            "language": language,
+            "document_ids": document_ids or [],
+            "generate_content": generate_content,
+            "user_id": user_id,
+            "resume": resume,
+        },
+        key=course_id
+    )
+
+
+async def mark_course_failed(course_id: str, error: str) -> None:
+    await MongoDB.courses().update_one(
+        {"_id": ObjectId(course_id)},
+        {
+            "$set": {
+                "status": CourseStatus.FAILED.value,
+                "error_message": error,
+                "updated_at": datetime.utcnow(),
+            }
+        }
+    )
+    await get_progress_service().publish(course_id, COURSE_FAILED, {"error": error})
+
+
+class CourseWorker:
+    """Claims course generation jobs from the queue and runs the course graph."""
+
+    def __init__(self, concurrency: int = None, poll_interval: float = 2.0, shutdown_grace: float = None):
+        self.queue = get_course_job_queue()
+        self.concurrency = max(1, concurrency or settings.course_worker_concurrency)
+        self.poll_interval = poll_interval
+        self.shutdown_grace = settings.course_worker_shutdown_grace_seconds if shutdown_grace is None else shutdown_grace
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: set[asyncio.Task] = set()
+
+    async def run(self, stop: asyncio.Event) -> None:
+        print(f"Course worker {self.worker_id} started (concurrency={self.concurrency})")
+        slots = asyncio.Semaphore(self.concurrency)
+
+        try:
+            while await self._acquire(slots, stop):
+                try:
+                    job = await self.queue.claim(self.worker_id)
+                except Exception as e:
+                    print(f"Course worker failed to claim a job: {e}")
+                    job = None
+
+                if job is None:
+                    slots.release()
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                task = asyncio.create_task(self._process(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                task.add_done_callback(lambda _: slots.release())
+
+            if self._running:
+                print(f"Course worker {self.worker_id} draining {len(self._running)} job(s)")
+                await asyncio.wait(set(self._running), timeout=self.shutdown_grace)
+        finally:
+            await self._release_running()
+        print(f"Course worker {self.worker_id} stopped")
+
+    async def _acquire(self, slots: asyncio.Semaphore, stop: asyncio.Event) -> bool:
+        """Wait for a free slot; False once ``stop`` is set, even while every slot is busy."""
+        if stop.is_set():
+            return False
+        acquire = asyncio.create_task(slots.acquire())
+        stopped = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait({acquire, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopped.cancel()
+            acquire.cancel()
+        if acquire.done() and not acquire.cancelled():
+            if not stop.is_set():
+                return True
+            slots.release()
+        return False
+
+    async def _release_running(self) -> None:
+        if not self._running:
+            return
+        # Cancelled jobs hand their lease back, so another worker resumes
+        # them from the checkpoint straight away.
+        pending = set(self._running)
+        print(f"Course worker {self.worker_id} releasing {len(pending)} unfinished job(s)")
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _process(self, job: dict) -> None:
+        from src.graphs.course.service import get_course_service
+        from src.utils.analytics import get_analytics_service
+
+        payload = job["payload"]
+        course_id = payload["course_id"]
+
+        if self.queue.is_exhausted(job):
+            error = job.get("last_error") or "Course generation worker stopped responding"
+            await self.queue.fail(job, self.worker_id, error)
+            await mark_course_failed(course_id, error)
+            return
+
+        course_service = get_course_service()
+        run = asyncio.create_task(self._generate(course_service, job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, run))
+
+        try:
+            await run
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                run.cancel()
+                await asyncio.wait({run}, timeout=5)
+                try:
+                    await self.queue.release(job, self.worker_id)
+                except Exception as e:
+                    print(f"Course job {job['_id']} could not be released: {e}")
+                raise
+            print(f"Course job {job['_id']} lost its lease, abandoning")
+            return
+        except Exception as e:
+            print(f"Course generation failed (attempt {job['attempts']}): {e}")
+            if await self.queue.fail(job, self.worker_id, str(e)):
+                print(f"Course {course_id} queued for retry")
+            else:
+                await mark_course_failed(course_id, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+
+        await self.queue.complete(job["_id"], self.worker_id)
+
+        if payload.get("user_id"):
+            await get_analytics_service().track_course_created(payload["user_id"], course_id, payload["topic"])
+
+    async def _generate(self, course_service, job: dict) -> None:
+        payload = job["payload"]
+        if job["attempts"] > 1 or payload.get("resume") or job.get("interrupted"):
+            if await course_service.get_checkpoint(payload["course_id"]):
+                await course_service.resume_course(payload["course_id"])
+                return
+            await course_service.reset_generation(payload["course_id"])
+
+        await course_service.create_course(
+            course_id=payload["course_id"],
+            topic=payload["topic"],
+            time_hours=payload["time_hours"],
+            difficulty=payload["difficulty"],
+            language=payload["language"],
+            document_ids=payload.get("document_ids"),
+            generate_content=payload.get("generate_content", True)
+        )
+
+    async def _heartbeat(self, job: dict, run: asyncio.Task) -> None:
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not run.done():
+            await asyncio.sleep(interval)
+            try:
+                if not await self.queue.heartbeat(job["_id"], self.worker_id):
+                    run.cancel()
+                    return
+            except Exception as e:
+                print(f"Course job {job['_id']} heartbeat failed: {e}")
@@ -45,7 +45,8 @@ async def run_job_discovery(
     resume_profile: Optional[ResumeProfile] = None,
     manual_input: Optional[ManualJobInput] = None,
     preferences: Optional[JobPreferences] = None,
-    user_id: Optional[str] = None
+    user_id: Optional[str] = None,
+    config: Optional[dict] = None
 ) -> JobDiscoveryState:
     initial_state: JobDiscoveryState = {
         "resume_profile": resume_profile,
@@ -65,5 +66,5 @@ async def run_job_discovery(
         "error": None
     }
     
-    result = await job_discovery_graph.ainvoke(initial_state)
+    result = await job_discovery_graph.ainvoke(initial_state, config=config)
     return result
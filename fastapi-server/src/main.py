@@ -2,14 +2,17 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import asyncio
 from pathlib import Path
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from src.config.settings import settings
 from src.db.mongodb import MongoDB
+from src.graphs.course.worker import CourseWorker
+from src.utils.tokens import get_tokenizer
 from src.routers import (
     courses,
     chapters,
@@ -21,6 +24,7 @@ from src.routers import (
     video_assistant,
     jobs,
     interview,
+    blobs,
 )
 from src.routers.course import flashcards_router, slides_router
 
@@ -30,10 +34,30 @@ UPLOADS_DIR.mkdir(exist_ok=True)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await MongoDB.connect()
+    # Load the prompt-budget tokenizer off the event loop before requests need it.
+    await asyncio.to_thread(get_tokenizer)
     print("Lumina AI Course Engine started")
 
+    worker_stop = asyncio.Event()
+    worker_task = None
+    if settings.course_worker_embedded:
+        worker_task = asyncio.create_task(CourseWorker().run(worker_stop))
+
     yield
 
+    if worker_task:
+        # The worker lets in-flight jobs finish for its shutdown grace period,
+        # then cancels the rest and releases their leases.
+        worker_stop.set()
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(worker_task), timeout=settings.course_worker_shutdown_grace_seconds + 10
+            )
+        except asyncio.TimeoutError:
+            worker_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await worker_task
+
     await MongoDB.close()
     print("Lumina AI Course Engine stopped")
 
@@ -71,6 +95,7 @@ app.include_router(materials.router, prefix="/api", tags=["Materials"])
 app.include_router(video_assistant.router, prefix="/api", tags=["Video Assistant"])
 app.include_router(jobs.router, prefix="/api", tags=["Jobs"])
 app.include_router(interview.router, prefix="/api", tags=["Interview"])
+app.include_router(blobs.router, prefix="/api", tags=["Blobs"])
 
 @app.get("/")
 async def root():
@@ -81,6 +106,27 @@ async def root():
     }
 
 
+@app.get("/api/llm/cache/stats")
+async def get_llm_cache_stats():
+    from src.utils.llm_cache import get_llm_cache_stats
+
+    return get_llm_cache_stats()
+
+
+@app.get("/api/embeddings/cache/stats")
+async def get_embedding_cache_stats():
+    from src.utils.embedding_cache import get_embedding_cache_stats
+
+    return get_embedding_cache_stats()
+
+
+@app.get("/api/llm/queues")
+async def get_llm_queue_stats():
+    from src.utils.llm_governor import get_governor_stats
+
+    return {"providers": get_governor_stats()}
+
+
 @app.get("/api/languages")
 async def get_supported_languages():
     from src.utils.translation import TranslationService
@@ -0,0 +1 @@
+"""One-off data migrations, run with ``python -m src.migrations.<name>``"""
@@ -0,0 +1,110 @@
+"""Move base64 data URI chapter images out of Mongo into the blob store.
+
+Usage:
+    uv run python -m src.migrations.move_inline_images [--dry-run]
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import argparse
+import asyncio
+import base64
+import binascii
+import re
+
+from src.db.mongodb import MongoDB
+from src.utils.blob_store import get_blob_store
+
+
+DATA_URI_PATTERN = re.compile(r"^data:(?P<content_type>[\w/+.-]+);base64,(?P<data>.+)$", re.DOTALL)
+
+EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "image/gif": "gif",
+}
+
+INLINE_IMAGE_QUERY = {
+    "$or": [
+        {"images": {"$regex": "^data:"}},
+        {"image_url": {"$regex": "^data:"}},
+        {"sections.image_url": {"$regex": "^data:"}},
+    ]
+}
+
+
+async def migrate_chapter(chapter: dict, blob_store, dry_run: bool) -> int:
+    course_id = chapter.get("course_id", "unknown")
+    index = chapter.get("index", 0)
+    uploaded: dict[str, str] = {}
+
+    async def to_url(value: str) -> str:
+        if not isinstance(value, str) or not value.startswith("data:"):
+            return value
+        if value in uploaded:
+            return uploaded[value]
+
+        match = DATA_URI_PATTERN.match(value)
+        if not match:
+            return value
+        try:
+            data = base64.b64decode(match.group("data"))
+        except (binascii.Error, ValueError):
+            print(f"  Skipping undecodable image in chapter {chapter['_id']}")
+            return value
+
+        content_type = match.group("content_type")
+        key = f"chapters/{course_id}/{index}_{len(uploaded)}.{EXTENSIONS.get(content_type, 'bin')}"
+        url = key if dry_run else await blob_store.put(key, data, content_type)
+        uploaded[value] = url
+        return url
+
+    images = [await to_url(image) for image in chapter.get("images", [])]
+    image_url = await to_url(chapter.get("image_url"))
+
+    sections = chapter.get("sections", [])
+    for section in sections:
+        if isinstance(section, dict) and section.get("image_url"):
+            section["image_url"] = await to_url(section["image_url"])
+
+    if uploaded and not dry_run:
+        await MongoDB.chapters().update_one(
+            {"_id": chapter["_id"]},
+            {"$set": {"images": images, "image_url": image_url, "sections": sections}}
+        )
+
+    return len(uploaded)
+
+
+async def run(dry_run: bool) -> None:
+    await MongoDB.connect()
+    blob_store = get_blob_store()
+
+    chapters_migrated = 0
+    images_moved = 0
+    try:
+        cursor = MongoDB.chapters().find(INLINE_IMAGE_QUERY)
+        async for chapter in cursor:
+            moved = await migrate_chapter(chapter, blob_store, dry_run)
+            if moved:
+                chapters_migrated += 1
+                images_moved += moved
+                print(f"  {'Would move' if dry_run else 'Moved'} {moved} image(s) from chapter {chapter['_id']}")
+    finally:
+        await MongoDB.close()
+
+    print(f"{'Dry run: ' if dry_run else ''}{images_moved} image(s) across {chapters_migrated} chapter(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Report what would move without writing")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
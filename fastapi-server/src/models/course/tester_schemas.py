@@ -1,7 +1,11 @@
+import re
 from typing import List, Any
 from pydantic import BaseModel, Field, model_validator
 
 
+OPTION_PREFIX = re.compile(r"\s*\(?([a-dA-D])[).:]\s+")
+
+
 class MCQOptionSchema(BaseModel):
     key: str = Field(..., description="Option key (a, b, c, or d)")
     text: str = Field(..., description="Option text")
@@ -9,12 +13,29 @@ class MCQOptionSchema(BaseModel):
     @model_validator(mode='before')
     @classmethod
     def repair_malformed_option(cls, data: Any) -> Any:
+        if isinstance(data, str):
+            match = OPTION_PREFIX.match(data)
+            if match:
+                return {'key': match.group(1).lower(), 'text': data[match.end():].strip()}
+            return {'key': '', 'text': data}
         if isinstance(data, dict):
+            data = dict(data)
+            if 'key' not in data:
+                for alias in ['label', 'letter', 'option', 'id']:
+                    if alias in data:
+                        data['key'] = data.pop(alias)
+                        break
+            if 'text' not in data:
+                for alias in ['option_text', 'content', 'value', 'answer']:
+                    if alias in data:
+                        data['text'] = data.pop(alias)
+                        break
             if 'text' not in data:
                 key_value = data.get('key', '')
                 for letter in ['a', 'b', 'c', 'd']:
                     if letter in data and letter != 'key':
                         data['text'] = data.pop(letter)
+                        data.setdefault('key', letter)
                         break
                 
                 if 'text' not in data:
@@ -31,6 +52,22 @@ class MCQQuestionSchema(BaseModel):
     correct_answer: str = Field(..., description="Correct option key (a, b, c, or d)")
     explanation: str = Field(..., description="Why this is the correct answer")
 
+    @model_validator(mode='before')
+    @classmethod
+    def repair_options(cls, data: Any) -> Any:
+        if isinstance(data, dict):
+            options = data.get('options')
+            if isinstance(options, dict):
+                data = {**data, 'options': [{'key': k, 'text': v} for k, v in options.items()]}
+            elif isinstance(options, list):
+                repaired = []
+                for letter, option in zip('abcdefgh', options):
+                    if isinstance(option, str) and not OPTION_PREFIX.match(option):
+                        option = {'key': letter, 'text': option}
+                    repaired.append(option)
+                data = {**data, 'options': repaired}
+        return data
+
 
 class OpenTextQuestionSchema(BaseModel):
     question_text: str = Field(..., description="The question text")
@@ -34,6 +34,9 @@ class VideoResponse(BaseModel):
     segment_count: int
     has_summary: bool
     has_chapters: bool
+    status: str = "ready"  # "indexing", "ready" or "failed"
+    indexed_segments: Optional[int] = None  # windows embedded so far, out of total_segments
+    total_segments: Optional[int] = None
     created_at: datetime
 
 
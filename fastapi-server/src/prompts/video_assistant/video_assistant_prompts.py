@@ -76,6 +76,9 @@ Instructions:
 Make these notes comprehensive enough to serve as study material."""
 
 
+STREAMING_ANSWER_INSTRUCTION = "Reply with the answer text only, as plain prose or markdown. Do not include a confidence rating."
+
+
 TIME_AWARE_KEYWORDS = [
     "just now", "just said", "just explained", "just mentioned",
     "right now", "this part", "this section", "what he said",
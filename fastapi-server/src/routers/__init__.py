@@ -1,6 +1,6 @@
 """Routers module"""
-from src.routers import courses, chapters, quiz, chat, roadmaps, videos, materials, video_assistant, jobs
+from src.routers import courses, chapters, quiz, chat, roadmaps, videos, materials, video_assistant, jobs, blobs
 
-__all__ = ["courses", "chapters", "quiz", "chat", "roadmaps", "videos", "materials", "video_assistant", "jobs"]
+__all__ = ["courses", "chapters", "quiz", "chat", "roadmaps", "videos", "materials", "video_assistant", "jobs", "blobs"]
 
 
@@ -0,0 +1,29 @@
+import hashlib
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
+
+from src.utils.blob_store import get_blob_store, GridFSBlobStore
+
+
+router = APIRouter()
+
+
+@router.get("/blobs/{key:path}")
+async def get_blob(key: str, if_none_match: str = Header(default=None)):
+    blob_store = get_blob_store()
+    if not isinstance(blob_store, GridFSBlobStore):
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    blob = await blob_store.get(key)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    data, content_type = blob
+    # Keys are rewritten when a chapter is regenerated, so clients revalidate
+    # against the content hash instead of caching forever.
+    etag = f'"{hashlib.md5(data).hexdigest()}"'
+    headers = {"Cache-Control": "no-cache", "ETag": etag}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=content_type, headers=headers)
@@ -5,6 +5,7 @@ from fastapi.responses import StreamingResponse
 from src.models.schemas import ChatRequest, ChatResponse
 from src.services.course.chat_service import get_chat_service
 from src.db.helpers import get_chapter_or_404, get_course_language, get_message_or_404
+from src.utils.sse import sse_response
 
 
 router = APIRouter()
@@ -15,6 +16,12 @@ async def send_chat_message(chapter_id: str, request: ChatRequest):
     return await chat_service.send_message(chapter_id, request.message)
 
 
+@router.post("/chapters/{chapter_id}/chat/stream")
+async def stream_chat_message(chapter_id: str, request: ChatRequest):
+    chat_service = get_chat_service()
+    return sse_response(await chat_service.stream_message(chapter_id, request.message))
+
+
 @router.get("/chapters/{chapter_id}/chat/{message_id}/audio")
 async def get_chat_audio(chapter_id: str, message_id: str, rate: float = 1.0):
     message = await get_message_or_404(message_id)
@@ -1,6 +1,6 @@
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from bson import ObjectId
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header
 
 from src.models.schemas import (
     CourseCreate, 
@@ -13,10 +13,12 @@ from src.models.schemas import (
     TopicEdge,
     NodeStatus
 )
-from src.graphs.course import get_course_service
-from src.utils.analytics import get_analytics_service
+from src.graphs.course import get_course_service, get_progress_service
+from src.graphs.course.progress import COURSE_READY, COURSE_FAILED
+from src.graphs.course.worker import enqueue_course_generation, get_course_job_queue
 from src.db.mongodb import MongoDB
 from src.db.helpers import get_course_or_404
+from src.utils.sse import format_sse, sse_response
 
 
 router = APIRouter()
@@ -60,13 +62,7 @@ def _convert_course_to_response(course: dict) -> CourseResponse:
 
 
 @router.post("/courses", response_model=CourseResponse)
-async def create_course(
-    course: CourseCreate,
-    background_tasks: BackgroundTasks
-):
-    course_service = get_course_service()
-    analytics = get_analytics_service()
-
+async def create_course(course: CourseCreate):
     course_doc = {
         "topic": course.topic,
         "title": f"Creating: {course.topic[:50]}...",
@@ -77,42 +73,24 @@ async def create_course(
         "status": CourseStatus.CREATING.value,
         "chapter_count": 0,
         "user_id": course.user_id,
+        "document_ids": course.document_ids,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
     }
     
     result = await MongoDB.courses().insert_one(course_doc)
     course_id = str(result.inserted_id)
-    user_id = course.user_id
-    topic = course.topic
-    
-    async def generate_course():
-        try:
-            await course_service.create_course(
-                course_id=course_id,
-                topic=course.topic,
-                time_hours=course.time_hours,
-                difficulty=course.difficulty.value,
-                language=course.language.value,
-                document_ids=course.document_ids,
-                generate_content=course.generate_content
-            )
-            if user_id:
-                await analytics.track_course_created(user_id, course_id, topic)
-        except Exception as e:
-            print(f"Course generation failed: {e}")
-            await MongoDB.courses().update_one(
-                {"_id": ObjectId(course_id)},
-                {
-                    "$set": {
-                        "status": CourseStatus.FAILED.value,
-                        "error_message": str(e),
-                        "updated_at": datetime.utcnow(),
-                    }
-                }
-            )
-    
-    background_tasks.add_task(generate_course)
+
+    await enqueue_course_generation(
+        course_id=course_id,
+        topic=course.topic,
+        time_hours=course.time_hours,
+        difficulty=course.difficulty.value,
+        language=course.language.value,
+        document_ids=course.document_ids,
+        generate_content=course.generate_content,
+        user_id=course.user_id
+    )
     
     return CourseResponse(
         id=course_id,
@@ -128,6 +106,11 @@ async def create_course(
     )
 
 
+@router.get("/course-queue/stats")
+async def get_course_queue_stats():
+    return await get_course_job_queue().get_stats()
+
+
 @router.get("/courses", response_model=CourseListResponse)
 async def list_courses(skip: int = 0, limit: int = 20, user_id: str = None):
     course_service = get_course_service()
@@ -143,6 +126,71 @@ async def get_course(course_id: str):
     return _convert_course_to_response(course)
 
 
+@router.get("/courses/{course_id}/events")
+async def stream_course_events(
+    course_id: str,
+    last_event_id: Optional[str] = Header(default=None)
+):
+    course = await get_course_or_404(course_id)
+    progress = get_progress_service()
+
+    async def event_stream():
+        status = course.get("status", CourseStatus.CREATING.value)
+        if status != CourseStatus.CREATING.value and not await progress.get_events(course_id):
+            event = COURSE_READY if status == CourseStatus.READY.value else COURSE_FAILED
+            yield format_sse(event, {"error": course.get("error_message")} if event == COURSE_FAILED else {})
+            return
+
+        async for event in progress.subscribe(course_id, last_event_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event["event"], event["data"], event["id"])
+
+    return sse_response(event_stream())
+
+
+@router.post("/courses/{course_id}/resume")
+async def resume_course(course_id: str):
+    course = await get_course_or_404(course_id)
+    if course.get("status") == CourseStatus.READY.value:
+        raise HTTPException(status_code=400, detail="Course is already complete")
+
+    queue = get_course_job_queue()
+    if await queue.get_active(course_id):
+        raise HTTPException(status_code=409, detail="Course generation is already in progress")
+
+    course_service = get_course_service()
+    checkpoint = await course_service.get_checkpoint(course_id)
+
+    await MongoDB.courses().update_one(
+        {"_id": course["_id"]},
+        {
+            "$set": {"status": CourseStatus.CREATING.value, "updated_at": datetime.utcnow()},
+            "$unset": {"error_message": ""},
+        }
+    )
+    # Drop the previous run's course_failed so new subscribers follow the resumed run
+    await get_progress_service().clear_failure(course_id)
+    await enqueue_course_generation(
+        course_id=course_id,
+        topic=course.get("topic", ""),
+        time_hours=course.get("time_hours", 1),
+        difficulty=course.get("difficulty", "beginner"),
+        language=course.get("language", "en"),
+        document_ids=course.get("document_ids") or [],
+        generate_content=True,
+        user_id=course.get("user_id"),
+        resume=True
+    )
+
+    return {
+        "message": "Course generation resumed" if checkpoint else "No checkpoint found, restarting course generation",
+        "id": course_id,
+        "checkpoint": checkpoint,
+    }
+
+
 @router.delete("/courses/{course_id}")
 async def delete_course(course_id: str):
     course_service = get_course_service()
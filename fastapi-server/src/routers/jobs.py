@@ -11,6 +11,7 @@ from src.models.jobs.schemas import (
 )
 from src.services.jobs.job_discovery_service import get_job_discovery_service
 from src.services.jobs.job_chat_service import get_job_chat_service
+from src.utils.sse import sse_response
 
 router = APIRouter()
 
@@ -96,6 +97,24 @@ async def refine_search(request: ChatRefinementRequest):
             detail=f"Chat failed: {str(e)}"
         )
 
+@router.post("/jobs/chat/stream")
+async def stream_refine_search(request: ChatRefinementRequest):
+    service = get_job_chat_service()
+    try:
+        events = await service.stream_message(
+            search_id=request.search_id,
+            message=request.message,
+            chat_history=[]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Chat failed: {str(e)}"
+        )
+    return sse_response(events)
+
 @router.get("/jobs/history")
 async def list_searches(limit: int = 20):
     service = get_job_discovery_service()
@@ -7,6 +7,7 @@ from src.models.roadmap.schemas import (
 )
 from src.services.roadmap.roadmap_service import get_roadmap_service
 from src.services.roadmap.roadmap_chat_service import get_roadmap_chat_service
+from src.utils.sse import sse_response
 
 router = APIRouter(
     prefix="/roadmaps",
@@ -138,6 +139,29 @@ async def send_roadmap_chat_message(roadmap_id: str, request: ChatMessageRequest
         )
 
 
+@router.post("/{roadmap_id}/chat/stream")
+async def stream_roadmap_chat_message(roadmap_id: str, request: ChatMessageRequest):
+    chat_service = get_roadmap_chat_service()
+
+    try:
+        events = await chat_service.stream_message(
+            roadmap_id=roadmap_id,
+            message=request.message,
+            chat_history=request.chat_history
+        )
+    except ValueError as e:
+        if "Roadmap not found" in str(e) or "Invalid roadmap ID" in str(e):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Roadmap not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return sse_response(events)
+
+
 @router.get("/{roadmap_id}/chat/suggestions", response_model=SuggestedQuestionsResponse)
 async def get_suggested_questions(roadmap_id: str):
     roadmap_service = get_roadmap_service()
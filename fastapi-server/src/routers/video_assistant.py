@@ -18,6 +18,7 @@ from src.services.video_assistant.video_assistant_service import (
     get_video_assistant_service,
 )
 from src.utils.time import format_time
+from src.utils.sse import sse_response
 
 
 router = APIRouter(
@@ -102,6 +103,27 @@ async def ask_question(video_id: str, request: QARequest):
             )
 
 
+@router.post("/videos/{video_id}/qa/stream")
+async def stream_question(video_id: str, request: QARequest):
+    service = get_video_assistant_service()
+    try:
+        events = await service.stream_question(
+            video_id=video_id,
+            question=request.question,
+            current_time=request.current_time,
+        )
+    except ValueError as e:
+        if "Video not found" in str(e):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Video not found"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+            )
+    return sse_response(events)
+
+
 @router.get("/videos/{video_id}/summary", response_model=SummaryResponse)
 async def get_summary(video_id: str, regenerate: bool = False):
     service = get_video_assistant_service()
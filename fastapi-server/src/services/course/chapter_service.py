@@ -5,6 +5,7 @@ from bson import ObjectId
 
 from src.models.schemas import ChapterSummary, ChapterDetail
 from src.db.mongodb import MongoDB
+from src.db.chapters import CHAPTER_TEXT_PROJECTION, get_chapter_speech
 from src.db.helpers import get_course_or_404, get_chapter_or_404, get_course_language
 
 
@@ -109,40 +110,14 @@ class ChapterService:
     ) -> Optional[bytes]:
         from src.utils.tts import get_tts_service
 
-        chapter = await get_chapter_or_404(chapter_id, course_id)
+        chapter = await get_chapter_or_404(chapter_id, course_id, projection=CHAPTER_TEXT_PROJECTION)
 
         language = await get_course_language(course_id)
 
-        content = chapter.get("content", "")
+        content = await get_chapter_speech(chapter)
         title = chapter.get("title", "")
         summary = chapter.get("summary", "")
 
-        if not content and "sections" in chapter:
-            sections = chapter["sections"]
-            content_parts = []
-
-            for section in sections:
-                if isinstance(section, dict):
-                    if section.get("title"):
-                        content_parts.append(section["title"])
-
-                    for paragraph in (section.get("paragraphs") or []):
-                        content_parts.append(paragraph)
-
-                    for bullet in (section.get("bullets") or []):
-                        content_parts.append(bullet)
-
-                    if section.get("text"):
-                        content_parts.append(section["text"])
-
-                    if section.get("body"):
-                        content_parts.append(section["body"])
-
-                    if section.get("tip"):
-                        content_parts.append(f"Tip: {section['tip']}")
-
-            content = " ".join(content_parts)
-
         # Fallback to summary if no content
         if not content and summary:
             content = summary
@@ -171,32 +146,13 @@ class ChapterService:
         """Async generator that yields audio chunks for streaming playback."""
         from src.utils.tts import get_tts_service
 
-        chapter = await get_chapter_or_404(chapter_id, course_id)
+        chapter = await get_chapter_or_404(chapter_id, course_id, projection=CHAPTER_TEXT_PROJECTION)
         language = await get_course_language(course_id)
 
-        content = chapter.get("content", "")
+        content = await get_chapter_speech(chapter)
         title = chapter.get("title", "")
         summary = chapter.get("summary", "")
 
-        if not content and "sections" in chapter:
-            sections = chapter["sections"]
-            content_parts = []
-            for section in sections:
-                if isinstance(section, dict):
-                    if section.get("title"):
-                        content_parts.append(section["title"])
-                    for paragraph in (section.get("paragraphs") or []):
-                        content_parts.append(paragraph)
-                    for bullet in (section.get("bullets") or []):
-                        content_parts.append(bullet)
-                    if section.get("text"):
-                        content_parts.append(section["text"])
-                    if section.get("body"):
-                        content_parts.append(section["body"])
-                    if section.get("tip"):
-                        content_parts.append(f"Tip: {section['tip']}")
-            content = " ".join(content_parts)
-
         if not content and summary:
             content = summary
 
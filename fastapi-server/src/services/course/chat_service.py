@@ -1,11 +1,13 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from src.models.schemas import ChatResponse, ChatMessage
 from src.agents.course.chat import get_chat_agent
 from src.utils.translation import get_translation_service
 from src.db.mongodb import MongoDB
+from src.db.chapters import CHAPTER_TEXT_PROJECTION, get_chapter_markdown
 from src.db.helpers import get_chapter_or_404, get_course_language
+from src.utils.sse import stream_chat_events
 
 
 class ChatService:
@@ -14,7 +16,7 @@ class ChatService:
             from src.utils.vector import get_vector_service
             vector_service = get_vector_service()
             
-            context = await vector_service.get_context_for_topic(
+            context, _ = await vector_service.get_context_for_topic(
                 topic=query,
                 course_id=course_id
             )
@@ -23,35 +25,18 @@ class ChatService:
             return ""
     
     
-    async def send_message(
-        self,
-        chapter_id: str,
-        message: str
-    ) -> ChatResponse:
+    async def _prepare_message(self, chapter_id: str, message: str) -> tuple[str, dict]:
+        """Load what the chat agent needs; returns the course language and agent kwargs."""
         messages_col = MongoDB.chat_messages()
 
-        chapter = await get_chapter_or_404(chapter_id)
+        chapter = await get_chapter_or_404(chapter_id, projection=CHAPTER_TEXT_PROJECTION)
 
         course_id = chapter.get("course_id", "")
         language = await get_course_language(course_id)
 
         rag_context = await self.get_rag_context(course_id, message)
 
-        enhanced_content = chapter.get("content", "")
-
-        if not enhanced_content and "sections" in chapter:
-            sections = chapter.get("sections", [])
-            content_parts = []
-            for section in sections:
-                if section.get("title"):
-                    content_parts.append(f"## {section['title']}")
-                if section.get("paragraphs"):
-                    content_parts.extend(section["paragraphs"])
-                if section.get("bullets"):
-                    content_parts.extend([f"- {b}" for b in section["bullets"]])
-                if section.get("tip"):
-                    content_parts.append(f"Tip: {section['tip']}")
-            enhanced_content = "\n\n".join(content_parts)
+        enhanced_content = await get_chapter_markdown(chapter)
 
         if rag_context:
             enhanced_content = f"{enhanced_content}\n\nRelated Course Context:\n{rag_context}"
@@ -68,20 +53,16 @@ class ChatService:
             })
         chat_history.reverse()
 
-        chat_agent = get_chat_agent()
-        
-        response = await chat_agent.respond(
-            message=message,
-            chapter_title=chapter.get("title", ""),
-            chapter_summary=chapter.get("summary", ""),
-            chapter_content=enhanced_content,
-            chat_history=chat_history
-        )
+        return language, {
+            "message": message,
+            "chapter_title": chapter.get("title", ""),
+            "chapter_summary": chapter.get("summary", ""),
+            "chapter_content": enhanced_content,
+            "chat_history": chat_history,
+        }
 
-        response_text = response.response
-        if language != "en":
-            translator = get_translation_service()
-            response_text = await translator.translate(response_text, language)
+    async def _save_exchange(self, chapter_id: str, message: str, response_text: str) -> tuple[str, datetime]:
+        messages_col = MongoDB.chat_messages()
 
         now = datetime.utcnow()
         await messages_col.insert_one({
@@ -91,14 +72,51 @@ class ChatService:
             "timestamp": now
         })
 
-        await messages_col.insert_one({
+        result = await messages_col.insert_one({
             "chapter_id": chapter_id,
             "role": "assistant",
             "content": response_text,
             "timestamp": now
         })
+        return str(result.inserted_id), now
+
+    async def send_message(
+        self,
+        chapter_id: str,
+        message: str
+    ) -> ChatResponse:
+        language, agent_kwargs = await self._prepare_message(chapter_id, message)
+
+        chat_agent = get_chat_agent()
+        
+        response = await chat_agent.respond(**agent_kwargs)
+
+        response_text = response.response
+        if language != "en":
+            translator = get_translation_service()
+            response_text = await translator.translate(response_text, language)
+
+        _, now = await self._save_exchange(chapter_id, message, response_text)
         
         return ChatResponse(message=response_text, timestamp=now)
+
+    async def stream_message(
+        self,
+        chapter_id: str,
+        message: str
+    ) -> AsyncIterator[str]:
+        """SSE events for a chat reply; the exchange is saved once the reply completes."""
+        language, agent_kwargs = await self._prepare_message(chapter_id, message)
+
+        chunks = get_chat_agent().stream_respond(**agent_kwargs)
+        if language != "en":
+            chunks = get_translation_service().translate_stream(chunks, language)
+
+        async def save(response_text: str) -> dict:
+            message_id, now = await self._save_exchange(chapter_id, message, response_text)
+            return {"message_id": message_id, "timestamp": now}
+
+        return stream_chat_events(chunks, on_complete=save)
     
     async def get_history(
         self,
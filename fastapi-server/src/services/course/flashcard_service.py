@@ -2,6 +2,7 @@ from bson import ObjectId
 from fastapi import HTTPException
 
 from src.db.mongodb import MongoDB
+from src.db.chapters import CHAPTER_TEXT_PROJECTION, get_chapter_markdown
 from src.db.helpers import get_chapter_or_404, get_course_language
 from src.utils.translation import get_translation_service
 from src.agents.course.flashcard import get_flashcard_agent
@@ -13,28 +14,14 @@ async def generate_chapter_flashcards(
     flashcard_type: str = "testing",
     difficulty: str = "intermediate"
 ) -> str:
-    chapter = await get_chapter_or_404(chapter_id)
+    chapter = await get_chapter_or_404(chapter_id, projection=CHAPTER_TEXT_PROJECTION)
 
     course_id = chapter.get("course_id", "")
     language = await get_course_language(course_id)
 
-    chapter_content = chapter.get("content", "")
+    chapter_content = await get_chapter_markdown(chapter)
     chapter_title = chapter.get("title", "Untitled Chapter")
     
-    if not chapter_content and "sections" in chapter:
-        sections = chapter.get("sections", [])
-        content_parts = []
-        for section in sections:
-            if section.get("title"):
-                content_parts.append(f"## {section['title']}")
-            if section.get("paragraphs"):
-                content_parts.extend(section["paragraphs"])
-            if section.get("bullets"):
-                content_parts.extend([f"- {b}" for b in section["bullets"]])
-            if section.get("tip"):
-                content_parts.append(f"TIP: {section['tip']}")
-        chapter_content = "\n\n".join(content_parts)
-    
     if not chapter_content:
         raise HTTPException(status_code=400, detail="Chapter has no content to generate flashcards from")
 
@@ -80,7 +67,7 @@ async def generate_course_flashcards(
     course_title = course.get("title", "Course")
 
     chapters = MongoDB.chapters()
-    cursor = chapters.find({"course_id": course_id}).sort("index", 1)
+    cursor = chapters.find({"course_id": course_id}, CHAPTER_TEXT_PROJECTION).sort("index", 1)
     
     chapter_list = []
     async for chapter in cursor:
@@ -96,21 +83,7 @@ async def generate_course_flashcards(
 
     for chapter in chapter_list:
         chapter_title = chapter.get("title", "")
-        chapter_content = chapter.get("content", "")
-
-        if not chapter_content and "sections" in chapter:
-            sections = chapter.get("sections", [])
-            content_parts = []
-            for section in sections:
-                if section.get("title"):
-                    content_parts.append(f"## {section['title']}")
-                if section.get("paragraphs"):
-                    content_parts.extend(section["paragraphs"])
-                if section.get("bullets"):
-                    content_parts.extend([f"- {b}" for b in section["bullets"]])
-                if section.get("tip"):
-                    content_parts.append(f"TIP: {section['tip']}")
-            chapter_content = "\n\n".join(content_parts)
+        chapter_content = await get_chapter_markdown(chapter)
         
         if not chapter_content:
             continue
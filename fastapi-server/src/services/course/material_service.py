@@ -4,8 +4,12 @@ from typing import Optional, Tuple
 
 from bson import ObjectId
 
-from src.db.mongodb import MongoDB, QUESTIONS_COLLECTION
+from src.db.mongodb import MongoDB
+from src.db.chapters import chapter_content_fields
+from src.db.questions import build_question_docs, insert_questions
 from src.utils.pdf import get_document_ai_service
+from src.utils.tokens import budget_share, truncate_to_tokens
+from src.utils.translation import COURSE_CONTENT_FIELDS
 from src.utils.video_transcription import get_video_intelligence_service
 from src.agents.course.graph_expansion import get_graph_expansion_agent
 from src.agents.course.content_writer import get_content_writer_agent
@@ -15,6 +19,9 @@ from src.models.course import MaterialUploadResponse, GraphExpansionPlan
 
 logger = logging.getLogger(__name__)
 
+# Share of the content writer's prompt budget given to the uploaded material
+REFERENCE_SHARE = 0.004
+
 
 class MaterialService:
     async def extract_content_from_file(
@@ -90,21 +97,18 @@ class MaterialService:
         
         for topic in expansion_plan.new_topics:
             status = "locked" if topic.connects_to else "unlocked"
-            
-            node_title = topic.title
-            node_summary = topic.summary
-            if translator:
-                node_title = await translator.translate(topic.title, course_language)
-                node_summary = await translator.translate(topic.summary, course_language)
 
             new_nodes.append({
                 "id": topic.id,
-                "title": node_title,
-                "summary": node_summary,
+                "title": topic.title,
+                "summary": topic.summary,
                 "learning_objectives": topic.learning_objectives,
                 "time_minutes": topic.time_minutes,
                 "status": status
             })
+
+        if translator:
+            await translator.translate_fields(new_nodes, frozenset({"title", "summary"}), course_language)
         
         new_edges = []
         for edge in expansion_plan.new_edges:
@@ -143,6 +147,10 @@ class MaterialService:
         content_writer = get_content_writer_agent()
         course_language = course.get("language", "en")
 
+        reference_context = truncate_to_tokens(
+            extracted_text, budget_share(REFERENCE_SHARE, content_writer.llm.model_name)
+        )
+
         for i, topic in enumerate(expansion_plan.new_topics):
             content_result = await content_writer.generate_content(
                 title=topic.title,
@@ -150,59 +158,51 @@ class MaterialService:
                 learning_objectives=topic.learning_objectives,
                 difficulty=course.get("difficulty", "intermediate"),
                 time_minutes=topic.time_minutes,
-                context=extracted_text[:2000]
+                context=reference_context
             )
 
             sections = [section.model_dump() for section in content_result.sections]
             key_takeaways = content_result.key_takeaways
             
             # Translate content if course language is not English
-            if course_language and course_language != "en":
-                from src.utils.translation import get_translation_service
-                translator = get_translation_service()
-                
-                for section in sections:
-                    if section.get("title"):
-                        section["title"] = await translator.translate(section["title"], course_language)
-                    if section.get("paragraphs"):
-                        section["paragraphs"] = await translator.translate_batch(section["paragraphs"], course_language)
-                    if section.get("bullets"):
-                        section["bullets"] = await translator.translate_batch(section["bullets"], course_language)
-                    if section.get("tip"):
-                        section["tip"] = await translator.translate(section["tip"], course_language)
-                
-                key_takeaways = await translator.translate_batch(key_takeaways, course_language)
+            chapter_title = topic.title
+            chapter_summary = topic.summary
+            if translator:
+                translated = await translator.translate_fields(
+                    {
+                        "title": chapter_title,
+                        "summary": chapter_summary,
+                        "sections": sections,
+                        "key_takeaways": list(key_takeaways),
+                    },
+                    COURSE_CONTENT_FIELDS,
+                    course_language
+                )
+                chapter_title = translated["title"]
+                chapter_summary = translated["summary"]
+                key_takeaways = translated["key_takeaways"]
             
             image_prompts = content_result.image_prompts
             chapter_images = []
             if image_prompts:
                 try:
                     from src.utils.image_gen import get_image_gen_service
-                    from google.cloud import storage
-                    import base64
+                    from src.utils.blob_store import get_blob_store
 
                     image_service = get_image_gen_service()
 
                     if image_service.is_available():
-                        from src.config.settings import settings
-                        storage_client = storage.Client() if settings.gcp_bucket_name else None
+                        blob_store = get_blob_store()
 
                         for j, prompt in enumerate(image_prompts[:3]):  # Max 3 images per chapter
                             try:
                                 image_bytes = await image_service.generate_image(prompt, style="educational")
-
-                                image_url = ""
-                                if storage_client and settings.gcp_bucket_name:
-                                    bucket = storage_client.bucket(settings.gcp_bucket_name)
-                                    blob_name = f"chapters/{course_id}/{len(existing_nodes) + i}_{j}.png"
-                                    blob = bucket.blob(blob_name)
-                                    blob.upload_from_string(image_bytes, content_type="image/png")
-                                    image_url = blob.public_url
-                                    chapter_images.append(image_url)
-                                else:
-                                    image_b64 = base64.b64encode(image_bytes).decode('utf-8')
-                                    image_url = f"data:image/png;base64,{image_b64}"
-                                    chapter_images.append(image_url)
+                                image_url = await blob_store.put(
+                                    f"chapters/{course_id}/{len(existing_nodes) + i}_{j}.png",
+                                    image_bytes,
+                                    "image/png"
+                                )
+                                chapter_images.append(image_url)
 
                             except Exception as img_err:
                                 logger.warning(f"  Image generation failed for {topic.title}: {img_err}")
@@ -224,13 +224,13 @@ class MaterialService:
                     try:
                         diagram_result = await diagram_agent.generate_diagram(
                             title=f"{section.get('title', 'Diagram')} for {topic.title}",
-                            description=f"Process flow for: {text_content[:200]}...",
+                            description=f"Process flow for: {truncate_to_tokens(text_content, 50)}...",
                             data={
                                 "course_title": course.get("title", ""),
                                 "chapter_title": topic.title,
                                 "section_content": text_content
                             },
-                            context=extracted_text[:2000]
+                            context=reference_context
                         )
 
                         if diagram_result.get("success", False):
@@ -245,13 +245,13 @@ class MaterialService:
                     try:
                         diagram_result = await diagram_agent.generate_diagram(
                             title=f"{section.get('title', 'Diagram')} for {topic.title}",
-                            description=f"Comparison chart for: {text_content[:200]}...",
+                            description=f"Comparison chart for: {truncate_to_tokens(text_content, 50)}...",
                             data={
                                 "course_title": course.get("title", ""),
                                 "chapter_title": topic.title,
                                 "section_content": text_content
                             },
-                            context=extracted_text[:2000]
+                            context=reference_context
                         )
 
                         if diagram_result.get("success", False):
@@ -266,13 +266,13 @@ class MaterialService:
                     try:
                         diagram_result = await diagram_agent.generate_diagram(
                             title=f"{section.get('title', 'Diagram')} for {topic.title}",
-                            description=f"Structure diagram for: {text_content[:200]}...",
+                            description=f"Structure diagram for: {truncate_to_tokens(text_content, 50)}...",
                             data={
                                 "course_title": course.get("title", ""),
                                 "chapter_title": topic.title,
                                 "section_content": text_content
                             },
-                            context=extracted_text[:2000]
+                            context=reference_context
                         )
 
                         if diagram_result.get("success", False):
@@ -288,15 +288,6 @@ class MaterialService:
 
                 processed_sections.append(section)
 
-            # Translate topic title and summary for chapter doc
-            chapter_title = topic.title
-            chapter_summary = topic.summary
-            if course_language and course_language != "en":
-                from src.utils.translation import get_translation_service
-                translator = get_translation_service()
-                chapter_title = await translator.translate(topic.title, course_language)
-                chapter_summary = await translator.translate(topic.summary, course_language)
-
             chapter_doc = {
                 "course_id": course_id,
                 "node_id": topic.id,
@@ -304,6 +295,7 @@ class MaterialService:
                 "title": chapter_title,
                 "summary": chapter_summary,
                 "sections": processed_sections,
+                **chapter_content_fields(processed_sections),
                 "images": chapter_images,
                 "image_url": chapter_images[0] if chapter_images else None,
                 "time_minutes": topic.time_minutes,
@@ -317,57 +309,20 @@ class MaterialService:
             # Generate quiz questions for this chapter
             try:
                 tester = get_tester_agent()
-                chapter_content = ""
-                for section in processed_sections:
-                    chapter_content += f"## {section.get('title', '')}\n\n"
-                    for p in section.get('paragraphs', []):
-                        chapter_content += f"{p}\n\n"
-                    for b in section.get('bullets', []):
-                        chapter_content += f"- {b}\n"
-                    if section.get('tip'):
-                        chapter_content += f"> Tip: {section['tip']}\n\n"
-
                 quiz_result = await tester.generate_questions(
                     title=topic.title,
                     summary=topic.summary,
-                    content=chapter_content,
+                    content=chapter_doc["content_markdown"],
                     num_mcq=3,
                     num_open_text=2
                 )
 
                 if quiz_result:
-                    questions_col = MongoDB.get_collection(QUESTIONS_COLLECTION)
-                    mcq_count = 0
-                    ot_count = 0
-                    
-                    if quiz_result.mcq_questions:
-                        for mcq in quiz_result.mcq_questions:
-                            question_doc = {
-                                "chapter_id": chapter_id,
-                                "question_type": "mcq",
-                                "question_text": mcq.question_text,
-                                "options": [{"key": opt.key, "text": opt.text} for opt in mcq.options],
-                                "correct_answer": mcq.correct_answer,
-                                "explanation": mcq.explanation,
-                                "created_at": datetime.utcnow(),
-                            }
-                            await questions_col.insert_one(question_doc)
-                            mcq_count += 1
-
-                    if quiz_result.open_text_questions:
-                        for ot in quiz_result.open_text_questions:
-                            question_doc = {
-                                "chapter_id": chapter_id,
-                                "question_type": "open_text",
-                                "question_text": ot.question_text,
-                                "expected_answer": ot.expected_answer,
-                                "grading_criteria": ot.grading_criteria,
-                                "created_at": datetime.utcnow(),
-                            }
-                            await questions_col.insert_one(question_doc)
-                            ot_count += 1
-                    
-                    logger.info(f"Generated {mcq_count} MCQ + {ot_count} open-text questions for {topic.title}")
+                    await insert_questions(build_question_docs(chapter_id, quiz_result))
+                    logger.info(
+                        f"Generated {len(quiz_result.mcq_questions)} MCQ + "
+                        f"{len(quiz_result.open_text_questions)} open-text questions for {topic.title}"
+                    )
             except Exception as quiz_err:
                 logger.warning(f"Quiz generation failed for {topic.title}: {quiz_err}")
         
@@ -4,6 +4,7 @@ from bson import ObjectId
 from fastapi import HTTPException
 
 from src.db.mongodb import MongoDB
+from src.db.chapters import CHAPTER_TEXT_PROJECTION, get_chapter_markdown
 from src.db.helpers import get_chapter_or_404, get_course_language
 from src.utils.translation import get_translation_service
 from src.agents.course.slides import get_slide_agent
@@ -93,7 +94,7 @@ async def generate_chapter_slides(
         if cached:
             return cached
 
-    chapter = await get_chapter_or_404(chapter_id)
+    chapter = await get_chapter_or_404(chapter_id, projection=CHAPTER_TEXT_PROJECTION)
 
     course_id = chapter.get("course_id", "")
     language = await get_course_language(course_id)
@@ -104,20 +105,7 @@ async def generate_chapter_slides(
     if not learning_objectives:
         learning_objectives = chapter.get("key_takeaways", ["Understand the topic"])
 
-    chapter_content = chapter.get("content", "")
-    if not chapter_content and "sections" in chapter:
-        sections = chapter.get("sections", [])
-        content_parts = []
-        for section in sections:
-            if section.get("title"):
-                content_parts.append(f"## {section['title']}")
-            if section.get("paragraphs"):
-                content_parts.extend(section["paragraphs"])
-            if section.get("bullets"):
-                content_parts.extend([f"- {b}" for b in section["bullets"]])
-            if section.get("tip"):
-                content_parts.append(f"TIP: {section['tip']}")
-        chapter_content = "\n\n".join(content_parts)
+    chapter_content = await get_chapter_markdown(chapter)
 
     result = await agent.generate_slides(
         title=chapter.get("title", ""),
@@ -176,29 +164,15 @@ async def generate_course_slides(
     course_description = course.get("description", "")
 
     chapters_col = MongoDB.chapters()
-    cursor = chapters_col.find({"course_id": course_id}).sort("index", 1)
+    cursor = chapters_col.find({"course_id": course_id}, CHAPTER_TEXT_PROJECTION).sort("index", 1)
 
     all_objectives = []
     combined_content = []
     
     async for chapter in cursor:
         chapter_title = chapter.get("title", "")
-        chapter_content = chapter.get("content", "")
+        chapter_content = await get_chapter_markdown(chapter)
         objectives = chapter.get("learning_objectives", []) or chapter.get("key_takeaways", [])
-        
-        if not chapter_content and "sections" in chapter:
-            sections = chapter.get("sections", [])
-            content_parts = []
-            for section in sections:
-                if section.get("title"):
-                    content_parts.append(f"## {section['title']}")
-                if section.get("paragraphs"):
-                    content_parts.extend(section["paragraphs"])
-                if section.get("bullets"):
-                    content_parts.extend([f"- {b}" for b in section["bullets"]])
-                if section.get("tip"):
-                    content_parts.append(f"TIP: {section['tip']}")
-            chapter_content = "\n\n".join(content_parts)
 
         if chapter_content:
             combined_content.append(f"# {chapter_title}\n\n{chapter_content}")
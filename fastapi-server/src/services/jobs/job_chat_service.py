@@ -1,9 +1,10 @@
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 from bson import ObjectId
 
 from src.utils.llm import LLMService, get_llm_service
 from src.db.mongodb import MongoDB
+from src.utils.sse import stream_chat_events
 
 class JobChatService:
     def __init__(self):
@@ -194,15 +195,15 @@ Guidelines:
 Keep response under 200 words unless detailed analysis is requested.
 """
 
-    async def send_message(
+    async def _build_prompts(
         self,
         search_id: str,
         message: str,
         chat_history: List[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
+    ) -> Optional[tuple[str, str]]:
         search_data = await self._get_search_context(search_id, message)
         if not search_data:
-            return {"message": "Context not found. Please try a new search."}
+            return None
 
         context_str = self._build_context_string(search_data)
         system_prompt = self._get_system_prompt(context_str)
@@ -214,6 +215,18 @@ Keep response under 200 words unless detailed analysis is requested.
                 messages += f"{role}: {msg.get('content')}\n"
         
         prompt = f"{messages}\nUser: {message}\nAssistant:"
+        return system_prompt, prompt
+
+    async def send_message(
+        self,
+        search_id: str,
+        message: str,
+        chat_history: List[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        prompts = await self._build_prompts(search_id, message, chat_history)
+        if not prompts:
+            return {"message": "Context not found. Please try a new search."}
+        system_prompt, prompt = prompts
 
         response = await self.llm.generate(
             prompt=prompt,
@@ -226,6 +239,26 @@ Keep response under 200 words unless detailed analysis is requested.
         }
 
 
+    async def stream_message(
+        self,
+        search_id: str,
+        message: str,
+        chat_history: List[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
+        prompts = await self._build_prompts(search_id, message, chat_history)
+        if not prompts:
+            raise ValueError("Context not found. Please try a new search.")
+        system_prompt, prompt = prompts
+
+        async def finish(_: str) -> dict:
+            return {"timestamp": datetime.utcnow().isoformat()}
+
+        return stream_chat_events(
+            self.llm.stream(prompt=prompt, system_prompt=system_prompt),
+            on_complete=finish
+        )
+
+
 _job_chat_service = None
 
 def get_job_chat_service() -> JobChatService:
@@ -17,6 +17,10 @@ from src.models.jobs.schemas import (
 )
 
 
+# Share of the model's prompt budget given to a job description when enriching it
+ENRICHMENT_DESCRIPTION_SHARE = 0.006
+
+
 class JobDiscoveryService:
     async def parse_resume(self, file_content: bytes) -> ResumeParseResult:
         resume_agent = get_resume_agent()
@@ -171,6 +175,7 @@ class JobDiscoveryService:
     
     async def enrich_job(self, job_id: str) -> dict:
         from src.utils.llm import get_llm_service
+        from src.utils.tokens import budget_share, truncate_to_tokens
         from src.prompts.jobs.enrichment_prompts import ENRICHMENT_SYSTEM_PROMPT, ENRICHMENT_USER_PROMPT
         from src.models.jobs.schemas import JobEnrichmentResponse
 
@@ -212,14 +217,15 @@ class JobDiscoveryService:
             title=job.get("title", ""),
             company=job.get("company", ""),
             location=job.get("location", ""),
-            description=job.get("description", "")[:3000],
+            description=truncate_to_tokens(job.get("description", ""), budget_share(ENRICHMENT_DESCRIPTION_SHARE, llm.model_name)),
             profile_summary=profile_summary
         )
         
         result = await llm.generate_structured(
             prompt=prompt,
             output_schema=JobEnrichmentResponse,
-            system_prompt=ENRICHMENT_SYSTEM_PROMPT
+            system_prompt=ENRICHMENT_SYSTEM_PROMPT,
+            cache=True
         )
 
         enrichment_data = {
@@ -1,37 +1,16 @@
 from typing import List, Optional, Dict
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-import chromadb.utils.embedding_functions as ef
 
-from src.config.settings import settings
+from src.utils.tokens import truncate_to_tokens
+from src.utils.vector_store import get_vector_store
+
+
+# Job descriptions are cut to this before embedding
+DESCRIPTION_TOKENS = 125
 
 
 class JobVectorService:
     def __init__(self):
-        self.embedding_fn = None
-        if settings.google_cloud_api:
-            self.embedding_fn = ef.GoogleGenerativeAiEmbeddingFunction(
-                api_key=settings.google_cloud_api,
-                model_name="gemini-embedding-001"
-            )
-        
-        if settings.chroma_api_key and settings.chroma_tenant and settings.chroma_database:
-            self.client = chromadb.HttpClient(
-                host="api.trychroma.com",
-                ssl=True,
-                headers={
-                    "x-chroma-token": settings.chroma_api_key,
-                },
-                tenant=settings.chroma_tenant,
-                database=settings.chroma_database
-            )
-            print(f"Job Vector: Connected to Chroma Cloud")
-        else:
-            self.client = chromadb.Client(ChromaSettings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            ))
-            print("Job Vector: Using local Chroma (in-memory)")
+        self.store = get_vector_store()
     
     async def index_jobs(
         self,
@@ -43,16 +22,10 @@ class JobVectorService:
 
         if recreate:
             try:
-                self.client.delete_collection(name=collection_name)
+                await self.store.drop(collection_name)
             except:
                 pass  
 
-        collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"search_id": search_id},
-            embedding_function=self.embedding_fn
-        )
-
         documents = []
         metadatas = []
         ids = []
@@ -63,7 +36,7 @@ class JobVectorService:
             company = job.get("company", "Unknown")
             location = job.get("location", "")
             location_type = job.get("location_type", "onsite")
-            description = job.get("description", "")[:500]  
+            description = truncate_to_tokens(job.get("description", ""), DESCRIPTION_TOKENS)
             match_score = job.get("match_score", 0)
             matching_skills = job.get("matching_skills", [])
             salary_min = job.get("salary_min")
@@ -96,10 +69,12 @@ class JobVectorService:
             ids.append(job_id)
 
         if documents:
-            collection.add(
+            await self.store.add(
+                collection_name,
+                ids=ids,
                 documents=documents,
                 metadatas=metadatas,
-                ids=ids
+                collection_metadata={"search_id": search_id}
             )
             print(f"📊 Indexed {len(documents)} jobs to Chroma for search {search_id[:8]}...")
         
@@ -114,9 +89,7 @@ class JobVectorService:
     ) -> List[str]:
         collection_name = f"job_search_{search_id}"
         
-        try:
-            collection = self.client.get_collection(name=collection_name, embedding_function=self.embedding_fn)
-        except:
+        if not await self.store.has_collection(collection_name):
             print(f"Collection not found for search {search_id}")
             return []
 
@@ -124,15 +97,9 @@ class JobVectorService:
         if filter_remote is not None:
             where_filter = {"location_type": "remote" if filter_remote else "onsite"}
 
-        results = collection.query(
-            query_texts=[query],
-            n_results=n_results,
-            where=where_filter
-        )
+        hits = await self.store.query(collection_name, query, n_results=n_results, where=where_filter)
 
-        job_ids = []
-        if results["ids"] and results["ids"][0]:
-            job_ids = results["ids"][0]
+        job_ids = [hit["id"] for hit in hits]
         
         print(f"Chroma returned {len(job_ids)} relevant jobs for query: '{query[:50]}...'")
         return job_ids
@@ -140,7 +107,7 @@ class JobVectorService:
     async def delete_search(self, search_id: str) -> bool:
         collection_name = f"job_search_{search_id}"
         try:
-            self.client.delete_collection(name=collection_name)
+            await self.store.drop(collection_name)
             return True
         except:
             return False
@@ -155,20 +122,16 @@ class JobVectorService:
         scores = {}
         
         try:
-            collection = self.client.get_collection(name=collection_name, embedding_function=self.embedding_fn)
-            
-            results = collection.query(
-                query_texts=[candidate_profile],
-                n_results=min(len(job_ids), 100),
-                include=["distances"]
+            hits = await self.store.query(
+                collection_name,
+                candidate_profile,
+                n_results=min(len(job_ids), 100)
             )
             
-            if results["ids"] and results["distances"]:
-                for i, job_id in enumerate(results["ids"][0]):
-                    if job_id in job_ids:
-                        distance = results["distances"][0][i]
-                        similarity = 1 / (1 + distance)
-                        scores[job_id] = round(similarity, 3)
+            for hit in hits:
+                if hit["id"] in job_ids:
+                    similarity = 1 / (1 + hit["distance"])
+                    scores[hit["id"]] = round(similarity, 3)
 
             for job_id in job_ids:
                 if job_id not in scores:
@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any
 
 from src.utils.llm import LLMService
+from src.utils.sse import stream_chat_events
 from src.services.roadmap.roadmap_service import get_roadmap_service
 
 
@@ -61,12 +62,12 @@ Instructions:
 
 Keep responses focused, helpful, and under 300 words unless a detailed explanation is specifically requested."""
 
-    async def send_message(
+    async def _build_prompts(
         self,
         roadmap_id: str,
         message: str,
         chat_history: List[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
+    ) -> tuple[str, str]:
         roadmap = await self.roadmap_service.get_roadmap(roadmap_id)
 
         roadmap_context = self._build_roadmap_context(roadmap)
@@ -81,6 +82,15 @@ Keep responses focused, helpful, and under 300 words unless a detailed explanati
         
         conversation += f"User: {message}\n"
         conversation += "Assistant:"
+        return system_prompt, conversation
+
+    async def send_message(
+        self,
+        roadmap_id: str,
+        message: str,
+        chat_history: List[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        system_prompt, conversation = await self._build_prompts(roadmap_id, message, chat_history)
 
         response = await self.llm.generate(
             prompt=conversation,
@@ -91,6 +101,22 @@ Keep responses focused, helpful, and under 300 words unless a detailed explanati
             "message": response.strip(),
             "timestamp": datetime.utcnow().isoformat()
         }
+
+    async def stream_message(
+        self,
+        roadmap_id: str,
+        message: str,
+        chat_history: List[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
+        system_prompt, conversation = await self._build_prompts(roadmap_id, message, chat_history)
+
+        async def finish(_: str) -> dict:
+            return {"timestamp": datetime.utcnow().isoformat()}
+
+        return stream_chat_events(
+            self.llm.stream(prompt=conversation, system_prompt=system_prompt),
+            on_complete=finish
+        )
     
     def get_suggested_questions(self, roadmap: Dict[str, Any]) -> List[str]:
         nodes = roadmap.get("nodes", [])
@@ -2,11 +2,12 @@ import re
 import os
 import uuid
 import logging
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional, List
 from pathlib import Path
 from bson import ObjectId
 
+from src.config.settings import settings
 from src.db.mongodb import MongoDB
 from src.agents.video_assistant.video_assistant_agent import get_video_assistant_agent
 from src.agents.video_assistant.teach_back_agent import get_teach_back_agent
@@ -14,7 +15,9 @@ from src.utils.youtube import get_youtube_transcript_service, fetch_youtube_titl
 from src.utils.video_transcription import get_video_intelligence_service
 from src.utils.youtube import extract_youtube_id
 from src.utils.time import format_time
+from src.utils.transcript_windows import merge_into_windows
 from src.utils.vector import get_vector_service
+from src.utils.sse import stream_chat_events
 
 UPLOADS_DIR = Path(__file__).parent.parent.parent.parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
@@ -38,6 +41,14 @@ class VideoAssistantService:
 
         existing = await MongoDB.video_library().find_one({"source_id": youtube_id})
         if existing:
+            if existing.get("status") == "failed" or self._index_stalled(existing):
+                await get_vector_service().delete_video_segments(str(existing["_id"]))
+                cursor = MongoDB.video_segments().find({"video_id": str(existing["_id"])}).sort("index", 1)
+                existing["indexed_segments"], existing["total_segments"] = await self._index_segments(
+                    str(existing["_id"]), await cursor.to_list(length=None)
+                )
+                existing["status"] = "ready"
+
             segment_count = await MongoDB.video_segments().count_documents(
                 {"video_id": str(existing["_id"])}
             )
@@ -51,6 +62,9 @@ class VideoAssistantService:
                 "segment_count": segment_count,
                 "has_summary": existing.get("summary") is not None,
                 "has_chapters": existing.get("chapters") is not None,
+                "status": existing.get("status", "ready"),
+                "indexed_segments": existing.get("indexed_segments"),
+                "total_segments": existing.get("total_segments"),
                 "created_at": existing.get("created_at", datetime.utcnow()),
             }
 
@@ -84,6 +98,8 @@ class VideoAssistantService:
             "language": language,
             "summary": None,
             "chapters": None,
+            "status": "indexing",
+            "indexed_segments": 0,
             "user_id": user_id,
             "created_at": datetime.utcnow(),
         }
@@ -106,8 +122,7 @@ class VideoAssistantService:
         if segment_docs:
             await MongoDB.video_segments().insert_many(segment_docs)
 
-            vector_service = get_vector_service()
-            await vector_service.add_video_segments(video_id, segment_docs)
+        indexed, total = await self._index_segments(video_id, segment_docs)
 
         logger.info(
             f"Added video {youtube_id} with {len(segment_docs)} segments (embedded in Chroma)"
@@ -123,9 +138,60 @@ class VideoAssistantService:
             "segment_count": len(segment_docs),
             "has_summary": False,
             "has_chapters": False,
+            "status": "ready",
+            "indexed_segments": indexed,
+            "total_segments": total,
             "created_at": video_doc["created_at"],
         }
 
+    @staticmethod
+    def _index_stalled(video: dict) -> bool:
+        """True for an "indexing" entry whose ingest stopped reporting progress (e.g. the process died)."""
+        if video.get("status") != "indexing":
+            return False
+        last_progress = video.get("updated_at") or video.get("created_at")
+        if last_progress is None:
+            return True
+        return datetime.utcnow() - last_progress > timedelta(seconds=settings.video_index_lease_seconds)
+
+    async def _index_segments(self, video_id: str, segment_docs: list) -> tuple[int, int]:
+        """Embed a video's transcript into the vector store, tracking progress on its video_library entry.
+
+        Snippets are merged into overlapping token windows first; the raw
+        snippets stay in video_segments for timestamp display. Returns
+        (indexed windows, total windows).
+        """
+        windows = merge_into_windows(segment_docs)
+        video_filter = {"_id": ObjectId(video_id)}
+
+        async def report(indexed: int, total: int) -> None:
+            await MongoDB.video_library().update_one(
+                video_filter,
+                {"$set": {"indexed_segments": indexed, "total_segments": total, "updated_at": datetime.utcnow()}}
+            )
+
+        await MongoDB.video_library().update_one(
+            video_filter,
+            {"$set": {
+                "status": "indexing",
+                "indexed_segments": 0,
+                "total_segments": len(windows),
+                "updated_at": datetime.utcnow(),
+            }}
+        )
+        try:
+            indexed = await get_vector_service().add_video_segments(video_id, windows, on_progress=report)
+        except Exception as e:
+            await MongoDB.video_library().update_one(
+                video_filter, {"$set": {"status": "failed", "index_error": str(e), "updated_at": datetime.utcnow()}}
+            )
+            raise
+
+        await MongoDB.video_library().update_one(
+            video_filter, {"$set": {"status": "ready", "updated_at": datetime.utcnow()}, "$unset": {"index_error": ""}}
+        )
+        return indexed, len(windows)
+
     async def upload_video(
         self, file, title: str, language: str = "en-US", user_id: str = None
     ):
@@ -179,6 +245,8 @@ class VideoAssistantService:
             "language": language,
             "summary": None,
             "chapters": None,
+            "status": "indexing",
+            "indexed_segments": 0,
             "user_id": user_id,
             "created_at": datetime.utcnow(),
         }
@@ -211,8 +279,7 @@ class VideoAssistantService:
         if segment_docs:
             await MongoDB.video_segments().insert_many(segment_docs)
 
-            vector_service = get_vector_service()
-            await vector_service.add_video_segments(video_id, segment_docs)
+        indexed, total = await self._index_segments(video_id, segment_docs)
 
         logger.info(
             f"Uploaded video {file_id} with {len(segment_docs)} segments (embedded in Chroma)"
@@ -229,6 +296,9 @@ class VideoAssistantService:
             "segment_count": len(segment_docs),
             "has_summary": False,
             "has_chapters": False,
+            "status": "ready",
+            "indexed_segments": indexed,
+            "total_segments": total,
             "created_at": video_doc["created_at"],
         }
 
@@ -260,6 +330,9 @@ class VideoAssistantService:
             "segment_count": segment_count,
             "has_summary": video.get("summary") is not None,
             "has_chapters": video.get("chapters") is not None,
+            "status": video.get("status", "ready"),
+            "indexed_segments": video.get("indexed_segments"),
+            "total_segments": video.get("total_segments"),
             "created_at": video.get("created_at", datetime.utcnow()),
         }
 
@@ -294,15 +367,19 @@ class VideoAssistantService:
                     "segment_count": segment_count,
                     "has_summary": video.get("summary") is not None,
                     "has_chapters": video.get("chapters") is not None,
+                    "status": video.get("status", "ready"),
+                    "indexed_segments": video.get("indexed_segments"),
+                    "total_segments": video.get("total_segments"),
                     "created_at": video.get("created_at", datetime.utcnow()),
                 }
             )
 
         return videos
 
-    async def ask_question(
+    async def _prepare_question(
         self, video_id: str, question: str, current_time: float = None, for_note: bool = False
-    ):
+    ) -> tuple[dict, list, str, list]:
+        """Pick how to answer a question. Returns (video, segments, mode, context_segments)."""
         try:
             video = await MongoDB.video_library().find_one({"_id": ObjectId(video_id)})
         except Exception:
@@ -349,46 +426,28 @@ class VideoAssistantService:
 
         # Note requests take priority - always use detailed prompt with full transcript
         if is_note_request:
-            context_segments = segments
-            result = await self.agent.answer_for_note(
-                question=question,
-                context_segments=context_segments,
-                video_title=video.get("title", ""),
-            )
-        elif is_summary_request:
-            context_segments = segments
-            result = await self.agent.answer_question(
-                question=question,
-                context_segments=context_segments,
-                video_title=video.get("title", ""),
-            )
-        elif is_time_aware and current_time is not None:
-            result = await self.agent.answer_time_aware(
-                question=question,
-                segments=segments,
-                current_time=current_time,
-                video_title=video.get("title", ""),
-            )
-        else:
-            vector_service = get_vector_service()
-            context_segments = await vector_service.query_video_segments(
-                video_id=video_id, query=question, n_results=20
-            )
+            return video, segments, "note", segments
+        if is_summary_request:
+            return video, segments, "qa", segments
+        if is_time_aware and current_time is not None:
+            return video, segments, "time_aware", segments
 
-            if not context_segments:
-                logger.info(
-                    f"[ask_question] Chroma returned no results, falling back to MongoDB segments"
-                )
-                context_segments = segments[:30]
+        vector_service = get_vector_service()
+        context_segments = await vector_service.query_video_segments(
+            video_id=video_id, query=question, n_results=settings.video_qa_windows
+        )
 
-            result = await self.agent.answer_question(
-                question=question,
-                context_segments=context_segments,
-                video_title=video.get("title", ""),
+        if not context_segments:
+            logger.info(
+                f"[ask_question] Vector search returned no results, falling back to the opening transcript windows"
             )
+            context_segments = merge_into_windows(segments)[:settings.video_qa_windows]
+
+        return video, segments, "qa", context_segments
 
+    def _format_timestamps(self, timestamps: list, segments: list) -> list:
         formatted_timestamps = []
-        for ts in result.timestamps:
+        for ts in timestamps:
             seg_text = ""
             for seg in segments:
                 if seg.get("start_time", 0) <= ts < seg.get("end_time", 0):
@@ -398,13 +457,70 @@ class VideoAssistantService:
             formatted_timestamps.append(
                 {"seconds": ts, "formatted": format_time(ts), "text": seg_text}
             )
+        return formatted_timestamps
+
+    async def ask_question(
+        self, video_id: str, question: str, current_time: float = None, for_note: bool = False
+    ):
+        video, segments, mode, context_segments = await self._prepare_question(
+            video_id, question, current_time, for_note
+        )
+        video_title = video.get("title", "")
+
+        if mode == "note":
+            result = await self.agent.answer_for_note(
+                question=question,
+                context_segments=context_segments,
+                video_title=video_title,
+            )
+        elif mode == "time_aware":
+            result = await self.agent.answer_time_aware(
+                question=question,
+                segments=segments,
+                current_time=current_time,
+                video_title=video_title,
+            )
+        else:
+            result = await self.agent.answer_question(
+                question=question,
+                context_segments=context_segments,
+                video_title=video_title,
+            )
 
         return {
             "answer": result.answer,
             "confidence": result.confidence,
-            "timestamps": formatted_timestamps,
+            "timestamps": self._format_timestamps(result.timestamps, segments),
         }
 
+    async def stream_question(
+        self, video_id: str, question: str, current_time: float = None, for_note: bool = False
+    ) -> AsyncIterator[str]:
+        """SSE events for an answer. The question and answer are saved to the
+        video's chat history once the answer completes."""
+        video, segments, mode, context_segments = await self._prepare_question(
+            video_id, question, current_time, for_note
+        )
+        video_title = video.get("title", "")
+
+        if mode == "note":
+            request = self.agent.build_note_request(question, context_segments, video_title)
+        elif mode == "time_aware":
+            request = self.agent.build_time_aware_request(question, segments, current_time, video_title)
+        else:
+            request = self.agent.build_qa_request(question, context_segments, video_title)
+        prompt, system_prompt, timestamps = request
+        formatted_timestamps = self._format_timestamps(timestamps, segments)
+
+        async def save(answer: str) -> dict:
+            await self.save_chat_message(video_id, "user", question)
+            saved = await self.save_chat_message(
+                video_id, "assistant", answer, timestamps=formatted_timestamps
+            )
+            return {"message_id": saved["id"], "timestamps": formatted_timestamps}
+
+        return stream_chat_events(self.agent.stream_answer(prompt, system_prompt), on_complete=save)
+
     async def get_summary(self, video_id: str, regenerate: bool = False):
         try:
             video = await MongoDB.video_library().find_one({"_id": ObjectId(video_id)})
@@ -0,0 +1,117 @@
+import asyncio
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from src.config.settings import settings
+
+
+UPLOADS_DIR = Path(__file__).parent.parent.parent / "uploads"
+
+
+class LocalBlobStore:
+    """Stores blobs on disk under ``uploads/``, served by the ``/uploads`` mount."""
+
+    def __init__(self, base_dir: Path = UPLOADS_DIR):
+        self.base_dir = base_dir
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        path = (self.base_dir / key).resolve()
+        if not path.is_relative_to(self.base_dir.resolve()):
+            raise ValueError(f"Invalid blob key: {key}")
+        return path
+
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        path = self._path(key)
+
+        def _write():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+        await asyncio.to_thread(_write)
+        return f"{settings.public_base_url.rstrip('/')}/uploads/{key}"
+
+    async def delete_prefix(self, prefix: str) -> None:
+        path = self._path(prefix)
+        if path.is_dir():
+            await asyncio.to_thread(shutil.rmtree, path, True)
+
+
+class GCSBlobStore:
+    def __init__(self, bucket_name: str):
+        from google.cloud import storage
+
+        self.client = storage.Client()
+        self.bucket = self.client.bucket(bucket_name)
+
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        blob = self.bucket.blob(key)
+        await asyncio.to_thread(blob.upload_from_string, data, content_type=content_type)
+        return blob.public_url
+
+    async def delete_prefix(self, prefix: str) -> None:
+        def _delete():
+            for blob in self.client.list_blobs(self.bucket, prefix=prefix):
+                blob.delete()
+
+        await asyncio.to_thread(_delete)
+
+
+class GridFSBlobStore:
+    """Stores blobs in MongoDB GridFS, served by ``GET /api/blobs/{key}``."""
+
+    def __init__(self, bucket_name: str = "blobs"):
+        self.bucket_name = bucket_name
+        self._bucket = None
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+            from src.db.mongodb import MongoDB
+
+            self._bucket = AsyncIOMotorGridFSBucket(MongoDB.get_db(), bucket_name=self.bucket_name)
+        return self._bucket
+
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        await self.delete_prefix(key)
+        await self.bucket.upload_from_stream(key, data, metadata={"content_type": content_type})
+        return f"{settings.public_base_url.rstrip('/')}/api/blobs/{key}"
+
+    async def get(self, key: str) -> Optional[tuple[bytes, str]]:
+        from gridfs.errors import NoFile
+
+        try:
+            stream = await self.bucket.open_download_stream_by_name(key)
+        except NoFile:
+            return None
+        content_type = (stream.metadata or {}).get("content_type", "application/octet-stream")
+        return await stream.read(), content_type
+
+    async def delete_prefix(self, prefix: str) -> None:
+        import re
+
+        cursor = self.bucket.find({"filename": {"$regex": f"^{re.escape(prefix)}"}})
+        async for grid_out in cursor:
+            await self.bucket.delete(grid_out._id)
+
+
+_blob_store = None
+
+
+def get_blob_store():
+    global _blob_store
+    if _blob_store is None:
+        backend = settings.blob_store or ("gcs" if settings.gcp_bucket_name else "local")
+        if backend == "gcs":
+            if not settings.gcp_bucket_name:
+                raise ValueError("GCP_BUCKET_NAME environment variable is required for BLOB_STORE=gcs")
+            _blob_store = GCSBlobStore(settings.gcp_bucket_name)
+        elif backend == "gridfs":
+            _blob_store = GridFSBlobStore()
+        elif backend == "local":
+            _blob_store = LocalBlobStore()
+        else:
+            raise ValueError(f"Unsupported blob store: {backend}")
+    return _blob_store
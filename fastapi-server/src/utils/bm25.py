@@ -0,0 +1,248 @@
+import asyncio
+import math
+import re
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from src.config.settings import settings
+
+
+BM25_COLLECTION = "bm25_indexes"
+BM25_SCOPES_COLLECTION = "bm25_scopes"
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens. Identifiers like ``get_user_id`` also yield their parts."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over one scope's chunks (a course's documents or a video's windows)."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[str, dict] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.total_length = 0
+
+    def _index(self, doc_id: str, terms: Dict[str, int]) -> None:
+        for term, tf in terms.items():
+            self.postings[term][doc_id] = tf
+        self.total_length += self.docs[doc_id]["length"]
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[dict]] = None) -> None:
+        self.remove([doc_id for doc_id in ids if doc_id in self.docs])
+        for i, (doc_id, text) in enumerate(zip(ids, texts)):
+            terms = dict(Counter(tokenize(text)))
+            self.docs[doc_id] = {
+                "text": text,
+                "metadata": metadatas[i] if metadatas else {},
+                "terms": terms,
+                "length": sum(terms.values()),
+            }
+            self._index(doc_id, terms)
+
+    def remove(self, ids: List[str]) -> None:
+        for doc_id in ids:
+            doc = self.docs.pop(doc_id, None)
+            if doc is None:
+                continue
+            for term in doc["terms"]:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+            self.total_length -= doc["length"]
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        if not self.docs:
+            return []
+
+        n_docs = len(self.docs)
+        avg_length = self.total_length / n_docs or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = self.docs[doc_id]["length"]
+                norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:n_results]
+
+    def to_documents(self, ids: List[str]) -> List[dict]:
+        # Terms are stored as pairs, not as a dict, so tokens never become Mongo field names
+        return [
+            {
+                "doc_id": doc_id,
+                "text": self.docs[doc_id]["text"],
+                "metadata": self.docs[doc_id]["metadata"],
+                "terms": list(self.docs[doc_id]["terms"].items()),
+            }
+            for doc_id in ids if doc_id in self.docs
+        ]
+
+    @classmethod
+    def from_documents(cls, documents: List[dict]) -> "BM25Index":
+        index = cls()
+        for doc in documents:
+            terms = {term: tf for term, tf in doc["terms"]}
+            index.docs[doc["doc_id"]] = {
+                "text": doc["text"],
+                "metadata": doc.get("metadata") or {},
+                "terms": terms,
+                "length": sum(terms.values()),
+            }
+            index._index(doc["doc_id"], terms)
+        return index
+
+
+class BM25Store:
+    """Per-scope BM25 indexes persisted in Mongo, with the most recent kept in memory.
+
+    Each chunk is its own document tagged with its scope, so an add only
+    writes the new chunks. Every write bumps the scope's version in
+    ``bm25_scopes``; a cached index is served only while its version is
+    current, so API replicas and the course worker see each other's writes.
+    """
+
+    def __init__(
+        self,
+        collection_name: str = BM25_COLLECTION,
+        scopes_collection_name: str = BM25_SCOPES_COLLECTION,
+        max_cached: int = 256
+    ):
+        self.collection_name = collection_name
+        self.scopes_collection_name = scopes_collection_name
+        self.max_cached = max_cached
+        self._indexes: OrderedDict[str, Tuple[int, BM25Index]] = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._indexed = False
+
+    @property
+    def collection(self):
+        from src.db.mongodb import MongoDB
+        return MongoDB.get_collection(self.collection_name)
+
+    @property
+    def scopes(self):
+        from src.db.mongodb import MongoDB
+        return MongoDB.get_collection(self.scopes_collection_name)
+
+    async def _ensure_index(self) -> None:
+        if not self._indexed:
+            await self.collection.create_index("scope")
+            self._indexed = True
+
+    def _remember(self, scope: str, version: int, index: BM25Index) -> None:
+        self._indexes[scope] = (version, index)
+        self._indexes.move_to_end(scope)
+        while len(self._indexes) > self.max_cached:
+            self._indexes.popitem(last=False)
+
+    async def _version(self, scope: str) -> int:
+        doc = await self.scopes.find_one({"_id": scope}, {"version": 1})
+        return doc["version"] if doc else 0
+
+    async def _bump(self, scope: str) -> int:
+        from pymongo import ReturnDocument
+
+        doc = await self.scopes.find_one_and_update(
+            {"_id": scope},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+    async def get(self, scope: str) -> BM25Index:
+        version = await self._version(scope)
+        cached = self._indexes.get(scope)
+        if cached is not None and cached[0] == version:
+            self._indexes.move_to_end(scope)
+            return cached[1]
+
+        documents = await self.collection.find({"scope": scope}).to_list(length=None)
+        index = BM25Index.from_documents(documents)
+        self._remember(scope, version, index)
+        return index
+
+    async def add(self, scope: str, ids: List[str], texts: List[str], metadatas: Optional[List[dict]] = None) -> None:
+        async with self._locks[scope]:
+            await self._ensure_index()
+            index = await self.get(scope)
+            before = self._indexes[scope][0]
+            index.add(ids, texts, metadatas)
+
+            documents = index.to_documents(list(dict.fromkeys(ids)))
+            if not documents:
+                return
+            keys = [f"{scope}/{doc['doc_id']}" for doc in documents]
+            try:
+                await self.collection.delete_many({"_id": {"$in": keys}})
+                await self.collection.insert_many(
+                    [{"_id": key, "scope": scope, **doc} for key, doc in zip(keys, documents)],
+                    ordered=False
+                )
+                version = await self._bump(scope)
+            except Exception:
+                self._indexes.pop(scope, None)
+                raise
+
+            if version == before + 1:
+                self._remember(scope, version, index)
+            else:
+                # Another process wrote to this scope meanwhile; reload next time
+                self._indexes.pop(scope, None)
+
+    async def drop(self, scope: str) -> None:
+        async with self._locks[scope]:
+            self._indexes.pop(scope, None)
+            await self.collection.delete_many({"scope": scope})
+            await self._bump(scope)
+
+    async def search(self, scope: str, query: str, n_results: int = 10) -> List[dict]:
+        index = await self.get(scope)
+        return [
+            {
+                "id": doc_id,
+                "document": index.docs[doc_id]["text"],
+                "metadata": index.docs[doc_id]["metadata"],
+                "distance": None,
+                "score": score,
+            }
+            for doc_id, score in index.search(query, n_results)
+        ]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+_bm25_store: Optional[BM25Store] = None
+
+
+def get_bm25_store() -> BM25Store:
+    global _bm25_store
+    if _bm25_store is None:
+        _bm25_store = BM25Store(max_cached=settings.bm25_max_cached_indexes)
+    return _bm25_store
@@ -0,0 +1,210 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.config.settings import settings
+
+
+EMBEDDING_CACHE_COLLECTION = "embedding_cache"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.float32)
+
+
+class MongoEmbeddingBackend:
+    # Embedding functions are called from Chroma on worker threads, so this
+    # backend uses a synchronous pymongo client rather than Motor.
+    def __init__(self, collection_name: str = EMBEDDING_CACHE_COLLECTION):
+        self.collection_name = collection_name
+        self._collection = None
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            from pymongo import MongoClient
+            client = MongoClient(settings.mongodb_uri)
+            self._collection = client[settings.mongodb_db_name][self.collection_name]
+        return self._collection
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        docs = self.collection.find(
+            {"_id": {"$in": [f"{model}:{h}" for h in hashes]}},
+            {"hash": 1, "vector": 1}
+        )
+        return {doc["hash"]: decode_vector(doc["vector"]) for doc in docs}
+
+    def set_many(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        from pymongo import ReplaceOne
+        now = datetime.utcnow()
+        self.collection.bulk_write([
+            ReplaceOne(
+                {"_id": f"{model}:{h}"},
+                {"_id": f"{model}:{h}", "model": model, "hash": h, "vector": encode_vector(vector), "created_at": now},
+                upsert=True
+            )
+            for h, vector in vectors.items()
+        ], ordered=False)
+
+    def clear(self) -> None:
+        self.collection.delete_many({})
+
+
+class DiskEmbeddingBackend:
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, model: str, h: str) -> Path:
+        return self.directory / model / h[:2] / f"{h}.f32"
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        for h in hashes:
+            path = self._path(model, h)
+            if path.exists():
+                found[h] = decode_vector(path.read_bytes())
+        return found
+
+    def set_many(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        for h, vector in vectors.items():
+            path = self._path(model, h)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(encode_vector(vector))
+            tmp.replace(path)
+
+    def clear(self) -> None:
+        import shutil
+        shutil.rmtree(self.directory, True)
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store keyed by (model, sha256(text)).
+
+    An in-process LRU sits in front of an optional Mongo or disk backend.
+    Embeddings are deterministic for a model, so entries never expire.
+    Lookups are batched: one backend round trip per call, whatever its size.
+    """
+
+    def __init__(self, backend=None, max_entries: int = 10000):
+        self.backend = backend
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "memory_hits": 0, "backend_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _remember(self, model: str, h: str, vector: np.ndarray) -> None:
+        self._entries[(model, h)] = vector
+        self._entries.move_to_end((model, h))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for h in hashes:
+                vector = self._entries.get((model, h))
+                if vector is not None:
+                    self._entries.move_to_end((model, h))
+                    found[h] = vector
+            self._stats["memory_hits"] += len(found)
+
+        missing = [h for h in hashes if h not in found]
+        if missing and self.backend is not None:
+            try:
+                stored = self.backend.get_many(model, missing)
+            except Exception as e:
+                print(f"[Embedding cache] Read failed: {e}")
+                stored = {}
+                with self._lock:
+                    self._stats["errors"] += 1
+
+            with self._lock:
+                for h, vector in stored.items():
+                    self._remember(model, h, vector)
+                self._stats["backend_hits"] += len(stored)
+            found.update(stored)
+
+        with self._lock:
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(hashes) - len(found)
+        return found
+
+    def set_many(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        if not vectors:
+            return
+
+        with self._lock:
+            for h, vector in vectors.items():
+                self._remember(model, h, vector)
+            self._stats["writes"] += len(vectors)
+
+        if self.backend is not None:
+            try:
+                self.backend.set_many(model, vectors)
+            except Exception as e:
+                print(f"[Embedding cache] Write failed: {e}")
+                with self._lock:
+                    self._stats["errors"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def get_stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": True,
+            "backend": settings.embedding_cache_backend,
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._entries),
+        }
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_ready = False
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Shared embedding cache, or None when EMBEDDING_CACHE_BACKEND is "none"."""
+    global _embedding_cache, _embedding_cache_ready
+    if not _embedding_cache_ready:
+        backend_name = settings.embedding_cache_backend
+        if backend_name in ("", "none"):
+            _embedding_cache = None
+        elif backend_name == "memory":
+            _embedding_cache = EmbeddingCache(None, settings.embedding_cache_max_entries)
+        elif backend_name == "mongodb":
+            _embedding_cache = EmbeddingCache(MongoEmbeddingBackend(), settings.embedding_cache_max_entries)
+        elif backend_name == "disk":
+            _embedding_cache = EmbeddingCache(
+                DiskEmbeddingBackend(settings.embedding_cache_dir),
+                settings.embedding_cache_max_entries
+            )
+        else:
+            raise ValueError(f"Unsupported embedding cache backend: {backend_name}")
+        _embedding_cache_ready = True
+    return _embedding_cache
+
+
+def get_embedding_cache_stats() -> dict:
+    cache = get_embedding_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.get_stats()
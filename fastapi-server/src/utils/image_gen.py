@@ -6,6 +6,7 @@ import vertexai
 from vertexai.preview.vision_models import ImageGenerationModel
 
 from src.config.settings import settings
+from src.utils.offline import FakeImageModel, TapeImageModel, is_fake, needs_credentials, offline_mode
 
 
 class ImageGenService:
@@ -20,7 +21,12 @@ class ImageGenService:
     
     def _get_model(self) -> ImageGenerationModel:
         if self._model is None:
-            self._model = ImageGenerationModel.from_pretrained(settings.imagen_model)
+            if is_fake():
+                self._model = FakeImageModel()
+            elif offline_mode():
+                self._model = TapeImageModel(lambda: ImageGenerationModel.from_pretrained(settings.imagen_model))
+            else:
+                self._model = ImageGenerationModel.from_pretrained(settings.imagen_model)
         return self._model
     
     async def generate_image(self, prompt: str, style: str = "educational") -> bytes:
@@ -46,6 +52,8 @@ class ImageGenService:
         return await asyncio.to_thread(_generate)
     
     def is_available(self) -> bool:
+        if not needs_credentials():
+            return True
         return bool(settings.gcp_project_id and settings.imagen_model)
 
 
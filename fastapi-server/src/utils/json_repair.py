@@ -0,0 +1,184 @@
+import json
+import re
+import typing
+from typing import Any, Type, TypeVar
+
+from pydantic import BaseModel
+
+
+T = TypeVar("T", bound=BaseModel)
+
+CODE_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+CLOSERS = {"{": "}", "[": "]"}
+
+
+def _skip_whitespace(text: str, i: int) -> int:
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return i
+
+
+def _extract_block(text: str) -> str:
+    """The first top-level JSON object or array in ``text``.
+
+    Brackets still open at the end (a reply cut off by max_tokens) are closed.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return ""
+    start = min(starts)
+
+    stack = []
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in CLOSERS:
+            stack.append(CLOSERS[ch])
+        elif ch in "}]" and stack:
+            stack.pop()
+            if not stack:
+                return text[start:i + 1]
+
+    block = text[start:]
+    if in_string:
+        block += '"'
+    return block.rstrip().rstrip(",") + "".join(reversed(stack))
+
+
+def _normalize(text: str) -> str:
+    """Rewrite near-JSON into JSON.
+
+    Handles single-quoted strings, unquoted keys, Python literals and
+    trailing commas. Double-quoted strings are copied through unchanged.
+    """
+    out = []
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+
+        if ch == '"' or ch == "'":
+            j = i + 1
+            chars = []
+            while j < n and text[j] != ch:
+                if text[j] == "\\" and j + 1 < n:
+                    chars.append("'" if ch == "'" and text[j + 1] == "'" else text[j:j + 2])
+                    j += 2
+                    continue
+                chars.append('\\"' if ch == "'" and text[j] == '"' else text[j])
+                j += 1
+            out.append('"' + "".join(chars) + '"')
+            i = j + 1
+            continue
+
+        if ch == ",":
+            k = _skip_whitespace(text, i + 1)
+            if k < n and text[k] in "}]":
+                i += 1
+                continue
+
+        match = IDENTIFIER.match(text, i) if ch.isalpha() or ch == "_" else None
+        if match:
+            word = match.group(0)
+            k = _skip_whitespace(text, i + len(word))
+            if k < n and text[k] == ":":
+                out.append(json.dumps(word))
+            else:
+                out.append(PYTHON_LITERALS.get(word, word))
+            i += len(word)
+            continue
+
+        out.append(ch)
+        i += 1
+
+    return "".join(out)
+
+
+def loads_json(text: str) -> Any:
+    """Parse JSON from an LLM reply, repairing the usual mistakes locally.
+
+    Tries the text as-is, inside a ```json fence, and as the first
+    bracketed block, each raw and then normalized. Raises ValueError if
+    none of them parse.
+    """
+    text = (text or "").strip()
+    candidates = [text]
+
+    fenced = CODE_FENCE.search(text)
+    if fenced:
+        candidates.append(fenced.group(1).strip())
+    block = _extract_block(candidates[-1])
+    if block:
+        candidates.append(block)
+
+    last_error = None
+    for candidate in candidates:
+        for repair in (None, _normalize):
+            try:
+                attempt = repair(candidate) if repair else candidate
+                # strict=False accepts raw newlines inside strings.
+                return json.loads(attempt, strict=False)
+            except (ValueError, RecursionError) as e:
+                last_error = e
+
+    raise ValueError(f"Could not parse JSON from model output: {last_error}")
+
+
+def _list_fields(schema: Type[BaseModel]) -> list[str]:
+    return [
+        name for name, field in schema.model_fields.items()
+        if typing.get_origin(field.annotation) in (list, typing.List)
+    ]
+
+
+def coerce_to_schema(data: Any, schema: Type[BaseModel]) -> Any:
+    """Undo common shape mistakes before validation.
+
+    Unwraps tool-call envelopes (``{"name": ..., "arguments": {...}}``) and
+    ``{"SchemaName": {...}}``, and wraps a bare list when the schema has a
+    single list field. Per-field fixes (e.g. MCQ option keys) live in the
+    schemas' own validators.
+    """
+    fields = schema.model_fields
+
+    if isinstance(data, dict):
+        for envelope in ("arguments", "parameters"):
+            if envelope in data and envelope not in fields:
+                inner = data[envelope]
+                if isinstance(inner, str):
+                    inner = loads_json(inner)
+                if isinstance(inner, (dict, list)):
+                    return coerce_to_schema(inner, schema)
+
+        if len(data) == 1 and schema.__name__ in data and schema.__name__ not in fields:
+            return coerce_to_schema(data[schema.__name__], schema)
+
+    if isinstance(data, list):
+        list_fields = _list_fields(schema)
+        if len(list_fields) == 1:
+            return {list_fields[0]: data}
+
+    return data
+
+
+def repair_structured(raw: Any, schema: Type[T]) -> T:
+    """Parse, reshape and validate raw model output against ``schema``.
+
+    ``raw`` is the reply text or already-decoded tool arguments. Raises
+    ValueError (pydantic's ValidationError included) when it can't be
+    repaired.
+    """
+    data = loads_json(raw) if isinstance(raw, str) else raw
+    return schema.model_validate(coerce_to_schema(data, schema))
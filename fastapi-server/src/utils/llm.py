@@ -1,4 +1,5 @@
-from typing import Any, Type, TypeVar, Optional, Literal
+import asyncio
+from typing import Any, AsyncIterator, Type, TypeVar, Optional, Literal
 from langchain_groq import ChatGroq
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -6,11 +7,15 @@ from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel
 
 from src.config.settings import settings
+from src.utils.json_repair import repair_structured
+from src.utils.llm_cache import get_llm_cache, make_cache_key
+from src.utils.offline import FakeChatModel, TapeChatModel, is_fake, needs_credentials, offline_mode
+from src.utils.llm_governor import get_governor, estimate_tokens
 
 
 T = TypeVar("T", bound=BaseModel)
 
-LLMProvider = Literal["groq", "gemini"]
+LLMProvider = Literal["groq", "gemini", "fake"]
 
 
 class LLMService:
@@ -19,39 +24,152 @@ class LLMService:
         provider: LLMProvider = "groq",
         model: str = None,
         temperature: float = 0.7,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        routing: str = None
     ):
+        if is_fake():
+            provider = "fake"
+
         self.provider = provider
         self.temperature = temperature
         self.max_tokens = max_tokens
         
-        if provider == "groq":
+        if provider == "fake":
+            self.model_name = model or "fake"
+            self.llm = FakeChatModel(max_tokens=self.max_tokens)
+        elif provider == "groq":
             self.model_name = model or settings.groq_model
-            if not settings.groq_api_key:
+            if needs_credentials() and not settings.groq_api_key:
                 raise ValueError("GROQ_API_KEY environment variable is required")
             self.llm = ChatGroq(
                 api_key=settings.groq_api_key,
                 model=self.model_name,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
-            )
+                # The governor owns 429 backoff; SDK retries would stack on top of it
+                max_retries=0,
+            ) if needs_credentials() else None
         elif provider == "gemini":
             self.model_name = model or settings.gemini_model
-            if not settings.google_cloud_api:
+            if needs_credentials() and not settings.google_cloud_api:
                 raise ValueError("GOOGLE_CLOUD_API environment variable is required")
             self.llm = ChatGoogleGenerativeAI(
                 api_key=settings.google_cloud_api,
                 model=self.model_name,
                 temperature=self.temperature,
                 max_output_tokens=self.max_tokens,
-            )
+                max_retries=0,
+            ) if needs_credentials() else None
         else:
             raise ValueError(f"Unsupported provider: {provider}")
+
+        if offline_mode() in ("record", "replay"):
+            self.llm = TapeChatModel(self.llm, {
+                "provider": provider,
+                "model": self.model_name,
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+            })
+
+        self.governor = get_governor(provider)
+
+        self.routing = routing or settings.llm_routing
+        self.backup: Optional[LLMService] = None
+        if self.routing == "hedged" and provider != "fake":
+            backup_provider = "gemini" if provider == "groq" else "groq"
+            try:
+                self.backup = LLMService(
+                    provider=backup_provider,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    routing="single"
+                )
+            except ValueError as e:
+                print(f"[LLM] Hedging disabled for {provider}: {e}")
+
+    async def _invoke_single(self, messages: list, build=None, timeout: float = None):
+        """Run a model call through the provider's concurrency and rate-limit governor."""
+        runnable = build(self.llm) if build else self.llm
+
+        def usage(response) -> Optional[int]:
+            if isinstance(response, dict):
+                # include_raw structured output: usage is on the raw message.
+                response = response.get("raw")
+            metadata = getattr(response, "usage_metadata", None)
+            return metadata.get("total_tokens") if metadata else None
+
+        return await self.governor.run(
+            lambda: runnable.ainvoke(messages),
+            tokens=estimate_tokens("".join(str(message.content) for message in messages)),
+            timeout=timeout,
+            usage=usage
+        )
+
+    def _hedge_delay(self) -> float:
+        p95 = self.governor.p95_latency()
+        delay = settings.llm_hedge_default_delay_seconds if p95 is None else p95
+        return min(max(delay, settings.llm_hedge_min_delay_seconds), settings.llm_hedge_max_delay_seconds)
+
+    async def _invoke(self, messages: list, build=None, timeout: float = None):
+        """Call the model, hedging to the backup provider when routing is "hedged".
+
+        ``build`` turns a chat model into the runnable to call (e.g. adds
+        structured output) so the same call can be made on either provider.
+        If the primary hasn't answered within its recent p95 latency, the
+        backup is called too; the first success wins and the other call is
+        cancelled. A provider whose circuit is open is skipped.
+        """
+        if self.backup is None:
+            return await self._invoke_single(messages, build, timeout)
+
+        primary, secondary = self, self.backup
+        if not primary.governor.breaker.allow() and secondary.governor.breaker.allow():
+            primary, secondary = secondary, primary
+
+        first = asyncio.create_task(primary._invoke_single(messages, build, timeout))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=primary._hedge_delay())
+            if first in done and first.exception() is None:
+                return first.result()
+            if not secondary.governor.breaker.allow():
+                return await first
+
+            errors = []
+            if first in done:
+                errors.append(first.exception())
+                tasks = set()
+            else:
+                print(f"[LLM] {primary.provider} slower than {primary._hedge_delay():.1f}s, hedging to {secondary.provider}")
+            tasks.add(asyncio.create_task(secondary._invoke_single(messages, build, timeout)))
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+            raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
     
+    def _cache_key(self, kind: str, messages: list, output_schema: Type[BaseModel] = None) -> str:
+        return make_cache_key(
+            kind=kind,
+            provider=self.provider,
+            model=self.model_name,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            messages=[(message.type, message.content) for message in messages],
+            schema=output_schema.model_json_schema() if output_schema else None,
+        )
+
     async def generate(
         self,
         prompt: str,
-        system_prompt: str = None
+        system_prompt: str = None,
+        cache: bool = False
     ) -> str:
         messages = []
         
@@ -59,20 +177,114 @@ class LLMService:
             messages.append(SystemMessage(content=system_prompt))
         
         messages.append(HumanMessage(content=prompt))
+
+        response_cache = get_llm_cache() if cache else None
+        if response_cache:
+            key = self._cache_key("text", messages)
+            cached = await response_cache.get(key)
+            if cached is not None:
+                return cached
         
-        response = await self.llm.ainvoke(messages)
+        response = await self._invoke(messages)
+
+        if response_cache:
+            await response_cache.set(key, response.content)
         return response.content
     
+    async def stream(
+        self,
+        prompt: str,
+        system_prompt: str = None,
+        cache: bool = False
+    ) -> AsyncIterator[str]:
+        """Yield the completion as text chunks as they arrive.
+
+        Streams aren't hedged, but they go to the backup provider while the
+        primary's circuit is open.
+        """
+        if self.backup and not self.governor.breaker.allow() and self.backup.governor.breaker.allow():
+            async for chunk in self.backup.stream(prompt, system_prompt, cache):
+                yield chunk
+            return
+
+        messages = []
+
+        if system_prompt:
+            messages.append(SystemMessage(content=system_prompt))
+
+        messages.append(HumanMessage(content=prompt))
+
+        # Shares cache entries with generate(): same messages, same text.
+        response_cache = get_llm_cache() if cache else None
+        if response_cache:
+            key = self._cache_key("text", messages)
+            cached = await response_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        tokens = estimate_tokens("".join(str(message.content) for message in messages))
+        parts = []
+        usage = None
+
+        async for chunk in self.governor.stream(lambda: self.llm.astream(messages), tokens=tokens):
+            if getattr(chunk, "usage_metadata", None):
+                usage = chunk.usage_metadata.get("total_tokens")
+
+            content = chunk.content
+            if isinstance(content, list):
+                content = "".join(
+                    part.get("text", "") if isinstance(part, dict) else str(part)
+                    for part in content
+                )
+            if content:
+                parts.append(content)
+                yield content
+
+        self.governor.record_usage(tokens, usage)
+        if response_cache:
+            await response_cache.set(key, "".join(parts))
+
+    @staticmethod
+    def _failed_generation(error: Exception) -> Optional[str]:
+        """The model's rejected tool call from a Groq ``tool_use_failed`` error."""
+        body = getattr(error, "body", None)
+        if isinstance(body, dict):
+            body = body.get("error", body)
+            if isinstance(body, dict) and body.get("failed_generation"):
+                return body["failed_generation"]
+        return None
+
+    @staticmethod
+    def _raw_output(message) -> Any:
+        """Tool-call arguments from a raw AIMessage, falling back to its text."""
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            return tool_calls[0].get("args")
+        content = getattr(message, "content", None)
+        if isinstance(content, list):
+            content = "".join(
+                part.get("text", "") if isinstance(part, dict) else str(part)
+                for part in content
+            )
+        return content or None
+
     async def generate_structured(
         self,
         prompt: str,
         output_schema: Type[T],
         system_prompt: str = None,
-        max_retries: int = 3
+        max_retries: int = 3,
+        cache: bool = False
     ) -> T:
-        import asyncio
+        """Generate output validated against ``output_schema``.
 
-        structured_llm = self.llm.with_structured_output(output_schema)
+        Output the provider rejects or that fails validation is repaired
+        locally first (see utils.json_repair); the request is only sent
+        again, with the validation error appended, when repair fails.
+        """
+        def build(llm):
+            return llm.with_structured_output(output_schema, include_raw=True)
         
         messages = []
         
@@ -80,32 +292,66 @@ class LLMService:
             messages.append(SystemMessage(content=system_prompt))
         
         messages.append(HumanMessage(content=prompt))
+        original_prompt = messages[-1].content
+
+        # Keyed on the original messages, before any retry clarification.
+        response_cache = get_llm_cache() if cache else None
+        if response_cache:
+            key = self._cache_key("structured", messages, output_schema)
+            cached = await response_cache.get(key)
+            if cached is not None:
+                return output_schema.model_validate(cached)
         
         last_error = None
         for attempt in range(max_retries):
             try:
-                response = await structured_llm.ainvoke(messages)
-                return response
+                response = await self._invoke(messages, build)
+                result = response.get("parsed")
+                if result is None:
+                    raw = self._raw_output(response.get("raw"))
+                    last_error = response.get("parsing_error") or ValueError("Model returned no structured output")
+                    if raw is not None:
+                        try:
+                            result = repair_structured(raw, output_schema)
+                            print("[LLM] Repaired structured output locally")
+                        except ValueError as e:
+                            last_error = e
             except Exception as e:
                 error_msg = str(e)
+                if "tool_use_failed" not in error_msg and "did not match schema" not in error_msg:
+                    raise
                 last_error = e
-                
-                if "tool_use_failed" in error_msg or "did not match schema" in error_msg:
-                    print(f"[LLM] Structured output attempt {attempt + 1}/{max_retries} failed: tool validation error")
-                    if attempt < max_retries - 1:
-                        clarification = "\n\nIMPORTANT: Ensure all JSON objects have the correct keys. For MCQ options, use 'key' and 'text' fields only."
-                        if clarification not in messages[-1].content:
-                            messages[-1] = HumanMessage(content=messages[-1].content + clarification)
-                        await asyncio.sleep(0.5 * (2 ** attempt))
-                        continue
-                raise
+                result = None
+                failed = self._failed_generation(e)
+                if failed:
+                    try:
+                        result = repair_structured(failed, output_schema)
+                        print("[LLM] Repaired rejected tool call locally")
+                    except ValueError as repair_error:
+                        last_error = repair_error
+
+            if result is not None:
+                if response_cache:
+                    await response_cache.set(key, result.model_dump(mode="json"))
+                return result
+
+            print(f"[LLM] Structured output attempt {attempt + 1}/{max_retries} failed: {last_error}")
+            if attempt < max_retries - 1:
+                clarification = (
+                    "\n\nIMPORTANT: Your previous answer could not be used. "
+                    f"Fix this error and answer again:\n{str(last_error)[:1000]}\n"
+                    "For MCQ options, use 'key' and 'text' fields only."
+                )
+                messages[-1] = HumanMessage(content=original_prompt + clarification)
+                await asyncio.sleep(0.5 * (2 ** attempt))
         
         raise last_error
     
     async def generate_json(
         self,
         prompt: str,
-        system_prompt: str = None
+        system_prompt: str = None,
+        cache: bool = False
     ) -> dict:
         parser = JsonOutputParser()
         
@@ -117,15 +363,28 @@ class LLMService:
             HumanMessage(content=prompt)
         ]
         
-        response = await self.llm.ainvoke(messages)
-        return parser.parse(response.content)
+        response_cache = get_llm_cache() if cache else None
+        if response_cache:
+            key = self._cache_key("json", messages)
+            cached = await response_cache.get(key)
+            if cached is not None:
+                return cached
+
+        response = await self._invoke(messages)
+        result = parser.parse(response.content)
+
+        if response_cache:
+            await response_cache.set(key, result)
+        return result
     
     def get_model_info(self) -> dict:
         return {
             "model": self.model_name,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
-            "provider": self.provider
+            "provider": self.provider,
+            "routing": self.routing,
+            "backup_provider": self.backup.provider if self.backup else None,
         }
 
 _llm_services: dict[str, LLMService] = {}
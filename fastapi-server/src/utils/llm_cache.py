@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from src.config.settings import settings
+
+
+LLM_CACHE_COLLECTION = "llm_cache"
+
+
+def make_cache_key(**parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MongoCacheBackend:
+    def __init__(self, collection_name: str = LLM_CACHE_COLLECTION):
+        self.collection_name = collection_name
+        self._indexed = False
+
+    @property
+    def collection(self):
+        from src.db.mongodb import MongoDB
+        return MongoDB.get_collection(self.collection_name)
+
+    async def _ensure_index(self) -> None:
+        if not self._indexed:
+            await self.collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+
+    async def get(self, key: str) -> Optional[tuple[Any, float]]:
+        doc = await self.collection.find_one({"_id": key})
+        if not doc:
+            return None
+        return json.loads(doc["value"]), doc["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+
+    async def set(self, key: str, value: Any, expires_at: float) -> None:
+        await self._ensure_index()
+        await self.collection.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                # Stored as a JSON string: parsed LLM output may contain keys
+                # Mongo won't accept ("$ref", dotted names).
+                "value": json.dumps(value, ensure_ascii=False),
+                "expires_at": datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None),
+                "created_at": datetime.utcnow(),
+            },
+            upsert=True
+        )
+
+    async def clear(self) -> None:
+        await self.collection.delete_many({})
+
+
+class DiskCacheBackend:
+    """One JSON file per entry. A file's mtime is its last write or hit, so
+    eviction past ``max_entries``/``max_bytes`` drops the least recently used.
+
+    Expired files are deleted when read and by a sweep every
+    ``sweep_seconds``: a file untouched for ``ttl_seconds`` can only hold an
+    expired entry, so the sweep needs a stat per file, not a read.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl_seconds: int = 86400,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        sweep_seconds: int = 600
+    ):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_seconds = sweep_seconds
+        # None until the first sweep, which also counts what's already on disk
+        self._last_sweep: Optional[float] = None
+        self._sweeping = False
+        # Rough totals since the last sweep; a sweep recounts them from disk
+        self._entries = 0
+        self._bytes = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    async def get(self, key: str) -> Optional[tuple[Any, float]]:
+        path = self._path(key)
+
+        def _read():
+            if not path.exists():
+                return None
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            if entry["expires_at"] <= time.time():
+                path.unlink(missing_ok=True)
+                return None
+            os.utime(path)
+            return entry["value"], entry["expires_at"]
+
+        return await asyncio.to_thread(_read)
+
+    async def set(self, key: str, value: Any, expires_at: float) -> None:
+        path = self._path(key)
+
+        def _write():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            data = json.dumps({"value": value, "expires_at": expires_at}, ensure_ascii=False).encode("utf-8")
+            tmp.write_bytes(data)
+            if not path.exists():
+                self._entries += 1
+            self._bytes += len(data)
+            tmp.replace(path)
+
+        await asyncio.to_thread(_write)
+        await self._maybe_sweep()
+
+    def _over_limit(self) -> bool:
+        return (
+            (self.max_entries > 0 and self._entries > self.max_entries)
+            or (self.max_bytes > 0 and self._bytes > self.max_bytes)
+        )
+
+    async def _maybe_sweep(self) -> None:
+        due = self._last_sweep is None or time.monotonic() - self._last_sweep >= self.sweep_seconds
+        if self._sweeping or not (due or self._over_limit()):
+            return
+        self._sweeping = True
+        try:
+            await asyncio.to_thread(self.sweep)
+        except Exception as e:
+            print(f"[LLM cache] Disk sweep failed: {e}")
+        finally:
+            self._last_sweep = time.monotonic()
+            self._sweeping = False
+
+    def sweep(self) -> int:
+        """Delete expired entries, then evict by mtime down to 90% of the limits.
+
+        Returns how many files were removed.
+        """
+        if not self.directory.exists():
+            self._entries = self._bytes = 0
+            return 0
+
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        files = []
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime <= cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+            elif path.suffix == ".json":
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        entries = len(files)
+        size = sum(file_size for _, file_size, _ in files)
+        max_entries = int(self.max_entries * 0.9) if self.max_entries > 0 else None
+        max_bytes = int(self.max_bytes * 0.9) if self.max_bytes > 0 else None
+        files.sort(key=lambda item: item[0])
+        for _, file_size, path in files:
+            if (max_entries is None or entries <= max_entries) and (max_bytes is None or size <= max_bytes):
+                break
+            path.unlink(missing_ok=True)
+            entries -= 1
+            size -= file_size
+            removed += 1
+
+        self._entries = entries
+        self._bytes = size
+        return removed
+
+    async def clear(self) -> None:
+        import shutil
+        await asyncio.to_thread(shutil.rmtree, self.directory, True)
+        self._entries = self._bytes = 0
+
+
+class LLMResponseCache:
+    """Content-addressed cache for LLM responses.
+
+    An in-process LRU sits in front of an optional persistent backend
+    (Mongo or disk) so hot prompts never leave the process and repeats
+    survive restarts. Entries expire after ``ttl_seconds`` in both tiers.
+    """
+
+    def __init__(self, backend=None, ttl_seconds: int = 86400, max_entries: int = 1024):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._stats = {"hits": 0, "memory_hits": 0, "backend_hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+                return value
+            del self._entries[key]
+
+        if self.backend is not None:
+            try:
+                entry = await self.backend.get(key)
+            except Exception as e:
+                print(f"[LLM cache] Read failed: {e}")
+                self._stats["errors"] += 1
+                entry = None
+
+            if entry is not None and entry[1] > now:
+                self._remember(key, *entry)
+                self._stats["hits"] += 1
+                self._stats["backend_hits"] += 1
+                return entry[0]
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        self._stats["writes"] += 1
+
+        if self.backend is not None:
+            try:
+                await self.backend.set(key, value, expires_at)
+            except Exception as e:
+                print(f"[LLM cache] Write failed: {e}")
+                self._stats["errors"] += 1
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        if self.backend is not None:
+            await self.backend.clear()
+
+    def get_stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": True,
+            "backend": settings.llm_cache_backend,
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._entries),
+        }
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_ready = False
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Shared response cache, or None when LLM_CACHE_BACKEND is unset."""
+    global _llm_cache, _llm_cache_ready
+    if not _llm_cache_ready:
+        backend_name = settings.llm_cache_backend
+        if backend_name in ("", "none"):
+            _llm_cache = None
+        elif backend_name == "memory":
+            _llm_cache = LLMResponseCache(None, settings.llm_cache_ttl_seconds, settings.llm_cache_max_entries)
+        elif backend_name == "mongodb":
+            _llm_cache = LLMResponseCache(MongoCacheBackend(), settings.llm_cache_ttl_seconds, settings.llm_cache_max_entries)
+        elif backend_name == "disk":
+            _llm_cache = LLMResponseCache(
+                DiskCacheBackend(
+                    settings.llm_cache_dir,
+                    ttl_seconds=settings.llm_cache_ttl_seconds,
+                    max_entries=settings.llm_cache_disk_max_entries,
+                    max_bytes=settings.llm_cache_disk_max_mb * 1024 * 1024,
+                    sweep_seconds=settings.llm_cache_disk_sweep_seconds
+                ),
+                settings.llm_cache_ttl_seconds,
+                settings.llm_cache_max_entries
+            )
+        else:
+            raise ValueError(f"Unsupported LLM cache backend: {backend_name}")
+        _llm_cache_ready = True
+    return _llm_cache
+
+
+def get_llm_cache_stats() -> dict:
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.get_stats()
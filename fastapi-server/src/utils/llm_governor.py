@@ -0,0 +1,365 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from src.config.settings import settings
+from src.utils.tokens import FALLBACK_CHARS_PER_TOKEN
+
+
+R = TypeVar("R")
+
+
+class LLMQueueTimeout(TimeoutError):
+    pass
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "resource_exhausted" in message or "resource has been exhausted" in message
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    for status in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None),
+    ):
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether ``error`` says the provider is unhealthy rather than the request bad.
+
+    Server errors, timeouts, connection failures and rate limits that
+    outlasted the backoff count. Client errors (a malformed tool call, a
+    schema or content rejection) and cancellations don't: the next request
+    may well succeed.
+    """
+    if isinstance(error, asyncio.CancelledError) or isinstance(error, LLMQueueTimeout):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if is_rate_limit_error(error):
+        return True
+
+    status = get_status_code(error)
+    if status is not None:
+        return status >= 500 or status == 408
+
+    name = type(error).__name__
+    if "Timeout" in name or "Connection" in name:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in (
+        "internal server error", "service unavailable", "bad gateway", "gateway timeout", "overloaded"
+    ))
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens to reserve for a prompt, estimated from its length.
+
+    This runs on the event loop before every call, so it doesn't tokenize.
+    The provider's reported usage corrects the bucket afterwards.
+    """
+    return max(1, -(-len(text) // FALLBACK_CHARS_PER_TOKEN))
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units evenly over a minute. A limit of 0 disables it.
+
+    The level may go negative when a call turns out to cost more than was
+    reserved up front; later callers then wait for the debt to refill.
+    """
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        # A single call larger than the whole budget only waits for a full bucket.
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed * 60 / self.per_minute)
+
+    def take(self, amount: float) -> None:
+        if self.enabled:
+            self._refill()
+            self.level -= amount
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and rejects calls
+    for ``reset_seconds``; then lets calls through again as a trial (half-open)
+    until one succeeds or fails."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        return self.state != self.OPEN
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ProviderGovernor:
+    """Limits in-flight requests, RPM and TPM for one LLM provider.
+
+    Callers queue for a slot until ``queue_timeout`` and retry 429 responses
+    with exponential backoff and full jitter. A 429 also pauses the whole
+    provider briefly so concurrent callers don't keep hammering it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rpm: int = 0,
+        tpm: int = 0,
+        queue_timeout: float = 120.0,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._budget_lock = asyncio.Lock()
+        self._cooldown_until = 0.0
+        self._waiting = 0
+        self._in_flight = 0
+        self._stats = {"requests": 0, "tokens": 0, "rate_limited": 0, "retries": 0, "queue_timeouts": 0}
+
+        self.breaker = CircuitBreaker(settings.llm_breaker_failure_threshold, settings.llm_breaker_reset_seconds)
+        self._latencies: deque = deque(maxlen=200)
+
+    def p95_latency(self) -> Optional[float]:
+        """p95 of recent successful call durations, once there are enough samples."""
+        if len(self._latencies) < 20:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def _record_outcome(self, started: float, error: Optional[Exception] = None) -> None:
+        if error is None:
+            self._latencies.append(time.monotonic() - started)
+            self.breaker.record_success()
+        elif is_provider_failure(error):
+            self.breaker.record_failure()
+
+    async def _wait_for_budget(self, tokens: int, deadline: float) -> None:
+        async with self._budget_lock:
+            while True:
+                delay = max(
+                    self._cooldown_until - time.monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens),
+                )
+                if delay <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+                if time.monotonic() + delay > deadline:
+                    raise LLMQueueTimeout(f"{self.name} request budget exhausted")
+                await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self, tokens: int, timeout: Optional[float] = None):
+        deadline = time.monotonic() + (timeout if timeout is not None else self.queue_timeout)
+        self._waiting += 1
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise LLMQueueTimeout(f"Timed out waiting for a {self.name} slot")
+            try:
+                await self._wait_for_budget(tokens, deadline)
+            except BaseException:
+                self._semaphore.release()
+                raise
+        except LLMQueueTimeout:
+            self._stats["queue_timeouts"] += 1
+            raise
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    def record_usage(self, reserved: int, actual: Optional[int]) -> None:
+        self._stats["tokens"] += actual if actual is not None else reserved
+        if actual is not None and actual > reserved:
+            self.tokens.take(actual - reserved)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[R]],
+        tokens: int,
+        timeout: Optional[float] = None,
+        usage: Callable[[R], Optional[int]] = None
+    ) -> R:
+        for attempt in range(self.max_retries + 1):
+            async with self.slot(tokens, timeout):
+                self._stats["requests"] += 1
+                started = time.monotonic()
+                try:
+                    # A CancelledError (e.g. a losing hedge) isn't an Exception
+                    # and passes through without counting either way.
+                    result = await call()
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                        self._record_outcome(started, e)
+                        raise
+                    self._stats["rate_limited"] += 1
+                    delay = self._backoff(attempt, e)
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                else:
+                    self._record_outcome(started)
+                    self.record_usage(tokens, usage(result) if usage else None)
+                    return result
+
+            self._stats["retries"] += 1
+            print(f"[LLM] {self.name} rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    async def stream(
+        self,
+        open_stream: Callable[[], AsyncIterator[R]],
+        tokens: int,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[R]:
+        """Like ``run`` for streaming calls. A 429 is only retried before the
+        first chunk; after that the caller has already seen partial output."""
+        for attempt in range(self.max_retries + 1):
+            started = False
+            async with self.slot(tokens, timeout):
+                self._stats["requests"] += 1
+                began = time.monotonic()
+                try:
+                    async for chunk in open_stream():
+                        if not started:
+                            # Time to first chunk is what hedging and callers wait on.
+                            self._record_outcome(began)
+                            started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    if started or not is_rate_limit_error(e) or attempt >= self.max_retries:
+                        if not started:
+                            self._record_outcome(began, e)
+                        raise
+                    self._stats["rate_limited"] += 1
+                    delay = self._backoff(attempt, e)
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+            self._stats["retries"] += 1
+            print(f"[LLM] {self.name} rate limited, retrying stream in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> dict:
+        return {
+            "provider": self.name,
+            "queue_length": self._waiting,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "rpm": self.requests.per_minute,
+            "tpm": self.tokens.per_minute,
+            "cooling_down": self._cooldown_until > time.monotonic(),
+            "circuit": self.breaker.state,
+            "p95_latency_seconds": self.p95_latency(),
+            **self._stats,
+        }
+
+
+_governors: dict[str, ProviderGovernor] = {}
+
+
+def get_governor(provider: str) -> ProviderGovernor:
+    if provider not in _governors:
+        limits = {
+            "groq": (settings.groq_max_concurrency, settings.groq_rpm, settings.groq_tpm),
+            "gemini": (settings.gemini_max_concurrency, settings.gemini_rpm, settings.gemini_tpm),
+        }
+        max_concurrency, rpm, tpm = limits.get(provider, (settings.groq_max_concurrency, 0, 0))
+        _governors[provider] = ProviderGovernor(
+            provider,
+            max_concurrency=max_concurrency,
+            rpm=rpm,
+            tpm=tpm,
+            queue_timeout=settings.llm_queue_timeout_seconds,
+            max_retries=settings.llm_rate_limit_retries,
+        )
+    return _governors[provider]
+
+
+def get_governor_stats() -> list[dict]:
+    return [governor.get_stats() for governor in _governors.values()]
@@ -0,0 +1,578 @@
+"""Offline stand-ins for the external model APIs.
+
+``OFFLINE_MODE`` decides how LLM, embedding, translation, TTS and Imagen
+calls are served:
+
+- ``""``: the real providers.
+- ``"fake"``: deterministic synthetic output, no credentials needed.
+- ``"record"``: the real providers, with every response also written to
+  ``OFFLINE_TAPE_DIR``.
+- ``"replay"``: responses read back from ``OFFLINE_TAPE_DIR``. A request
+  that was never recorded raises ReplayMiss.
+
+Fake calls sleep for a delay drawn from the ``FAKE_*_LATENCY``
+distributions. Output and delays are seeded from the request and
+``OFFLINE_SEED``, so the same run gives the same result.
+"""
+import asyncio
+import base64
+import enum
+import hashlib
+import json
+import math
+import random
+import struct
+import time
+import types
+import typing
+import zlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Optional, Type
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from pydantic import BaseModel
+
+from src.config.settings import settings
+from src.utils.llm_cache import make_cache_key
+from src.utils.tokens import count_tokens
+
+
+OFFLINE_MODES = ("", "fake", "record", "replay")
+
+EMBEDDING_DIMENSIONS = 768
+
+WORDS = (
+    "system data model process value layer signal network function state "
+    "input output memory graph vector cache request response pattern method "
+    "structure example concept result error index stream query record format"
+).split()
+
+
+class ReplayMiss(LookupError):
+    pass
+
+
+def offline_mode() -> str:
+    mode = settings.offline_mode
+    if mode not in OFFLINE_MODES:
+        raise ValueError(f"Unsupported offline mode: {mode}")
+    return mode
+
+
+def is_fake() -> bool:
+    return offline_mode() == "fake"
+
+
+def needs_credentials() -> bool:
+    """Whether real provider clients have to be built (everything but fake/replay)."""
+    return offline_mode() in ("", "record")
+
+
+def seeded_random(*parts: Any) -> random.Random:
+    digest = hashlib.sha256(json.dumps([settings.offline_seed, *parts], default=str).encode("utf-8")).hexdigest()
+    return random.Random(digest)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Build a delay sampler from a spec.
+
+    ``"0.5"`` or ``"fixed:0.5"`` is a constant, ``"uniform:0.2,1.5"`` is
+    uniform between the bounds and ``"lognormal:0.8,0.4"`` is log-normal
+    with that median and sigma. Delays are in seconds.
+    """
+    spec = (spec or "0").strip()
+    kind, _, args = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    values = [float(v) for v in args.split(",") if v.strip()]
+
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: max(0.0, values[0])
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(*values)
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: values[0] * math.exp(values[1] * rng.gauss(0, 1))
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    return parse_latency(spec)(rng)
+
+
+class Tape:
+    """Recorded responses on disk, one JSON file per request key."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.directory / kind / key[:2] / f"{key}.json"
+
+    def load(self, kind: str, key: str) -> tuple[Any, float]:
+        path = self._path(kind, key)
+        if not path.exists():
+            raise ReplayMiss(f"No recorded {kind} response for {key}")
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        return entry["value"], entry.get("elapsed", 0.0)
+
+    def save(self, kind: str, key: str, value: Any, elapsed: float) -> None:
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"value": value, "elapsed": elapsed}, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+
+
+_tape: Optional[Tape] = None
+
+
+def get_tape() -> Tape:
+    global _tape
+    if _tape is None:
+        _tape = Tape(settings.offline_tape_dir)
+    return _tape
+
+
+def taped(kind: str, key: str, call: Callable[[], Any], encode=None, decode=None) -> Any:
+    """Run a blocking provider call through the tape for the current mode.
+
+    ``encode``/``decode`` convert the result to and from JSON-safe values.
+    """
+    mode = offline_mode()
+    tape = get_tape()
+
+    if mode == "replay":
+        value, elapsed = tape.load(kind, key)
+        if settings.offline_replay_timing:
+            time.sleep(elapsed)
+        return decode(value) if decode else value
+
+    started = time.perf_counter()
+    result = call()
+    if mode == "record":
+        tape.save(kind, key, encode(result) if encode else result, time.perf_counter() - started)
+    return result
+
+
+async def ataped(kind: str, key: str, call, encode=None, decode=None) -> Any:
+    """``taped`` for coroutine calls; tape files are read and written off the loop."""
+    mode = offline_mode()
+    tape = get_tape()
+
+    if mode == "replay":
+        value, elapsed = await asyncio.to_thread(tape.load, kind, key)
+        if settings.offline_replay_timing:
+            await asyncio.sleep(elapsed)
+        return decode(value) if decode else value
+
+    started = time.perf_counter()
+    result = await call()
+    if mode == "record":
+        await asyncio.to_thread(tape.save, kind, key, encode(result) if encode else result, time.perf_counter() - started)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Synthetic content
+# ---------------------------------------------------------------------------
+
+def fake_sentence(rng: random.Random, words: int = 8) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def fake_paragraph(rng: random.Random, tokens: int) -> str:
+    sentences = []
+    while sum(len(s.split()) for s in sentences) < tokens * 3 // 4:
+        sentences.append(fake_sentence(rng, rng.randint(6, 14)))
+    return " ".join(sentences)
+
+
+# Field names whose values other fields refer to, so synthetic plans stay
+# internally consistent (edges point at real node ids, answers at real keys).
+NAMED_FIELDS = {
+    "id": lambda index: f"n{index + 1}",
+    "root_node_id": lambda index: "n1",
+    "source": lambda index: f"n{index // 2 + 1}",
+    "target": lambda index: f"n{index + 2}",
+    "key": lambda index: "abcd"[index % 4],
+    "correct_answer": lambda index: "a",
+}
+
+
+def _length_bounds(field) -> tuple[Optional[int], Optional[int]]:
+    low = high = None
+    for constraint in getattr(field, "metadata", []):
+        low = getattr(constraint, "min_length", low)
+        high = getattr(constraint, "max_length", high)
+    return low, high
+
+
+def _number_bounds(field) -> tuple[float, float]:
+    low, high = 0, 10
+    for constraint in getattr(field, "metadata", []):
+        low = getattr(constraint, "ge", getattr(constraint, "gt", low))
+        high = getattr(constraint, "le", getattr(constraint, "lt", high))
+    return low, high
+
+
+def _fake_value(annotation: Any, name: str, field, rng: random.Random, index: int, depth: int) -> Any:
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is typing.Annotated:
+        return _fake_value(args[0], name, field, rng, index, depth)
+    if origin in (typing.Union, types.UnionType):
+        options = [arg for arg in args if arg is not type(None)]
+        return _fake_value(options[0], name, field, rng, index, depth) if options else None
+    if origin is typing.Literal:
+        return args[index % len(args)]
+    if origin in (list, set, tuple, frozenset):
+        item = args[0] if args else str
+        low, high = _length_bounds(field)
+        count = settings.fake_list_length if depth == 0 else max(2, settings.fake_list_length // 2)
+        if name == "options":
+            count = 4
+        count = max(low or 0, min(count, high or count))
+        return [_fake_value(item, name, None, rng, i, depth + 1) for i in range(count)]
+    if origin is dict:
+        return {f"{rng.choice(WORDS)}_{i}": _fake_value(args[1] if args else str, name, None, rng, i, depth + 1)
+                for i in range(2)}
+
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return fake_object(annotation, rng, index, depth + 1)
+        if issubclass(annotation, enum.Enum):
+            members = list(annotation)
+            return members[index % len(members)].value
+        if issubclass(annotation, bool):
+            return rng.random() < 0.5
+        if issubclass(annotation, int):
+            low, high = _number_bounds(field)
+            return rng.randint(int(low), int(max(low, min(high, 60))))
+        if issubclass(annotation, float):
+            low, high = _number_bounds(field)
+            return round(rng.uniform(low, min(high, low + 1)), 3)
+
+    if name in NAMED_FIELDS:
+        return NAMED_FIELDS[name](index)
+    low, high = _length_bounds(field)
+    text = fake_sentence(rng, rng.randint(4, 10) if depth else rng.randint(3, 6))
+    if low and len(text) < low:
+        text = text + " " + fake_paragraph(rng, low)
+    return text[:high] if high else text
+
+
+def fake_object(schema: Type[BaseModel], rng: random.Random, index: int = 0, depth: int = 0) -> dict:
+    return {
+        name: _fake_value(field.annotation, name, field, rng, index, depth)
+        for name, field in schema.model_fields.items()
+    }
+
+
+def fake_structured(schema: Type[BaseModel], seed: Any) -> BaseModel:
+    """A schema-valid instance of ``schema``, deterministic for ``seed``."""
+    return schema.model_validate(fake_object(schema, seeded_random("structured", schema.__name__, seed)))
+
+
+def fake_reply(messages: list, max_tokens: int) -> str:
+    prompt = "\n".join(str(message.content) for message in messages)
+    rng = seeded_random("text", prompt)
+    body = fake_paragraph(rng, min(max_tokens, settings.fake_llm_output_tokens))
+
+    if "<REACT_CODE>" in prompt:
+        return f"<REACT_CODE>\n() => {{\n  return <div>{body}</div>;\n}}\n</REACT_CODE>"
+    if "JSON" in prompt and "array" in prompt.lower():
+        return json.dumps([fake_sentence(rng, 3).rstrip(".") for _ in range(settings.fake_list_length)])
+    return body
+
+
+def _usage(messages: list, text: str) -> dict:
+    input_tokens = sum(count_tokens(str(message.content)) for message in messages)
+    output_tokens = count_tokens(text)
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+class FakeChatModel:
+    """Chat-model stand-in exposing the calls LLMService makes."""
+
+    def __init__(self, max_tokens: int = 4096):
+        self.max_tokens = max_tokens
+
+    def _delay(self, *seed: Any) -> float:
+        return sample_latency(settings.fake_llm_latency, seeded_random("latency", *seed))
+
+    async def ainvoke(self, messages: list) -> AIMessage:
+        text = fake_reply(messages, self.max_tokens)
+        await asyncio.sleep(self._delay(text))
+        return AIMessage(content=text, usage_metadata=_usage(messages, text))
+
+    async def astream(self, messages: list) -> AsyncIterator[AIMessageChunk]:
+        text = fake_reply(messages, self.max_tokens)
+        words = text.split(" ")
+        step = self._delay(text) / max(1, len(words))
+        for i, word in enumerate(words):
+            await asyncio.sleep(step)
+            yield AIMessageChunk(content=word if i == 0 else " " + word)
+        yield AIMessageChunk(content="", usage_metadata=_usage(messages, text))
+
+    def with_structured_output(self, schema: Type[BaseModel], include_raw: bool = False):
+        return FakeStructuredModel(self, schema, include_raw)
+
+
+class FakeStructuredModel:
+    def __init__(self, model: FakeChatModel, schema: Type[BaseModel], include_raw: bool):
+        self.model = model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    async def ainvoke(self, messages: list):
+        prompt = "\n".join(str(message.content) for message in messages)
+        parsed = fake_structured(self.schema, prompt)
+        text = parsed.model_dump_json()
+        await asyncio.sleep(self.model._delay(text))
+        if not self.include_raw:
+            return parsed
+        raw = AIMessage(content=text, usage_metadata=_usage(messages, text))
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+
+class TapeChatModel:
+    """Records a chat model's responses, or replays them without a model."""
+
+    def __init__(self, llm, key_parts: dict):
+        self.llm = llm
+        self.key_parts = key_parts
+
+    def _key(self, kind: str, messages: list, schema: Type[BaseModel] = None) -> str:
+        return make_cache_key(
+            kind=kind,
+            messages=[(message.type, message.content) for message in messages],
+            schema=schema.model_json_schema() if schema else None,
+            **self.key_parts,
+        )
+
+    async def ainvoke(self, messages: list) -> AIMessage:
+        return await ataped(
+            "llm",
+            self._key("text", messages),
+            lambda: self.llm.ainvoke(messages),
+            encode=lambda message: {"content": message.content, "usage_metadata": message.usage_metadata},
+            decode=lambda value: AIMessage(**value),
+        )
+
+    async def astream(self, messages: list) -> AsyncIterator[AIMessageChunk]:
+        key = self._key("text", messages)
+        if offline_mode() == "replay":
+            message = await self.ainvoke(messages)
+            yield AIMessageChunk(content=message.content, usage_metadata=message.usage_metadata)
+            return
+
+        started = time.perf_counter()
+        parts = []
+        usage = None
+        async for chunk in self.llm.astream(messages):
+            if isinstance(chunk.content, str):
+                parts.append(chunk.content)
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            yield chunk
+
+        value = {"content": "".join(parts), "usage_metadata": usage}
+        await asyncio.to_thread(get_tape().save, "llm", key, value, time.perf_counter() - started)
+
+    def with_structured_output(self, schema: Type[BaseModel], include_raw: bool = False):
+        return TapeStructuredModel(self, schema, include_raw)
+
+
+class TapeStructuredModel:
+    def __init__(self, tape_model: TapeChatModel, schema: Type[BaseModel], include_raw: bool):
+        self.tape_model = tape_model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def _encode(self, response) -> dict:
+        if not self.include_raw:
+            return {"parsed": response.model_dump(mode="json")}
+        raw = response["raw"]
+        parsed = response["parsed"]
+        return {
+            "raw": {"content": raw.content, "tool_calls": raw.tool_calls, "usage_metadata": raw.usage_metadata},
+            "parsed": parsed.model_dump(mode="json") if parsed is not None else None,
+            "parsing_error": str(response["parsing_error"]) if response["parsing_error"] else None,
+        }
+
+    def _decode(self, value: dict):
+        parsed = self.schema.model_validate(value["parsed"]) if value["parsed"] is not None else None
+        if not self.include_raw:
+            return parsed
+        error = value.get("parsing_error")
+        return {
+            "raw": AIMessage(**value["raw"]),
+            "parsed": parsed,
+            "parsing_error": ValueError(error) if error else None,
+        }
+
+    async def ainvoke(self, messages: list):
+        runnable = None if offline_mode() == "replay" else self.tape_model.llm.with_structured_output(
+            self.schema, include_raw=self.include_raw
+        )
+        return await ataped(
+            "llm",
+            self.tape_model._key("structured", messages, self.schema),
+            lambda: runnable.ainvoke(messages),
+            encode=self._encode,
+            decode=self._decode,
+        )
+
+
+def fake_transcript(video_id: str) -> dict:
+    """A transcript in the shape of ``get_transcript_with_timestamps``."""
+    rng = seeded_random("transcript", video_id)
+    segments = []
+    start = 0.0
+    for _ in range(settings.fake_transcript_segments):
+        duration = round(rng.uniform(2.0, 6.0), 2)
+        segments.append({"text": fake_sentence(rng, rng.randint(6, 16)), "start": start, "end": start + duration})
+        start += duration
+    return {"full_text": " ".join(segment["text"] for segment in segments), "segments": segments}
+
+
+def fake_job_listings(query: str, count: int) -> list[dict]:
+    rng = seeded_random("jobs", query)
+    slug = hashlib.md5(query.encode("utf-8")).hexdigest()[:8]
+    return [
+        {
+            "title": f"{rng.choice(WORDS).title()} {query}".strip(),
+            "company": f"{rng.choice(WORDS).title()} Labs",
+            "location": rng.choice(["Remote", "Bengaluru", "Berlin", "New York"]),
+            "description": fake_paragraph(rng, 120),
+            "apply_url": f"https://jobs.example.com/{slug}/{i}",
+            "source": "fake",
+        }
+        for i in range(count)
+    ]
+
+
+def fake_embedding(text: str) -> list[float]:
+    """A unit vector built by feature-hashing the words of ``text``.
+
+    Texts that share words get similar vectors, so fake retrieval still
+    ranks related chunks first.
+    """
+    vector = [0.0] * EMBEDDING_DIMENSIONS
+    for word in text.lower().split():
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        slot = int.from_bytes(digest[:4], "little") % EMBEDDING_DIMENSIONS
+        vector[slot] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def fake_embeddings(texts: list[str]) -> list[list[float]]:
+    time.sleep(sample_latency(settings.fake_embedding_latency, seeded_random("latency", "embedding", texts)))
+    return [fake_embedding(text) for text in texts]
+
+
+def fake_translation_response(payload: dict) -> dict:
+    """A Translate v2 API response that tags each text with its target language."""
+    texts = payload["q"] if isinstance(payload["q"], list) else [payload["q"]]
+    time.sleep(sample_latency(settings.fake_translation_latency, seeded_random("latency", "translation", payload)))
+    return {"data": {"translations": [
+        {"translatedText": f"[{payload['target']}] {text}"} for text in texts
+    ]}}
+
+
+# One silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, mono, 1152 samples.
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+MP3_FRAME_SECONDS = 1152 / 44100
+SPOKEN_CHARS_PER_SECOND = 15
+
+
+class FakeTTSResponse:
+    def __init__(self, audio_content: bytes):
+        self.audio_content = audio_content
+
+
+class FakeTTSClient:
+    """Stand-in for ``texttospeech.TextToSpeechClient``: silent MP3 as long as the text would take to read."""
+
+    def synthesize_speech(self, input, voice, audio_config) -> FakeTTSResponse:
+        text = input.text
+        time.sleep(sample_latency(settings.fake_tts_latency, seeded_random("latency", "tts", text)))
+        seconds = max(1.0, len(text) / SPOKEN_CHARS_PER_SECOND)
+        return FakeTTSResponse(MP3_FRAME * math.ceil(seconds / MP3_FRAME_SECONDS))
+
+
+class TapeTTSClient:
+    def __init__(self, client):
+        self.client = client
+
+    def synthesize_speech(self, input, voice, audio_config):
+        key = make_cache_key(
+            text=input.text,
+            language_code=voice.language_code,
+            voice=voice.name,
+            encoding=int(audio_config.audio_encoding),
+            speaking_rate=audio_config.speaking_rate,
+        )
+        return taped(
+            "tts",
+            key,
+            lambda: self.client.synthesize_speech(input=input, voice=voice, audio_config=audio_config),
+            encode=lambda response: base64.b64encode(response.audio_content).decode("ascii"),
+            decode=lambda value: FakeTTSResponse(base64.b64decode(value)),
+        )
+
+
+def fake_png(width: int, height: int, color: tuple[int, int, int]) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(color) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+class FakeImage:
+    def __init__(self, image_bytes: bytes):
+        self._image_bytes = image_bytes
+
+
+class FakeImageModel:
+    """Stand-in for Imagen's ``ImageGenerationModel``: a flat-colour PNG per prompt."""
+
+    def generate_images(self, prompt: str, number_of_images: int = 1, aspect_ratio: str = "1:1") -> list[FakeImage]:
+        rng = seeded_random("image", prompt)
+        time.sleep(sample_latency(settings.fake_image_latency, rng))
+        ratio_w, ratio_h = (int(part) for part in aspect_ratio.split(":"))
+        width = 256
+        height = width * ratio_h // ratio_w
+        return [
+            FakeImage(fake_png(width, height, tuple(rng.randrange(256) for _ in range(3))))
+            for _ in range(number_of_images)
+        ]
+
+
+class TapeImageModel:
+    def __init__(self, model_factory):
+        self.model_factory = model_factory
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            self._model = self.model_factory()
+        return self._model
+
+    def generate_images(self, prompt: str, number_of_images: int = 1, aspect_ratio: str = "1:1") -> list[FakeImage]:
+        key = make_cache_key(prompt=prompt, number_of_images=number_of_images, aspect_ratio=aspect_ratio, model=settings.imagen_model)
+        return taped(
+            "image",
+            key,
+            lambda: self._get_model().generate_images(
+                prompt=prompt, number_of_images=number_of_images, aspect_ratio=aspect_ratio
+            ),
+            encode=lambda images: [base64.b64encode(image._image_bytes).decode("ascii") for image in images],
+            decode=lambda values: [FakeImage(base64.b64decode(value)) for value in values],
+        )
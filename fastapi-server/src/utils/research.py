@@ -3,9 +3,17 @@ from tavily import TavilyClient
 
 from src.config.settings import settings
 from src.models.research_schemas import ResearchResource, ResearchResult
+from src.utils.tokens import budget_share, pack_to_budget, truncate_to_tokens
 
 
 class ResearchService:
+    # Shares of the model's prompt budget (see budget_share)
+    CONTEXT_SHARE = 0.016
+    SOURCE_SHARE = 0.001
+    SUMMARY_SHARE = 0.001
+    # Resource snippets are shown to users, not sent to the model
+    SNIPPET_TOKENS = 75
+
     def __init__(self):
         if not settings.tavily_api_key:
             raise ValueError("TAVILY_API_KEY environment variable is required")
@@ -37,7 +45,7 @@ class ResearchService:
                     resources.append(ResearchResource(
                         title=result.get("title", ""),
                         url=result.get("url", ""),
-                        snippet=result.get("content", "")[:300]
+                        snippet=truncate_to_tokens(result.get("content", ""), self.SNIPPET_TOKENS)
                     ))
             except Exception as e:
                 print(f"⚠️ Research query failed: {query} - {str(e)}")
@@ -99,10 +107,11 @@ class ResearchService:
             
             for result in response.get("results", [])[:3]:
                 content_parts.append(
-                    f"Source: {result.get('title', 'Unknown')}\n{result.get('content', '')[:500]}"
+                    f"Source: {result.get('title', 'Unknown')}\n{truncate_to_tokens(result.get('content', ''), budget_share(self.SOURCE_SHARE))}"
                 )
         
-        return "\n\n---\n\n".join(content_parts)[:8000]  
+        separator = "\n\n---\n\n"
+        return separator.join(pack_to_budget(content_parts, budget_share(self.CONTEXT_SHARE), separator, truncate_last=True))
     
     def _extract_facts(self, results: List[dict]) -> List[str]:
         facts = []
@@ -141,7 +150,7 @@ class ResearchService:
                 summaries.append(response["answer"])
         
         if summaries:
-            return summaries[0][:500]  
+            return truncate_to_tokens(summaries[0], budget_share(self.SUMMARY_SHARE))
         return ""
 
 _research_service_instance: Optional[ResearchService] = None
@@ -0,0 +1,46 @@
+import json
+from typing import AsyncIterator, Optional
+
+from fastapi.responses import StreamingResponse
+
+
+def format_sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_response(stream: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+async def stream_chat_events(chunks: AsyncIterator[str], on_complete=None) -> AsyncIterator[str]:
+    """Relay text chunks as ``token`` events and finish with ``done``.
+
+    ``on_complete`` receives the full text and may return extra fields for
+    the ``done`` event (e.g. the id of the persisted message). Failures are
+    reported as an ``error`` event since the response has already started.
+    """
+    parts = []
+    try:
+        async for chunk in chunks:
+            if chunk:
+                parts.append(chunk)
+                yield format_sse("token", {"text": chunk})
+
+        message = "".join(parts).strip()
+        extra = await on_complete(message) if on_complete else None
+        yield format_sse("done", {"message": message, **(extra or {})})
+    except Exception as e:
+        print(f"Chat stream failed: {e}")
+        yield format_sse("error", {"error": str(e)})
@@ -0,0 +1,132 @@
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from src.config.settings import settings
+
+
+# Context window per model, in tokens. Unknown models get DEFAULT_CONTEXT_TOKENS.
+MODEL_CONTEXT_TOKENS = {
+    "llama-3.3-70b-versatile": 131072,
+    "llama-3.1-8b-instant": 131072,
+    "qwen/qwen3-32b": 131072,
+    "gemini-2.0-flash": 1048576,
+    "gemini-2.5-flash": 1048576,
+}
+DEFAULT_CONTEXT_TOKENS = 32768
+
+# Characters per token when no tokenizer could be loaded.
+FALLBACK_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """The shared ``tokenizers`` tokenizer, or None if it can't be loaded.
+
+    ``TOKENIZER_NAME`` (a Hugging Face Hub id, downloaded on first use) is
+    an explicit override; otherwise ``TOKENIZER_PATH`` is loaded, which
+    defaults to the tokenizer.json bundled next to this module. Without
+    either, counts fall back to a characters-per-token estimate.
+    """
+    try:
+        from tokenizers import Tokenizer
+
+        if settings.tokenizer_name:
+            return Tokenizer.from_pretrained(settings.tokenizer_name)
+        if settings.tokenizer_path:
+            return Tokenizer.from_file(settings.tokenizer_path)
+    except Exception as e:
+        print(f"Tokenizer unavailable, estimating token counts: {e}")
+    return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "") -> str:
+    """Cut ``text`` to at most ``max_tokens`` tokens, appending ``marker`` if cut."""
+    if not text or max_tokens <= 0:
+        return ""
+
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        max_chars = max_tokens * FALLBACK_CHARS_PER_TOKEN
+        return text if len(text) <= max_chars else text[:max_chars] + marker
+
+    encoding = tokenizer.encode(text, add_special_tokens=False)
+    if len(encoding.ids) <= max_tokens:
+        return text
+    end = encoding.offsets[max_tokens - 1][1]
+    return text[:end] + marker
+
+
+def pack_to_budget(
+    items: Iterable[str],
+    max_tokens: int,
+    separator: str = "\n\n",
+    truncate_last: bool = False
+) -> list[str]:
+    """Take items in order while they fit in ``max_tokens`` (separators included).
+
+    With ``truncate_last`` the first item that doesn't fit is cut to the
+    remaining budget instead of being dropped.
+    """
+    packed = []
+    used = 0
+    separator_tokens = count_tokens(separator)
+
+    for item in items:
+        cost = count_tokens(item) + (separator_tokens if packed else 0)
+        if used + cost <= max_tokens:
+            packed.append(item)
+            used += cost
+            continue
+        if truncate_last:
+            remaining = max_tokens - used - (separator_tokens if packed else 0)
+            if remaining > 0:
+                packed.append(truncate_to_tokens(item, remaining))
+        break
+
+    return packed
+
+
+def pack_greedy(items: list[str], max_tokens: int, separator: str = "\n\n") -> list[int]:
+    """Indices of ``items`` to keep, in order, so the joined text is at most ``max_tokens``.
+
+    Unlike pack_to_budget, an item that doesn't fit is skipped and later
+    (shorter) items are still tried. The joined text is counted each time, so
+    the budget holds exactly even where tokens merge across the separator.
+    """
+    chosen: list[int] = []
+    packed: list[str] = []
+    for i, item in enumerate(items):
+        if count_tokens(separator.join(packed + [item])) <= max_tokens:
+            chosen.append(i)
+            packed.append(item)
+    return chosen
+
+
+def context_budget(model: Optional[str] = None, max_output_tokens: int = 4096, reserved_tokens: int = 1024) -> int:
+    """Tokens left for prompt content after the reply and fixed prompt text."""
+    window = MODEL_CONTEXT_TOKENS.get(model or settings.groq_model, DEFAULT_CONTEXT_TOKENS)
+    return max(0, window - max_output_tokens - reserved_tokens)
+
+
+def budget_share(fraction: float, model: Optional[str] = None) -> int:
+    """``fraction`` of ``context_budget(model)``, for prompt parts sized relative to the window."""
+    return max(1, int(context_budget(model) * fraction))
+
+
+def fit_to_budget(
+    text: str,
+    max_tokens: int,
+    model: Optional[str] = None,
+    marker: str = "\n\n[Content truncated]"
+) -> str:
+    """Truncate to ``max_tokens``, never exceeding what the model's window leaves for content."""
+    return truncate_to_tokens(text, min(max_tokens, context_budget(model)), marker)
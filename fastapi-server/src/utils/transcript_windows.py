@@ -0,0 +1,80 @@
+import re
+from typing import List, Optional
+
+from src.config.settings import settings
+from src.utils.tokens import count_tokens
+
+
+SENTENCE_END = re.compile(r"[.!?…][\"'”’)\]]*$")
+
+
+def ends_sentence(text: str) -> bool:
+    return bool(SENTENCE_END.search(text))
+
+
+def merge_into_windows(
+    segments: List[dict],
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None
+) -> List[dict]:
+    """Merge transcript snippets into overlapping windows of about ``max_tokens``.
+
+    A window closes at the last snippet that ends a sentence once it is at
+    least half full, or at the budget when the transcript has no punctuation.
+    The next window starts up to ``overlap_tokens`` earlier, at a sentence
+    start if one falls in that range. Snippets are never split, so a single
+    snippet over budget becomes its own window. Each window keeps the start
+    time of its first snippet and the end time of its last.
+    """
+    max_tokens = max_tokens or settings.video_window_tokens
+    overlap_tokens = settings.video_window_overlap_tokens if overlap_tokens is None else overlap_tokens
+
+    items = []
+    for position, seg in enumerate(segments):
+        text = (seg.get("text") or "").strip()
+        if text:
+            items.append((seg, text, count_tokens(text), seg.get("index", position)))
+    if not items:
+        return []
+
+    offsets = [0]
+    for _, _, tokens, _ in items:
+        offsets.append(offsets[-1] + tokens)
+
+    windows = []
+    start = 0
+    while start < len(items):
+        end = start + 1
+        while end < len(items) and offsets[end + 1] - offsets[start] <= max_tokens:
+            end += 1
+
+        if end < len(items):
+            for boundary in range(end - 1, start, -1):
+                if offsets[boundary + 1] - offsets[start] < max_tokens // 2:
+                    break
+                if ends_sentence(items[boundary][1]):
+                    end = boundary + 1
+                    break
+
+        window = items[start:end]
+        windows.append({
+            "text": " ".join(text for _, text, _, _ in window),
+            "start_time": window[0][0].get("start_time", 0),
+            "end_time": window[-1][0].get("end_time", 0),
+            "index": len(windows),
+            "first_segment": window[0][3],
+            "last_segment": window[-1][3],
+        })
+        if end >= len(items):
+            break
+
+        next_start = end
+        while next_start - 1 > start and offsets[end] - offsets[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+        for candidate in range(next_start, end):
+            if ends_sentence(items[candidate - 1][1]):
+                next_start = candidate
+                break
+        start = next_start
+
+    return windows
@@ -1,10 +1,29 @@
 import asyncio
 import json
+import re
 import urllib.request
 import urllib.parse
 import urllib.error
-from typing import List, Optional
+from collections import deque
+from typing import Any, AsyncIterator, List, Optional
 from src.config.settings import settings
+from src.utils.llm_cache import make_cache_key
+from src.utils.offline import fake_translation_response, is_fake, needs_credentials, offline_mode, taped
+
+
+# Whitespace after sentence-ending punctuation, or a line break.
+SENTENCE_BOUNDARY = re.compile(r"((?<=[.!?])\s+|\n+)")
+
+COURSE_CONTENT_FIELDS = frozenset({
+    "title",
+    "summary",
+    "description",
+    "paragraphs",
+    "bullets",
+    "tip",
+    "key_takeaways",
+})
+
 
 class TranslationService:
     SUPPORTED_LANGUAGES = [
@@ -29,10 +48,13 @@ class TranslationService:
     TRANSLATE_URL = "https://translation.googleapis.com/language/translate/v2"
     
     MAX_CHUNK_SIZE = 4500
+
+    MAX_BATCH_SEGMENTS = 128
+    MAX_REQUEST_CHARS = 5000
     
     def __init__(self):
         self.api_key = settings.google_cloud_api
-        if not self.api_key:
+        if needs_credentials() and not self.api_key:
             raise ValueError("GOOGLE_CLOUD_API environment variable is required")
     
     def get_supported_languages(self) -> List[dict]:
@@ -46,10 +68,21 @@ class TranslationService:
         payload: dict,
         format_type: str = "text"
     ) -> dict:
-        url = f"{self.TRANSLATE_URL}?key={self.api_key}"
-
         payload["format"] = format_type
 
+        if is_fake():
+            return fake_translation_response(payload)
+        if offline_mode():
+            return taped(
+                "translation",
+                make_cache_key(**payload),
+                lambda: self._post_sync(payload)
+            )
+        return self._post_sync(payload)
+
+    def _post_sync(self, payload: dict) -> dict:
+        url = f"{self.TRANSLATE_URL}?key={self.api_key}"
+
         data = json.dumps(payload).encode("utf-8")
         req = urllib.request.Request(
             url,
@@ -136,6 +169,26 @@ class TranslationService:
             "text"
         )
     
+    def _pack_requests(self, texts: List[str]) -> List[List[int]]:
+        packs = []
+        current = []
+        current_chars = 0
+
+        for i, text in enumerate(texts):
+            if current and (
+                len(current) >= self.MAX_BATCH_SEGMENTS
+                or current_chars + len(text) > self.MAX_REQUEST_CHARS
+            ):
+                packs.append(current)
+                current = []
+                current_chars = 0
+            current.append(i)
+            current_chars += len(text)
+
+        if current:
+            packs.append(current)
+        return packs
+
     async def translate_batch(
         self, 
         texts: List[str], 
@@ -150,22 +203,76 @@ class TranslationService:
         
         if not non_empty_texts:
             return texts
+
+        packs = self._pack_requests(non_empty_texts)
  
         loop = asyncio.get_event_loop()
-        translated = await loop.run_in_executor(
-            None,
-            self._translate_batch_sync,
-            non_empty_texts,
-            target_lang,
-            source_lang,
-            "text"
-        )
+        pack_results = await asyncio.gather(*[
+            loop.run_in_executor(
+                None,
+                self._translate_batch_sync,
+                [non_empty_texts[i] for i in pack],
+                target_lang,
+                source_lang,
+                "text"
+            )
+            for pack in packs
+        ])
 
         result = texts.copy()
-        for idx, translation in zip(non_empty_indices, translated):
-            result[idx] = translation
+        for pack, translated in zip(packs, pack_results):
+            for i, translation in zip(pack, translated):
+                result[non_empty_indices[i]] = translation
         
         return result
+
+    async def translate_fields(
+        self,
+        data: Any,
+        fields: frozenset,
+        target_lang: str,
+        source_lang: str = "en"
+    ) -> Any:
+        """Translate, in place, every string stored under one of ``fields``.
+
+        Walks nested dicts and lists, gathers all matching strings (or lists of
+        strings) into a single ``translate_batch`` call and writes the
+        translations back, so a whole chapter costs a few requests instead of
+        one per paragraph.
+        """
+        if target_lang == "en" or target_lang == source_lang:
+            return data
+
+        slots = []
+        self._collect_fields(data, fields, slots)
+        if not slots:
+            return data
+
+        translated = await self.translate_batch(
+            [container[key] for container, key in slots],
+            target_lang,
+            source_lang
+        )
+
+        for (container, key), text in zip(slots, translated):
+            container[key] = text
+
+        return data
+
+    def _collect_fields(self, node: Any, fields: frozenset, slots: list, selected: bool = False) -> None:
+        if isinstance(node, dict):
+            entries = [(key, value, key in fields) for key, value in node.items()]
+        elif isinstance(node, list):
+            entries = [(i, value, selected) for i, value in enumerate(node)]
+        else:
+            return
+
+        for key, value, wanted in entries:
+            if isinstance(value, str):
+                if wanted and value.strip():
+                    slots.append((node, key))
+            else:
+                self._collect_fields(value, fields, slots, wanted)
     
     async def translate_chunked(
         self, 
@@ -208,6 +315,57 @@ class TranslationService:
         translated_chunks = await self.translate_batch(chunks, target_lang, source_lang)
 
         return "\n\n".join(translated_chunks)
+
+    async def translate_stream(
+        self,
+        chunks: AsyncIterator[str],
+        target_lang: str,
+        source_lang: str = "en"
+    ) -> AsyncIterator[str]:
+        """Translate streamed text one completed sentence at a time.
+
+        Each sentence is sent for translation as soon as it ends, while the
+        source stream keeps flowing; results are yielded in order.
+        """
+        if target_lang == "en" or target_lang == source_lang:
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        pending: deque = deque()
+        buffer = ""
+
+        def submit(text: str) -> None:
+            for i, part in enumerate(SENTENCE_BOUNDARY.split(text)):
+                if i % 2:
+                    pending.append(part)
+                elif part:
+                    pending.append(asyncio.create_task(self.translate(part, target_lang, source_lang)))
+
+        async def drain(wait: bool):
+            while pending and (wait or isinstance(pending[0], str) or pending[0].done()):
+                head = pending.popleft()
+                yield head if isinstance(head, str) else await head
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                boundaries = list(SENTENCE_BOUNDARY.finditer(buffer))
+                if boundaries:
+                    end = boundaries[-1].end()
+                    submit(buffer[:end])
+                    buffer = buffer[end:]
+                async for text in drain(wait=False):
+                    yield text
+
+            if buffer:
+                submit(buffer)
+            async for text in drain(wait=True):
+                yield text
+        finally:
+            for item in pending:
+                if not isinstance(item, str):
+                    item.cancel()
     
     async def translate_html(
         self, 
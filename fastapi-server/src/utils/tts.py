@@ -4,6 +4,8 @@ import hashlib
 from typing import Optional
 from google.cloud import texttospeech
 
+from src.utils.offline import FakeTTSClient, TapeTTSClient, is_fake, needs_credentials, offline_mode
+
 logger = logging.getLogger(__name__)
 
 LANGUAGE_VOICE_MAP = {
@@ -46,7 +48,12 @@ class TTSService:
         self.client = None
         self._init_error = None
         try:
-            self.client = texttospeech.TextToSpeechClient()
+            if is_fake():
+                self.client = FakeTTSClient()
+            elif offline_mode():
+                self.client = TapeTTSClient(texttospeech.TextToSpeechClient() if needs_credentials() else None)
+            else:
+                self.client = texttospeech.TextToSpeechClient()
             logger.info("TTS service initialized successfully")
         except Exception as e:
             self._init_error = str(e)
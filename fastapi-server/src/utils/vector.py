@@ -1,53 +1,260 @@
-from typing import List, Optional
-import chromadb
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+import numpy as np
 import chromadb.utils.embedding_functions as ef
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 
 from src.config.settings import settings
+from src.utils.bm25 import get_bm25_store, reciprocal_rank_fusion
+from src.utils.embedding_cache import EmbeddingCache, get_embedding_cache, text_hash
+from src.utils.llm_cache import make_cache_key
+from src.utils.offline import fake_embeddings, get_tape, is_fake, needs_credentials, offline_mode
+from src.utils.tokens import pack_greedy, truncate_to_tokens
 
 
-class VectorService:
-    def __init__(self):
-        if not (settings.chroma_api_key and settings.chroma_tenant and settings.chroma_database):
-            raise ValueError(
-                "Chroma Cloud credentials required. Set CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE"
-            )
-        
-        self.client = chromadb.HttpClient(
-            host="api.trychroma.com",
-            ssl=True,
-            headers={
-                "x-chroma-token": settings.chroma_api_key,
-            },
-            tenant=settings.chroma_tenant,
-            database=settings.chroma_database
+EMBEDDING_MODEL = "gemini-embedding-001"
+
+R = TypeVar("R")
+
+
+class VectorTimeout(TimeoutError):
+    pass
+
+
+class VectorIngestError(RuntimeError):
+    def __init__(self, video_id: str, indexed: int, failed: int):
+        super().__init__(f"{failed} of {indexed + failed} segments of video {video_id} could not be indexed")
+        self.indexed = indexed
+        self.failed = failed
+
+
+_vector_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_vector_executor() -> ThreadPoolExecutor:
+    global _vector_executor
+    if _vector_executor is None:
+        _vector_executor = ThreadPoolExecutor(
+            max_workers=settings.vector_max_workers,
+            thread_name_prefix="vector"
         )
-        print(f"Connected to Chroma Cloud (tenant: {settings.chroma_tenant[:8]}...)")
+    return _vector_executor
+
+
+async def run_blocking(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Run a blocking Chroma or embedding call on the vector thread pool.
+
+    Raises VectorTimeout after ``vector_timeout_seconds``. The worker thread
+    cannot be interrupted, so a timed-out call still finishes in the background.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(get_vector_executor(), partial(fn, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout=settings.vector_timeout_seconds)
+    except asyncio.TimeoutError:
+        name = getattr(fn, "__name__", type(fn).__name__)
+        raise VectorTimeout(f"{name} took longer than {settings.vector_timeout_seconds}s")
+
+
+class FakeEmbeddingFunction(EmbeddingFunction[Documents]):
+    def __init__(self):
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return fake_embeddings(list(input))
+
+
+class TapeEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Records embeddings per text, or replays them without calling the API."""
+
+    def __init__(self, embedding_fn: Optional[EmbeddingFunction]):
+        self.embedding_fn = embedding_fn
+
+    def __call__(self, input: Documents) -> Embeddings:
+        tape = get_tape()
+        keys = [make_cache_key(model=EMBEDDING_MODEL, text=text) for text in input]
+        if offline_mode() == "replay":
+            return [tape.load("embedding", key)[0] for key in keys]
+
+        embeddings = self.embedding_fn(input)
+        for key, embedding in zip(keys, embeddings):
+            tape.save("embedding", key, [float(value) for value in embedding], 0.0)
+        return embeddings
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Serves embeddings from the shared cache and sends only the misses to the API.
+
+    Delegates name and config to the wrapped function so Chroma sees the same
+    embedding function as before on existing collections.
+    """
+
+    def __init__(self, embedding_fn: EmbeddingFunction, cache: EmbeddingCache, model: str = EMBEDDING_MODEL):
+        self.embedding_fn = embedding_fn
+        self.cache = cache
+        self.model = model
+
+    def _cached(self, input: Documents, model: str, embed) -> Embeddings:
+        hashes = [text_hash(text) for text in input]
+        found = self.cache.get_many(model, list(dict.fromkeys(hashes)))
+
+        missing = {}
+        for h, text in zip(hashes, input):
+            if h not in found and h not in missing:
+                missing[h] = text
+        if missing:
+            computed = embed(list(missing.values()))
+            fresh = dict(zip(missing, computed))
+            self.cache.set_many(model, fresh)
+            found.update(fresh)
+
+        return [found[h] for h in hashes]
 
-        self.embedding_fn = ef.GoogleGenerativeAiEmbeddingFunction(
+    def __call__(self, input: Documents) -> Embeddings:
+        return self._cached(input, self.model, self.embedding_fn)
+
+    def embed_query(self, input: Documents) -> Embeddings:
+        # Query embeddings may differ from document ones, so they get their own keys
+        return self._cached(input, f"{self.model}:query", self.embedding_fn.embed_query)
+
+    def name(self) -> str:
+        return self.embedding_fn.name()
+
+    def get_config(self):
+        return self.embedding_fn.get_config()
+
+    def is_legacy(self) -> bool:
+        return self.embedding_fn.is_legacy()
+
+    def default_space(self):
+        return self.embedding_fn.default_space()
+
+    def supported_spaces(self):
+        return self.embedding_fn.supported_spaces()
+
+
+def get_embedding_function() -> Optional[EmbeddingFunction]:
+    """The Gemini embedding function, or its offline stand-in; None without an API key."""
+    if is_fake():
+        return FakeEmbeddingFunction()
+
+    embedding_fn = None
+    if needs_credentials() and settings.google_cloud_api:
+        embedding_fn = ef.GoogleGenerativeAiEmbeddingFunction(
             api_key=settings.google_cloud_api,
-            model_name="gemini-embedding-001"
+            model_name=EMBEDDING_MODEL
         )
-        
+    if offline_mode():
+        embedding_fn = TapeEmbeddingFunction(embedding_fn)
+
+    cache = get_embedding_cache()
+    if embedding_fn is not None and cache is not None:
+        embedding_fn = CachedEmbeddingFunction(embedding_fn, cache)
+    return embedding_fn
+
+
+def maximal_marginal_relevance(query_vector, vectors, lambda_mult: float = 0.7) -> List[int]:
+    """Order ``vectors`` by MMR: relevance to the query minus redundancy with those already picked.
+
+    ``lambda_mult`` of 1 is plain relevance order; lower values favour diversity.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if len(matrix) == 0:
+        return []
+
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = matrix @ query
+    redundancy = np.full(len(matrix), -np.inf, dtype=np.float32)
+    remaining = list(range(len(matrix)))
+    order = []
+
+    while remaining:
+        if order:
+            scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy[remaining]
+        else:
+            scores = relevance[remaining]
+        best = remaining.pop(int(np.argmax(scores)))
+        order.append(best)
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+
+    return order
+
+
+VIDEO_SEGMENTS_COLLECTION = "video_segments"
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+# In hybrid mode each retriever returns this many times the requested results before fusion
+HYBRID_OVERFETCH = 3
+
+
+class VectorService:
+    def __init__(self):
+        from src.utils.vector_store import get_vector_store
+
+        self.store = get_vector_store()
+        self.bm25 = get_bm25_store()
         self.collection_name = settings.chroma_collection
-        self._collection = None
-    
-    @property
-    def collection(self):
-        if self._collection is None:
-            self._collection = self.client.get_or_create_collection(
-                name=self.collection_name,
-                metadata={"description": "Lumina course documents"},
-                embedding_function=self.embedding_fn
-            )
-        return self._collection
+
+    async def _index_keywords(self, scope: str, ids: List[str], documents: List[str], metadatas: Optional[List[dict]]) -> None:
+        try:
+            await self.bm25.add(scope, ids, documents, metadatas)
+        except Exception as e:
+            print(f"[VectorService] Keyword index update failed for {scope}: {e}")
+
+    async def _drop_keywords(self, scope: str) -> None:
+        try:
+            await self.bm25.drop(scope)
+        except Exception as e:
+            print(f"[VectorService] Keyword index delete failed for {scope}: {e}")
+
+    async def _hybrid(
+        self,
+        scopes: List[str],
+        query_text: str,
+        dense_hits: List[dict],
+        n_results: int,
+        where: Optional[dict] = None
+    ) -> List[dict]:
+        """Fuse dense hits with each scope's BM25 hits by reciprocal rank fusion."""
+        from src.utils.vector_store import matches_where
+
+        try:
+            keyword_rankings = await asyncio.gather(*[
+                self.bm25.search(scope, query_text, n_results * HYBRID_OVERFETCH) for scope in scopes
+            ])
+        except Exception as e:
+            print(f"[VectorService] Keyword search failed for {', '.join(scopes)}: {e}")
+            return dense_hits[:n_results]
+
+        keyword_rankings = [
+            [hit for hit in hits if matches_where(hit["metadata"], where)] for hits in keyword_rankings
+        ]
+        hits_by_id = {hit["id"]: hit for hits in keyword_rankings for hit in hits}
+        hits_by_id.update({hit["id"]: hit for hit in dense_hits})
+
+        fused = reciprocal_rank_fusion(
+            [[hit["id"] for hit in dense_hits]] + [[hit["id"] for hit in hits] for hits in keyword_rankings]
+        )
+        return [{**hits_by_id[hit_id], "score": score} for hit_id, score in fused[:n_results]]
     
     async def add_documents(
         self,
         documents: List[str],
         metadatas: List[dict] = None,
         ids: List[str] = None,
-        course_id: str = None
+        course_id: str = None,
+        document_id: str = None
     ) -> List[str]:
+        """Store chunks for a course, or with ``document_id`` for one uploaded
+        document that isn't attached to a course yet. Each upload is its own
+        keyword scope, so a course built from it only loads that upload."""
         if not documents:
             return []
 
@@ -55,16 +262,25 @@ class VectorService:
             import uuid
             ids = [str(uuid.uuid4()) for _ in documents]
 
-        if course_id and metadatas:
-            metadatas = [{**m, "course_id": course_id} for m in metadatas]
-        elif course_id:
-            metadatas = [{"course_id": course_id} for _ in documents]
+        tags = {}
+        if course_id:
+            tags["course_id"] = course_id
+        if document_id:
+            tags["document_id"] = document_id
+        if tags:
+            metadatas = [{**m, **tags} for m in metadatas] if metadatas else [dict(tags) for _ in documents]
         
-        self.collection.add(
+        await self.store.add(
+            self.collection_name,
+            ids=ids,
             documents=documents,
             metadatas=metadatas,
-            ids=ids
+            collection_metadata={"description": "Lumina course documents"}
         )
+        if course_id:
+            await self._index_keywords(f"course:{course_id}", ids, documents, metadatas)
+        if document_id:
+            await self._index_keywords(f"upload:{document_id}", ids, documents, metadatas)
         
         return ids
     
@@ -72,77 +288,138 @@ class VectorService:
         self,
         query_text: str,
         n_results: int = 5,
-        course_id: str = None
+        course_id: str = None,
+        where: Optional[dict] = None,
+        mode: Optional[str] = None,
+        include_embeddings: bool = False,
+        document_ids: Optional[List[str]] = None
     ) -> List[dict]:
-        where_filter = None
+        """Dense search, or with ``mode="hybrid"`` dense and BM25 hits fused by
+        rank. Keyword search is per course or per uploaded document, so hybrid
+        needs a ``course_id`` or ``document_ids``.
+        """
+        scopes = []
+        clauses = [where] if where else []
         if course_id:
-            where_filter = {"course_id": course_id}
+            scopes.append(f"course:{course_id}")
+            clauses.append({"course_id": course_id})
+        if document_ids:
+            scopes.extend(f"upload:{document_id}" for document_id in document_ids)
+            clauses.append({"document_id": {"$in": list(document_ids)}})
+        where_filter = {"$and": clauses} if len(clauses) > 1 else (clauses[0] if clauses else None)
+        hybrid = (mode or settings.retrieval_mode) == "hybrid" and bool(scopes)
         
-        results = self.collection.query(
-            query_texts=[query_text],
-            n_results=n_results,
-            where=where_filter
+        hits = await self.store.query(
+            self.collection_name,
+            query_text,
+            n_results=n_results * HYBRID_OVERFETCH if hybrid else n_results,
+            where=where_filter,
+            include_embeddings=include_embeddings
         )
+        if hybrid:
+            hits = await self._hybrid(scopes, query_text, hits, n_results, where_filter)
 
         documents = []
-        if results["documents"] and results["documents"][0]:
-            for i, doc in enumerate(results["documents"][0]):
-                documents.append({
-                    "id": results["ids"][0][i] if results["ids"] else None,
-                    "content": doc,
-                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                    "distance": results["distances"][0][i] if results.get("distances") else None
-                })
-        
+        for hit in hits:
+            documents.append({
+                "id": hit["id"],
+                "content": hit["document"],
+                "metadata": hit["metadata"] or {},
+                "distance": hit.get("distance")
+            })
+            if include_embeddings:
+                documents[-1]["embedding"] = hit.get("embedding")
         return documents
     
     async def delete_by_course(self, course_id: str) -> int:
-        results = self.collection.get(
-            where={"course_id": course_id}
-        )
-        
-        if results["ids"]:
-            self.collection.delete(ids=results["ids"])
-            return len(results["ids"])
-        
-        return 0
+        ids = await self.store.get_ids(self.collection_name, where={"course_id": course_id})
+        await self.store.delete(self.collection_name, ids)
+        await self._drop_keywords(f"course:{course_id}")
+        return len(ids)
+
+    async def delete_by_document(self, document_id: str) -> int:
+        ids = await self.store.get_ids(self.collection_name, where={"document_id": document_id})
+        await self.store.delete(self.collection_name, ids)
+        await self._drop_keywords(f"upload:{document_id}")
+        return len(ids)
     
     async def get_context_for_topic(
         self,
         topic: str,
         course_id: str = None,
-        max_tokens: int = 2000
-    ) -> str:
-        results = await self.query(topic, n_results=5, course_id=course_id)
-        
-        context_parts = []
-        current_length = 0
-        
-        for doc in results:
-            content = doc["content"]
-            tokens = len(content.split()) / 0.75
-            
-            if current_length + tokens > max_tokens:
-                break
-            
-            context_parts.append(content)
-            current_length += tokens
-        
-        return "\n\n---\n\n".join(context_parts)
+        max_tokens: int = 2000,
+        document_ids: Optional[List[str]] = None
+    ) -> tuple[str, List[str]]:
+        """Context for a topic packed into ``max_tokens``, and the ids of the chunks used.
+
+        Over-fetches ``context_candidates`` chunks, orders them by maximal
+        marginal relevance so near-duplicates don't crowd out other material,
+        then packs greedily to the token budget.
+        """
+        results = await self.query(
+            topic,
+            n_results=settings.context_candidates,
+            course_id=course_id,
+            include_embeddings=True,
+            document_ids=document_ids
+        )
+        if not results:
+            return "", []
+
+        order = await self._selection_order(topic, results)
+        ranked = [results[i] for i in order]
+
+        chosen = pack_greedy([doc["content"] for doc in ranked], max_tokens, CONTEXT_SEPARATOR)
+        if not chosen:
+            first = ranked[0]
+            return truncate_to_tokens(first["content"], max_tokens), [first["id"]]
+
+        return (
+            CONTEXT_SEPARATOR.join(ranked[i]["content"] for i in chosen),
+            [ranked[i]["id"] for i in chosen]
+        )
+
+    async def _selection_order(self, topic: str, results: List[dict]) -> List[int]:
+        """Indexes of ``results`` in the order they should be packed.
+
+        Hits that carry their vector are ordered by MMR against the topic's
+        query embedding (the space retrieval ranked them in). Keyword-only
+        hits have no vector and follow in their fused order rather than being
+        embedded here. If the topic can't be embedded, retrieval order is
+        kept: the context is still usable, just less diverse.
+        """
+        dense = [i for i, doc in enumerate(results) if doc.get("embedding") is not None]
+        keyword_only = [i for i, doc in enumerate(results) if doc.get("embedding") is None]
+        if len(dense) < 2:
+            return list(range(len(results)))
+
+        embedding_fn = self.store.embedding_fn
+        if embedding_fn is None:
+            return list(range(len(results)))
+        try:
+            query_vector = (await run_blocking(embedding_fn.embed_query, [topic]))[0]
+        except Exception as e:
+            print(f"[VectorService] Topic embedding failed, keeping retrieval order: {e}")
+            return list(range(len(results)))
+
+        vectors = [results[i]["embedding"] for i in dense]
+        order = maximal_marginal_relevance(query_vector, vectors, settings.context_mmr_lambda)
+        return [dense[j] for j in order] + keyword_only
 
     async def add_video_segments(
         self,
         video_id: str,
-        segments: List[dict]
+        segments: List[dict],
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None
     ) -> int:
+        """Embed a video's segments in batches of ``vector_ingest_batch_size``.
+
+        Up to ``vector_ingest_concurrency`` batches run at once, and a failed
+        batch is retried on its own. ``on_progress(indexed, total)`` is awaited
+        after every batch. Raises VectorIngestError if a batch still fails.
+        """
         if not segments:
             return 0
-
-        video_collection = self.client.get_or_create_collection(
-            name="video_segments",
-            metadata={"description": "Video transcript segments for semantic search"},
-            embedding_function=self.embedding_fn
-        )
         
         documents = []
         metadatas = []
@@ -162,41 +439,89 @@ class VectorService:
             })
             ids.append(f"{video_id}_{i}")
         
-        if documents:
-            video_collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
+        if not documents:
+            return 0
+
+        batch_size = max(1, settings.vector_ingest_batch_size)
+        semaphore = asyncio.Semaphore(max(1, settings.vector_ingest_concurrency))
+        total = len(documents)
+        indexed = 0
+        failed = 0
+        succeeded = []
+
+        async def ingest(start: int) -> None:
+            nonlocal indexed, failed
+            end = start + batch_size
+            async with semaphore:
+                for attempt in range(settings.vector_ingest_retries + 1):
+                    try:
+                        await self.store.add(
+                            VIDEO_SEGMENTS_COLLECTION,
+                            ids=ids[start:end],
+                            documents=documents[start:end],
+                            metadatas=metadatas[start:end],
+                            collection_metadata={"description": "Video transcript segments for semantic search"}
+                        )
+                        break
+                    except Exception as e:
+                        if attempt == settings.vector_ingest_retries:
+                            print(f"[VectorService] Segments {start}-{min(end, total)} of video {video_id} failed: {e}")
+                            failed += len(ids[start:end])
+                            return
+                        await asyncio.sleep(0.5 * 2 ** attempt * (0.5 + random.random()))
+
+            indexed += len(ids[start:end])
+            succeeded.append(start)
+            if on_progress is not None:
+                try:
+                    await on_progress(indexed, total)
+                except Exception as e:
+                    print(f"[VectorService] Progress update failed: {e}")
+
+        await asyncio.gather(*(ingest(start) for start in range(0, total, batch_size)))
+
+        # Keyword-index only what made it into the vector store
+        kept = [i for start in sorted(succeeded) for i in range(start, min(start + batch_size, total))]
+        if kept:
+            await self._index_keywords(
+                f"video:{video_id}",
+                [ids[i] for i in kept],
+                [documents[i] for i in kept],
+                [metadatas[i] for i in kept]
             )
-        
-        return len(documents)
+
+        if failed:
+            raise VectorIngestError(video_id, indexed, failed)
+        return indexed
 
     async def query_video_segments(
         self,
         video_id: str,
         query: str,
-        n_results: int = 10
+        n_results: int = 10,
+        mode: Optional[str] = None
     ) -> List[dict]:
+        hybrid = (mode or settings.retrieval_mode) == "hybrid"
         try:
-            video_collection = self.client.get_or_create_collection(name="video_segments", embedding_function=self.embedding_fn)
-            
-            results = video_collection.query(
-                query_texts=[query],
-                n_results=n_results,
+            hits = await self.store.query(
+                VIDEO_SEGMENTS_COLLECTION,
+                query,
+                n_results=n_results * HYBRID_OVERFETCH if hybrid else n_results,
                 where={"video_id": video_id}
             )
+            if hybrid:
+                hits = await self._hybrid([f"video:{video_id}"], query, hits, n_results)
             
             segments = []
-            if results["documents"] and results["documents"][0]:
-                for i, doc in enumerate(results["documents"][0]):
-                    metadata = results["metadatas"][0][i] if results["metadatas"] else {}
-                    segments.append({
-                        "text": doc,
-                        "start_time": metadata.get("start_time", 0),
-                        "end_time": metadata.get("end_time", 0),
-                        "index": metadata.get("index", i),
-                        "distance": results["distances"][0][i] if results.get("distances") else None
-                    })
+            for i, hit in enumerate(hits):
+                metadata = hit["metadata"] or {}
+                segments.append({
+                    "text": hit["document"],
+                    "start_time": metadata.get("start_time", 0),
+                    "end_time": metadata.get("end_time", 0),
+                    "index": metadata.get("index", i),
+                    "distance": hit.get("distance")
+                })
             
             return segments
         except Exception as e:
@@ -205,17 +530,10 @@ class VectorService:
 
     async def delete_video_segments(self, video_id: str) -> int:
         try:
-            video_collection = self.client.get_or_create_collection(name="video_segments", embedding_function=self.embedding_fn)
-
-            results = video_collection.get(
-                where={"video_id": video_id}
-            )
-            
-            if results["ids"]:
-                video_collection.delete(ids=results["ids"])
-                return len(results["ids"])
-            
-            return 0
+            ids = await self.store.get_ids(VIDEO_SEGMENTS_COLLECTION, where={"video_id": video_id})
+            await self.store.delete(VIDEO_SEGMENTS_COLLECTION, ids)
+            await self._drop_keywords(f"video:{video_id}")
+            return len(ids)
         except Exception as e:
             print(f"[VectorService] Error deleting video segments: {e}")
             return 0
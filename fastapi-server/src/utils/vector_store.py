@@ -0,0 +1,542 @@
+import asyncio
+import base64
+import json
+import shutil
+import threading
+from collections import defaultdict
+from collections.abc import Hashable
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.config.settings import settings
+from src.utils.vector import get_embedding_function, run_blocking
+
+
+def matches_where(metadata: dict, where: Optional[dict]) -> bool:
+    """Evaluate a Chroma-style ``where`` filter against one record's metadata.
+
+    Supports field equality, ``$eq``/``$ne``/``$gt``/``$gte``/``$lt``/``$lte``/
+    ``$in``/``$nin`` and nested ``$and``/``$or``.
+    """
+    if not where:
+        return True
+
+    for field, condition in where.items():
+        if field == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+        if field == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+            continue
+
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        for op, expected in condition.items():
+            if op == "$eq":
+                ok = value == expected
+            elif op == "$ne":
+                ok = value != expected
+            elif op == "$in":
+                ok = value in expected
+            elif op == "$nin":
+                ok = value not in expected
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                ok = {
+                    "$gt": value > expected,
+                    "$gte": value >= expected,
+                    "$lt": value < expected,
+                    "$lte": value <= expected,
+                }[op]
+            else:
+                raise ValueError(f"Unsupported where operator: {op}")
+            if not ok:
+                return False
+    return True
+
+
+class ChromaVectorStore:
+    """Collections on Chroma Cloud. Every call runs on the vector thread pool."""
+
+    def __init__(self):
+        if not (settings.chroma_api_key and settings.chroma_tenant and settings.chroma_database):
+            raise ValueError(
+                "Chroma Cloud credentials required. Set CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE"
+            )
+
+        self.embedding_fn = get_embedding_function()
+        self._client = None
+        self._collections = {}
+        self._lock = asyncio.Lock()
+
+    def _connect(self):
+        import chromadb
+        client = chromadb.HttpClient(
+            host="api.trychroma.com",
+            ssl=True,
+            headers={
+                "x-chroma-token": settings.chroma_api_key,
+            },
+            tenant=settings.chroma_tenant,
+            database=settings.chroma_database
+        )
+        print(f"Connected to Chroma Cloud (tenant: {settings.chroma_tenant[:8]}...)")
+        return client
+
+    async def _get_client(self):
+        if self._client is None:
+            # The HttpClient validates the tenant over the network on construction
+            self._client = await run_blocking(self._connect)
+        return self._client
+
+    async def _get_collection(self, name: str, metadata: Optional[dict] = None):
+        if name in self._collections:
+            return self._collections[name]
+
+        async with self._lock:
+            client = await self._get_client()
+            if name not in self._collections:
+                self._collections[name] = await run_blocking(
+                    client.get_or_create_collection,
+                    name=name,
+                    metadata=metadata,
+                    embedding_function=self.embedding_fn
+                )
+        return self._collections[name]
+
+    async def has_collection(self, name: str) -> bool:
+        if name in self._collections:
+            return True
+        client = await self._get_client()
+        try:
+            collection = await run_blocking(client.get_collection, name=name, embedding_function=self.embedding_fn)
+        except Exception:
+            return False
+        self._collections[name] = collection
+        return True
+
+    async def add(
+        self,
+        name: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: Optional[List[dict]] = None,
+        collection_metadata: Optional[dict] = None
+    ) -> None:
+        collection = await self._get_collection(name, collection_metadata)
+        await run_blocking(collection.add, documents=documents, metadatas=metadatas, ids=ids)
+
+    async def query(
+        self,
+        name: str,
+        text: str,
+        n_results: int = 5,
+        where: Optional[dict] = None,
+        include_embeddings: bool = False
+    ) -> List[dict]:
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+
+        collection = await self._get_collection(name)
+        results = await run_blocking(
+            collection.query,
+            query_texts=[text],
+            n_results=n_results,
+            where=where,
+            include=include
+        )
+
+        hits = []
+        if results["documents"] and results["documents"][0]:
+            for i, doc in enumerate(results["documents"][0]):
+                hits.append({
+                    "id": results["ids"][0][i] if results["ids"] else None,
+                    "document": doc,
+                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
+                    "distance": results["distances"][0][i] if results.get("distances") else None
+                })
+                if include_embeddings:
+                    hits[-1]["embedding"] = results["embeddings"][0][i]
+        return hits
+
+    async def get_ids(self, name: str, where: Optional[dict] = None) -> List[str]:
+        collection = await self._get_collection(name)
+        results = await run_blocking(collection.get, where=where, include=[])
+        return results["ids"]
+
+    async def delete(self, name: str, ids: List[str]) -> None:
+        if not ids:
+            return
+        collection = await self._get_collection(name)
+        await run_blocking(collection.delete, ids=ids)
+
+    async def drop(self, name: str) -> None:
+        client = await self._get_client()
+        self._collections.pop(name, None)
+        await run_blocking(client.delete_collection, name=name)
+
+
+# Metadata fields with an in-memory row index, so filters on them skip the scan
+INDEXED_FIELDS = ("course_id", "video_id", "document_id")
+
+
+class LocalCollection:
+    """One collection of the local store: a normalized float32 matrix plus records.
+
+    On disk it is a snapshot (``records.json`` and the ``vectors-<version>.npy``
+    it names) followed by an append-only ``log-<version>.jsonl`` of adds and
+    deletes, so a change writes only itself. Once the log outgrows the live
+    rows it is folded into a new snapshot. records.json is replaced
+    atomically and only ever names complete files, and a torn last log line
+    is ignored, so a crash leaves a loadable collection.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.metadata: dict = {}
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[dict] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.rows: Dict[str, int] = {}
+        self.index: Dict[str, Dict] = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        self.version = 0
+        self.log_entries = 0
+
+        records_path = directory / "records.json"
+        if records_path.exists():
+            records = json.loads(records_path.read_text(encoding="utf-8"))
+            self.metadata = records.get("metadata") or {}
+            self.ids = records["ids"]
+            self.documents = records["documents"]
+            self.metadatas = records["metadatas"]
+            self.version = records.get("version", 0)
+            self.vectors = np.load(directory / records.get("vectors", "vectors.npy"))
+            self.rows = {id_: row for row, id_ in enumerate(self.ids)}
+            self._reindex()
+        self._replay()
+
+    @property
+    def log_path(self) -> Path:
+        return self.directory / f"log-{self.version}.jsonl"
+
+    def exists(self) -> bool:
+        return (self.directory / "records.json").exists() or self.log_path.exists()
+
+    def _replay(self) -> None:
+        if not self.log_path.exists():
+            return
+        with open(self.log_path, "r+b") as f:
+            for line in iter(f.readline, b""):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn write at the tail: cut it so the next append starts a clean line
+                    f.truncate(f.tell() - len(line))
+                    break
+                if entry["op"] == "add":
+                    self.metadata = self.metadata or entry.get("collection_metadata") or {}
+                    vectors = np.frombuffer(base64.b64decode(entry["vectors"]), dtype=np.float32)
+                    self.upsert(entry["ids"], entry["documents"], entry["metadatas"], vectors.reshape(len(entry["ids"]), -1))
+                elif entry["op"] == "delete":
+                    self.remove(entry["ids"])
+                self.log_entries += len(entry["ids"])
+
+    def append(self, entry: dict) -> None:
+        """Log one change, then compact if the log has outgrown the live rows."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.log_entries += len(entry["ids"])
+        if self.log_entries > max(settings.vector_local_compact_min_entries, len(self.ids)):
+            self.compact()
+
+    def log_add(self, ids: List[str], documents: List[str], metadatas: List[dict], vectors: np.ndarray) -> None:
+        self.append({
+            "op": "add",
+            "ids": ids,
+            "documents": documents,
+            "metadatas": metadatas,
+            "vectors": base64.b64encode(np.ascontiguousarray(vectors, dtype=np.float32).tobytes()).decode("ascii"),
+            "collection_metadata": self.metadata,
+        })
+
+    def log_delete(self, ids: List[str]) -> None:
+        self.append({"op": "delete", "ids": ids})
+
+    def compact(self) -> None:
+        """Fold the log into a new snapshot and start an empty log."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.version += 1
+        vectors_name = f"vectors-{self.version}.npy"
+        with open(self.directory / vectors_name, "wb") as f:
+            np.save(f, self.vectors)
+        (self.directory / "records.tmp.json").write_text(json.dumps({
+            "metadata": self.metadata,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+            "version": self.version,
+            "vectors": vectors_name,
+        }, ensure_ascii=False), encoding="utf-8")
+        (self.directory / "records.tmp.json").replace(self.directory / "records.json")
+        self.log_entries = 0
+
+        for path in [*self.directory.glob("vectors*.npy"), *self.directory.glob("log-*.jsonl")]:
+            if path.name != vectors_name:
+                path.unlink(missing_ok=True)
+
+    def _index_row(self, row: int) -> None:
+        metadata = self.metadatas[row]
+        for field in INDEXED_FIELDS:
+            value = metadata.get(field)
+            if value is not None and isinstance(value, Hashable):
+                self.index[field][value].add(row)
+
+    def _unindex_row(self, row: int) -> None:
+        metadata = self.metadatas[row]
+        for field in INDEXED_FIELDS:
+            value = metadata.get(field)
+            if value is not None and isinstance(value, Hashable):
+                self.index[field][value].discard(row)
+
+    def _reindex(self) -> None:
+        self.index = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        for row in range(len(self.ids)):
+            self._index_row(row)
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[dict], vectors: np.ndarray) -> None:
+        if not self.ids:
+            self.vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+
+        new_rows = []
+        for id_, document, metadata, vector in zip(ids, documents, metadatas, vectors):
+            row = self.rows.get(id_)
+            if row is None:
+                row = len(self.ids)
+                self.rows[id_] = row
+                new_rows.append(vector)
+                self.ids.append(id_)
+                self.documents.append(document)
+                self.metadatas.append(metadata)
+            else:
+                self._unindex_row(row)
+                self.vectors[row] = vector
+                self.documents[row] = document
+                self.metadatas[row] = metadata
+            self._index_row(row)
+
+        if new_rows:
+            self.vectors = np.vstack([self.vectors, np.asarray(new_rows, dtype=np.float32)])
+
+    def remove(self, ids: List[str]) -> None:
+        drop = {self.rows[id_] for id_ in ids if id_ in self.rows}
+        if not drop:
+            return
+        keep = [row for row in range(len(self.ids)) if row not in drop]
+        self.ids = [self.ids[row] for row in keep]
+        self.documents = [self.documents[row] for row in keep]
+        self.metadatas = [self.metadatas[row] for row in keep]
+        self.vectors = self.vectors[keep]
+        self.rows = {id_: row for row, id_ in enumerate(self.ids)}
+        self._reindex()
+
+    def _candidates(self, where: Optional[dict]) -> Optional[set]:
+        """Rows an indexed equality or ``$in`` in ``where`` allows, or None if nothing narrows it."""
+        if not where:
+            return None
+        candidates = None
+        for field, condition in where.items():
+            if field == "$and":
+                for clause in condition:
+                    rows = self._candidates(clause)
+                    if rows is not None:
+                        candidates = rows if candidates is None else candidates & rows
+                continue
+            if field not in INDEXED_FIELDS:
+                continue
+            if isinstance(condition, dict) and set(condition) == {"$in"}:
+                values = [value for value in condition["$in"] if isinstance(value, Hashable)]
+                if len(values) != len(condition["$in"]):
+                    continue
+                rows = set().union(*(self.index[field].get(value, set()) for value in values))
+                candidates = rows if candidates is None else candidates & rows
+                continue
+            if isinstance(condition, dict):
+                if set(condition) != {"$eq"}:
+                    continue
+                condition = condition["$eq"]
+            if not isinstance(condition, Hashable):
+                continue
+            rows = self.index[field].get(condition, set())
+            candidates = set(rows) if candidates is None else candidates & rows
+        return candidates
+
+    def filter_rows(self, where: Optional[dict]) -> List[int]:
+        candidates = self._candidates(where)
+        rows = range(len(self.ids)) if candidates is None else sorted(candidates)
+        return [row for row in rows if matches_where(self.metadatas[row], where)]
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorStore:
+    """Exact cosine search over NumPy matrices persisted under ``directory``.
+
+    Each collection is a directory holding a snapshot plus an append-only
+    change log (see LocalCollection), loaded on first use. Distances are
+    cosine distances (``1 - cosine similarity``).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.embedding_fn = get_embedding_function()
+        self._collections: Dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+        print(f"Using local vector index at {self.directory}")
+
+    def _path(self, name: str) -> Path:
+        path = (self.directory / name).resolve()
+        if not path.is_relative_to(self.directory.resolve()):
+            raise ValueError(f"Invalid collection name: {name}")
+        return path
+
+    def _collection(self, name: str) -> LocalCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = LocalCollection(self._path(name))
+            return self._collections[name]
+
+    def _embed(self, texts: List[str], query: bool = False) -> np.ndarray:
+        if self.embedding_fn is None:
+            raise ValueError("The local vector store needs an embedding function. Set GOOGLE_CLOUD_API")
+        if query:
+            return normalize_rows(self.embedding_fn.embed_query(texts))
+        return normalize_rows(self.embedding_fn(texts))
+
+    async def has_collection(self, name: str) -> bool:
+        collection = await run_blocking(self._collection, name)
+        return bool(collection.ids) or collection.exists()
+
+    def _add(self, name, ids, documents, metadatas, collection_metadata) -> None:
+        vectors = self._embed(documents)
+        collection = self._collection(name)
+        with collection.lock:
+            if collection_metadata and not collection.metadata:
+                collection.metadata = collection_metadata
+            metadatas = metadatas or [{} for _ in ids]
+            collection.upsert(ids, documents, metadatas, vectors)
+            collection.log_add(ids, documents, metadatas, vectors)
+
+    async def add(
+        self,
+        name: str,
+        ids: List[str],
+        documents: List[str],
+        metadatas: Optional[List[dict]] = None,
+        collection_metadata: Optional[dict] = None
+    ) -> None:
+        await run_blocking(self._add, name, ids, documents, metadatas, collection_metadata)
+
+    def _query(self, name, text, n_results, where, include_embeddings) -> List[dict]:
+        collection = self._collection(name)
+        # Copy what the hits need while locked: a concurrent delete renumbers rows
+        with collection.lock:
+            rows = collection.filter_rows(where)
+            if not rows:
+                return []
+            vectors = collection.vectors[rows]
+            ids = [collection.ids[row] for row in rows]
+            documents = [collection.documents[row] for row in rows]
+            metadatas = [collection.metadatas[row] for row in rows]
+
+        query_vector = self._embed([text], query=True)[0]
+        distances = 1.0 - vectors @ query_vector
+        k = min(n_results, len(rows))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+
+        hits = []
+        for i in top:
+            hits.append({
+                "id": ids[i],
+                "document": documents[i],
+                "metadata": metadatas[i],
+                "distance": float(distances[i])
+            })
+            if include_embeddings:
+                hits[-1]["embedding"] = vectors[i]
+        return hits
+
+    async def query(
+        self,
+        name: str,
+        text: str,
+        n_results: int = 5,
+        where: Optional[dict] = None,
+        include_embeddings: bool = False
+    ) -> List[dict]:
+        return await run_blocking(self._query, name, text, n_results, where, include_embeddings)
+
+    def _get_ids(self, name, where) -> List[str]:
+        collection = self._collection(name)
+        with collection.lock:
+            return [collection.ids[row] for row in collection.filter_rows(where)]
+
+    async def get_ids(self, name: str, where: Optional[dict] = None) -> List[str]:
+        return await run_blocking(self._get_ids, name, where)
+
+    def _delete(self, name, ids) -> None:
+        collection = self._collection(name)
+        with collection.lock:
+            known = [id_ for id_ in ids if id_ in collection.rows]
+            if known:
+                collection.remove(known)
+                collection.log_delete(known)
+
+    async def delete(self, name: str, ids: List[str]) -> None:
+        if ids:
+            await run_blocking(self._delete, name, ids)
+
+    def _drop(self, name) -> None:
+        with self._lock:
+            self._collections.pop(name, None)
+        shutil.rmtree(self._path(name), True)
+
+    async def drop(self, name: str) -> None:
+        await run_blocking(self._drop, name)
+
+
+_vector_store = None
+
+
+def get_vector_store():
+    global _vector_store
+    if _vector_store is None:
+        has_cloud = settings.chroma_api_key and settings.chroma_tenant and settings.chroma_database
+        backend = settings.vector_backend or ("chroma" if has_cloud else "local")
+        if backend == "chroma":
+            _vector_store = ChromaVectorStore()
+        elif backend == "local":
+            _vector_store = LocalVectorStore(settings.vector_local_dir)
+        else:
+            raise ValueError(f"Unsupported vector backend: {backend}")
+    return _vector_store
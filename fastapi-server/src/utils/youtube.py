@@ -3,6 +3,8 @@ import httpx
 import logging
 from typing import Optional
 
+from src.utils.offline import fake_transcript, is_fake
+
 logger = logging.getLogger(__name__)
 
 def extract_youtube_id(url: str) -> Optional[str]:
@@ -22,6 +24,9 @@ def extract_youtube_id(url: str) -> Optional[str]:
     return None
 
 async def fetch_youtube_title(video_id: str) -> Optional[str]:
+    if is_fake():
+        return None
+
     oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
     
     try:
@@ -112,6 +117,9 @@ class YouTubeTranscriptService:
         
         if not video_id:
             return {"full_text": "", "segments": []}
+
+        if is_fake():
+            return fake_transcript(video_id)
         
         try:
             ytt_api = YouTubeTranscriptApi()
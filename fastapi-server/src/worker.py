@@ -0,0 +1,44 @@
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import argparse
+import asyncio
+import signal
+
+from src.config.settings import settings
+from src.db.mongodb import MongoDB
+from src.graphs.course.worker import CourseWorker
+from src.utils.tokens import get_tokenizer
+
+
+async def run(concurrency: int) -> None:
+    await MongoDB.connect()
+    await asyncio.to_thread(get_tokenizer)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await CourseWorker(concurrency=concurrency).run(stop)
+    finally:
+        await MongoDB.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lumina course generation worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.course_worker_concurrency,
+        help="Number of courses generated at the same time",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()